@@ -0,0 +1,30 @@
+"""
+benchmark of the subset construction in :class:`regex_parser.dfa.DFA`
+
+the pattern `(a|b)*a(a|b)...(a|b)` with `k` copies of `(a|b)`
+has :math:`2^{k+1}` DFA states, the time per DFA state should stay flat
+
+run it after `make install` by
+
+.. code-block:: bash
+
+    python benchmarks/bench_dfa.py
+"""
+import time
+from regex_parser.RegexParser import RegexParser
+from regex_parser.dfa import DFA
+
+
+def bench(k: int):
+    nfa = RegexParser('(a|b)*a' + '(a|b)' * k).build_NFA()
+    begin = time.perf_counter()
+    dfa = DFA(nfa)
+    return len(nfa.states), len(dfa.states), time.perf_counter() - begin
+
+
+if __name__ == '__main__':
+    print(f"{'k':>3} {'NFA':>6} {'DFA':>8} {'seconds':>10} {'us/state':>10}")
+    for k in range(4, 13):
+        nfa_states, dfa_states, seconds = bench(k)
+        print(f"{k:>3} {nfa_states:>6} {dfa_states:>8} "
+              f"{seconds:>10.4f} {seconds / dfa_states * 1e6:>10.1f}")
@@ -0,0 +1,61 @@
+"""
+benchmark of :meth:`regex_parser.dfa.DFA.from_syntax`,
+the direct construction from the syntax tree,
+against the NFA and the subset construction in :class:`regex_parser.dfa.DFA`
+
+the patterns are `(a|b)*a(a|b)...(a|b)` with `k` copies of `(a|b)`,
+which has :math:`2^{k+1}` DFA states, and a union of `n` words
+
+run it after `make install` by
+
+.. code-block:: bash
+
+    python benchmarks/bench_direct.py
+"""
+import random
+import time
+import tracemalloc
+from typing import *
+from regex_parser import syntax
+from regex_parser.RegexParser import RegexParser
+from regex_parser.builder import NFABuilder
+from regex_parser.dfa import DFA
+
+
+def measure(build) -> Tuple[int, float, float]:
+    """the states, the seconds and the peak MiB of a construction"""
+    tracemalloc.start()
+    begin = time.perf_counter()
+    dfa = build()
+    seconds = time.perf_counter() - begin
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return len(dfa.states), seconds, peak
+
+
+def bench(pattern: str):
+    def by_nfa():
+        nfa = RegexParser(pattern, builder=NFABuilder()).build_NFA()
+        return DFA(nfa)
+
+    def direct():
+        return DFA.from_syntax(syntax.parse(pattern))
+
+    return measure(by_nfa), measure(direct)
+
+
+def words(n: int) -> str:
+    random.seed(n)
+    return '|'.join(''.join(random.choice('abcdef') for _ in range(8))
+                    for _ in range(n))
+
+
+if __name__ == '__main__':
+    patterns = [(f"k={k}", '(a|b)*a' + '(a|b)' * k) for k in range(4, 11)]
+    patterns += [(f"n={n}", words(n)) for n in (50, 100, 200)]
+    print(f"{'pattern':>8} {'DFA':>6} "
+          f"{'NFA s':>8} {'NFA MiB':>8} {'direct s':>9} {'direct MiB':>10}")
+    for name, pattern in patterns:
+        (states, nfa_seconds, nfa_peak), (_, seconds, peak) = bench(pattern)
+        print(f"{name:>8} {states:>6} {nfa_seconds:>8.3f} {nfa_peak:>8.2f} "
+              f"{seconds:>9.3f} {peak:>10.2f}")
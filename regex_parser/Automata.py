@@ -6,6 +6,8 @@ reference https://github.com/sdht0/automata-from-regex/blob/master/AutomataTheor
 from __future__ import annotations  # type hint within a class
 from typing import *
 from collections.abc import Iterable
+from regex_parser import serial
+from regex_parser.charclass import CharClass
 # see https://stackoverflow.com/questions/41135033/type-hinting-within-a-class
 from matplotlib import pyplot as plt
 plt.rcParams.update({
@@ -20,6 +22,21 @@ plt.rcParams.update({
 })
 
 
+def iter_bits(mask: int) -> Iterator[int]:
+    """the indexes of the set bits of a mask, from low to high
+
+    :param mask: the bit mask
+    :type mask: int
+    :return: the iterator of the indexes
+    :rtype: Iterator[int]
+    """
+    digits = bin(mask)[:1:-1]  # the lowest bit first
+    i = digits.find('1')
+    while i >= 0:
+        yield i
+        i = digits.find('1', i+1)
+
+
 class Automata:
     r"""
     class to represent a automata
@@ -39,12 +56,15 @@ class Automata:
     """
     empty_string = set([r'\epsilon'])
 
-    def __init__(self, input_alphabet: set = set()):
+    def __init__(self, input_alphabet: set = None):
+        if input_alphabet is None:
+            input_alphabet = set()  # not shared by the instances
         self.states = set()  # a finite states of S
         self.input_alphabet = input_alphabet  # a set of input symbols
         self.start_state = None
         self.final_states = set()
         self.transitions = dict()
+        self.closures = None  # see precompute_closures
 
     def set_start_state(self, state: int):
         """set the start state
@@ -75,6 +95,7 @@ class Automata:
         :type input_symbols: set
         """
         input_symbols = input_symbols.copy() # prevent the source set changing
+        self.closures = None
         self.states.add(from_state)
         self.states.add(to_state)
         if from_state in self.transitions:
@@ -120,6 +141,7 @@ class Automata:
         self.states = set(i+offset for i in self.states)
         self.start_state += offset
         self.final_states = set(i+offset for i in self.final_states)
+        self.closures = None
 
         # change the transition
         new_transitions = dict()
@@ -131,6 +153,108 @@ class Automata:
 
         self.transitions = new_transitions
 
+    def useful_states(self, keep_sink: bool = False) -> Set[int]:
+        """the states reachable from the start state which reach a final
+        state, found by a walk forward from the start state and
+        a walk backward from the final states, :math:`O(n + m)`
+
+        :param keep_sink: keep the reachable states which reach no final
+            state too, so the dead sink of a complete DFA stays
+        :type keep_sink: bool,optional
+        :return: the states, the start state is always kept
+        :rtype: Set[int]
+        """
+        if self.start_state is None:
+            return set()
+        transitions = self.transitions
+        reachable = set([self.start_state])
+        stack = [self.start_state]
+        while stack:
+            for target in transitions.get(stack.pop(), {}):
+                if target not in reachable:
+                    reachable.add(target)
+                    stack.append(target)
+        if keep_sink:
+            return reachable
+
+        # the sources of the edges into each state
+        inverse = dict()
+        for from_state in reachable:
+            for to_state in transitions.get(from_state, {}):
+                inverse.setdefault(to_state, []).append(from_state)
+        useful = reachable & self.final_states
+        stack = list(useful)
+        while stack:
+            for source in inverse.get(stack.pop(), ()):
+                if source not in useful:
+                    useful.add(source)
+                    stack.append(source)
+        useful.add(self.start_state)
+        return useful
+
+    def trim(self, keep_sink: bool = False) -> Set[int]:
+        """remove the states which are not reachable from the start state
+        or which reach no final state, see :meth:`useful_states`
+
+        .. note::
+
+            the automata is changed after call the method
+
+        :param keep_sink: keep the dead sink
+        :type keep_sink: bool,optional
+        :return: the removed states
+        :rtype: Set[int]
+        """
+        useful = self.useful_states(keep_sink)
+        removed = self.states - useful
+        if not removed:
+            return removed
+        transitions = dict()
+        for from_state, to_states in self.transitions.items():
+            if from_state not in useful:
+                continue
+            kept = {to_state: set(symbols)
+                    for to_state, symbols in to_states.items()
+                    if to_state in useful}
+            if kept:
+                transitions[from_state] = kept
+        self.transitions = transitions
+        self.states = self.states & useful
+        self.final_states = self.final_states & useful
+        self.closures = None
+        return removed
+
+    def dump(self, path, keep_sink: bool = False) -> None:
+        """save the automata in the binary format of
+        :mod:`regex_parser.serial`, the useless states are not saved,
+        see :meth:`trim`
+
+        :param path: the path of the file
+        :param keep_sink: save the dead sink
+        :type keep_sink: bool,optional
+        """
+        serial.dump_automata(self, path, keep_sink=keep_sink)
+
+    @classmethod
+    def load(cls, path, use_mmap: bool = True) -> Automata:
+        """load an automata saved by :meth:`dump`.
+        the file is mapped into the memory, the edges are
+        not copied but used in place by a
+        :class:`regex_parser.compact.CompactAutomata`
+
+        :param path: the path of the file
+        :param use_mmap: map the file instead of reading it
+        :type use_mmap: bool,optional
+        :raises ValueError: the file is not an automata of this version
+        :return: the automata
+        :rtype: regex_parser.compact.CompactAutomata
+        """
+        from regex_parser.compact import CompactAutomata  # a subclass
+        automata_class = cls if issubclass(cls, CompactAutomata) \
+            else CompactAutomata
+        return serial.load_automata(automata_class, path,
+                                    use_mmap=use_mmap)
+
     def draw(self, save='temp.pdf', seed: int = None) -> None:
         """
         draw the graph
@@ -160,7 +284,7 @@ class Automata:
                 edges.append((from_state, to_state))
                 labels = []
                 for symbol in symbols:
-                    labels.append(symbol)
+                    labels.append(str(symbol))
                 edge_labels.append("| ".join(labels))
 
         plot((nodes, edges), save,
@@ -188,14 +312,14 @@ class Automata:
         """construct NFA with a single symbol
 
         :param symbol: the symbol
-        :type symbol: Set[str] or str
+        :type symbol: Set[str] or str or CharClass
         :return: a NFA
         :rtype: Automata
         """
-        if isinstance(symbol, str):
+        if isinstance(symbol, (str, CharClass)):
             symbol = set([symbol])
         input_symbol = symbol if symbol else set([r'\epsilon'])
-        basic = Automata()
+        basic = cls()
         if symbol:
             basic.input_alphabet = input_symbol
         basic.set_start_state(1)
@@ -225,6 +349,64 @@ class Automata:
 
         return nfa
 
+    @staticmethod
+    def _wrap(nfa) -> Tuple[int, int]:
+        """add a new begin state and a new end state around the NFA,
+        so the edges added to them do not change the paths inside
+
+        :param nfa: the NFA
+        :type nfa: Automata
+        :return: the new begin state and the new end state
+        :rtype: Tuple[int, int]
+        """
+        nfa.rename(offset=1)
+        start, final = min(nfa.states) - 1, max(nfa.states) + 1
+        nfa.add_transition(start, nfa.start_state, Automata.empty_string)
+        for pre_final in nfa.final_states:
+            nfa.add_transition(pre_final, final, Automata.empty_string)
+        nfa.set_start_state(start)
+        nfa.final_states = set([final])
+        return start, final
+
+    @staticmethod
+    def plus_operation(nfa):
+        """process the operation `s+`, the old end states go back to
+        the old begin state, and a new begin state and a new end state
+        are added, as in :class:`regex_parser.builder.NFABuilder`
+
+        .. note::
+
+            the nfa is changed after call the method
+
+        :param nfa: the previous NFA
+        :type nfa: Automata
+        :return: the new NFA
+        :rtype: Automata
+        """
+        for final_state in nfa.final_states:
+            nfa.add_transition(final_state, nfa.start_state,
+                               set([r"\epsilon"]))
+        Automata._wrap(nfa)
+        return nfa
+
+    @staticmethod
+    def optional_operation(nfa):
+        """process the operation `s?`, add a new begin state and a new
+        end state, and an empty string between them
+
+        .. note::
+
+            the nfa is changed after call the method
+
+        :param nfa: the previous NFA
+        :type nfa: Automata
+        :return: the new NFA
+        :rtype: Automata
+        """
+        start, final = Automata._wrap(nfa)
+        nfa.add_transition(start, final, set([r"\epsilon"]))
+        return nfa
+
     @staticmethod
     def concatenation(base: Automata, addition: Automata) -> Automata:
         """union two Automata
@@ -269,7 +451,7 @@ class Automata:
 
         # update edges and input_alphabet
         basic.add_transition_from_dict(parallel.transitions)
-        basic.input_alphabet = parallel.input_alphabet
+        basic.input_alphabet |= parallel.input_alphabet
 
         # update the start
         new_start_state = min(basic.states) - 1
@@ -296,6 +478,10 @@ class Automata:
         r"""Set of NFA states reachable from NFA state `state`
         on :math:`\epsilon`-transitions alone.
 
+        if :meth:`precompute_closures` has been called,
+        the closure is an OR of the precomputed bit masks
+        instead of a walk on the graph
+
         :param state: the NFA state
         :type state: int or Iterable
         :return: the set of reachable states
@@ -303,22 +489,160 @@ class Automata:
         """
         if not reachable_set:
             reachable_set = set()
-        if isinstance(state, Iterable):
-            for s in state:
-                reachable_set |= self.e_closure(s)
-            return reachable_set
-        if state in reachable_set:
-            return reachable_set
-        reachable_set.add(state)
-        if state not in self.transitions:
+        states = list(state) if isinstance(state, Iterable) else [state]
+        if self.closures is not None:
+            reachable_set |= self.mask_to_states(self.closure_mask(states))
             return reachable_set
-        for target, s in self.transitions[state].items():
-            if '\\epsilon' in s:
-                reachable_set.add(target)
-                reachable_set |= self.e_closure(target, reachable_set)
+
+        # walk the epsilon edges with a stack
+        reachable_set.update(states)
+        while states:
+            for target in self.successors(states.pop(), '\\epsilon'):
+                if target not in reachable_set:
+                    reachable_set.add(target)
+                    states.append(target)
 
         return reachable_set
 
+    def precompute_closures(self) -> None:
+        r"""compute the :math:`\epsilon`-closure of every state once.
+
+        each state gets a bit (see `self.state_bits`), the
+        :math:`\epsilon`-graph is condensed into its strongly connected
+        components by Tarjan's algorithm, the components come out
+        with their successors first, so the closure of a component is the
+        OR of its own bits and the closures of the components it points to.
+
+        the table is dropped when a transition is added
+
+        :ivar self.state_bits: the bit of each state
+        :vartype self.state_bits: Dict[int,int]
+        :ivar self.bit_states: the state of each bit
+        :vartype self.bit_states: List[int]
+        :ivar self.closures: the closure mask of the state of each bit
+        :vartype self.closures: List[int]
+        """
+        self.bit_states = sorted(self.states)
+        self.state_bits = {s: i for i, s in enumerate(self.bit_states)}
+        epsilon_edges = [
+            [self.state_bits[t] for t in self.successors(s, '\\epsilon')]
+            for s in self.bit_states]
+        closures = [0] * len(self.bit_states)
+
+        # iterative Tarjan's algorithm
+        index = [-1] * len(self.bit_states)
+        low = [0] * len(self.bit_states)
+        on_stack = [False] * len(self.bit_states)
+        component = []
+        counter = 0
+        for root in range(len(self.bit_states)):
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            component.append(root)
+            on_stack[root] = True
+            path = [(root, iter(epsilon_edges[root]))]
+            while path:
+                node, edges = path[-1]
+                for target in edges:
+                    if index[target] < 0:
+                        index[target] = low[target] = counter
+                        counter += 1
+                        component.append(target)
+                        on_stack[target] = True
+                        path.append((target, iter(epsilon_edges[target])))
+                        break
+                    if on_stack[target]:
+                        low[node] = min(low[node], index[target])
+                else:
+                    path.pop()
+                    if path:
+                        parent = path[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] != index[node]:
+                        continue
+                    # pop the component, all its successors are done
+                    members = []
+                    while True:
+                        member = component.pop()
+                        on_stack[member] = False
+                        members.append(member)
+                        if member == node:
+                            break
+                    mask = 0
+                    for member in members:
+                        mask |= 1 << member
+                    for member in members:
+                        for target in epsilon_edges[member]:
+                            mask |= closures[target]
+                    for member in members:
+                        closures[member] = mask
+        self.closures = closures
+        self._move_masks = dict()
+
+    def closure_mask(self, states: Iterable) -> int:
+        r"""the :math:`\epsilon`-closure of the states as a bit mask,
+        need :meth:`precompute_closures`
+
+        :param states: the states
+        :type states: Iterable
+        :return: the bit mask of the closure
+        :rtype: int
+        """
+        mask = 0
+        for state in states:
+            mask |= self.closures[self.state_bits[state]]
+        return mask
+
+    def mask_to_states(self, mask: int) -> Set[int]:
+        """decode a bit mask of states
+
+        :param mask: the bit mask
+        :type mask: int
+        :return: the set of states
+        :rtype: Set[int]
+        """
+        return set(self.bit_states[i] for i in iter_bits(mask))
+
+    def move_mask(self, mask: int, symbol: str) -> int:
+        r"""the :math:`\epsilon`-closure of the states reached from the
+        states in `mask` by one edge labelled `symbol`,
+        need :meth:`precompute_closures`
+
+        :param mask: the bit mask of states
+        :type mask: int
+        :param symbol: input symbol
+        :type symbol: str
+        :return: the bit mask of the closure of the reached states
+        :rtype: int
+        """
+        reachable = 0
+        for bit in iter_bits(mask):
+            key = (bit, symbol)
+            if key not in self._move_masks:
+                self._move_masks[key] = self.closure_mask(
+                    self.successors(self.bit_states[bit], symbol))
+            reachable |= self._move_masks[key]
+        return reachable
+
+    def successors(self, state: int, symbol: str) -> List[int]:
+        """the states reached from `state` by one edge labelled `symbol`,
+        or labelled a :class:`CharClass` holding `symbol`
+
+        :param state: the begin state
+        :type state: int
+        :param symbol: input symbol
+        :type symbol: str
+        :return: the target states
+        :rtype: List[int]
+        """
+        if state not in self.transitions:
+            return []
+        return [target for target, s in self.transitions[state].items()
+                if symbol in s or any(symbol in label for label in s
+                                      if isinstance(label, CharClass))]
+
     def move(self, states: Iterable, symbol: str) -> Set[int]:
         """Set of NFA states to which there is a transition
             on a input symbol `symbol` form one state :math:`s`
@@ -331,19 +655,116 @@ class Automata:
         :return: the set of final sets
         :rtype: Set[int]
         """
+        if self.closures is not None:
+            mask = self.closure_mask(states)
+            return self.mask_to_states(mask | self.move_mask(mask, symbol))
         states = set(states)
         states |= self.e_closure(states)
         reachable = set()
         for state in states:
-            if state not in self.transitions:
-                continue
-            for target, s in self.transitions[state].items():
-                if symbol in s:
-                    reachable.add(target)
+            reachable.update(self.successors(state, symbol))
         reachable |= self.e_closure(reachable)
         states |= reachable
         return states
 
+    def states_mask(self, states: Iterable) -> int:
+        """encode the states as a bit mask, without closure,
+        need :meth:`precompute_closures`
+
+        :param states: the states
+        :type states: Iterable
+        :return: the bit mask
+        :rtype: int
+        """
+        mask = 0
+        for state in states:
+            mask |= 1 << self.state_bits[state]
+        return mask
+
+    def _simulation_masks(self) -> Tuple[int, int]:
+        """get the closure of the start state and the mask of the final
+        states, compute the closures table if it is missing
+        """
+        if self.closures is None:
+            self.precompute_closures()
+        return (self.closure_mask([self.start_state]),
+                self.states_mask(self.final_states))
+
+    def fullmatch(self, text: str) -> bool:
+        """check whether the whole `text` is accepted,
+        by simulating the NFA: keep the set of active states
+        and advance it one symbol at a time,
+        :math:`O(len(text) \\times states)`, never backtrack
+
+        :param text: the input string
+        :type text: str
+        :return: whether the automata accept the string
+        :rtype: bool
+        """
+        active, final = self._simulation_masks()
+        for char in text:
+            active = self.move_mask(active, char)
+            if not active:
+                return False
+        return bool(active & final)
+
+    def match(self, text: str) -> Optional[int]:
+        """find the longest prefix of `text` accepted by the automata
+
+        :param text: the input string
+        :type text: str
+        :return: the end of the longest accepted prefix,
+            None if no prefix is accepted
+        :rtype: Optional[int]
+        """
+        active, final = self._simulation_masks()
+        end = 0 if active & final else None
+        for i, char in enumerate(text):
+            active = self.move_mask(active, char)
+            if not active:
+                break
+            if active & final:
+                end = i + 1
+        return end
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """find the leftmost longest substring of `text`
+        accepted by the automata.
+
+        a new thread starts at every position until a match is found,
+        the threads are kept in the order of their begin position,
+        a state already held by an earlier thread is dropped from the
+        later ones, so at most `len(self.states)` states are active
+
+        :param text: the input string
+        :type text: str
+        :return: the span `(begin, end)` of the match,
+            None if there is no match
+        :rtype: Optional[Tuple[int, int]]
+        """
+        start, final = self._simulation_masks()
+        best = (0, 0) if start & final else None
+        threads = [(0, start)]
+        for i, char in enumerate(text):
+            moved = []
+            claimed = 0
+            for begin, active in threads:
+                active = self.move_mask(active, char) & ~claimed
+                if not active:
+                    continue
+                claimed |= active
+                moved.append((begin, active))
+                if active & final and (best is None or begin <= best[0]):
+                    best = (begin, i + 1)
+            if best is None and start & ~claimed:
+                moved.append((i + 1, start & ~claimed))
+            else:
+                moved = [(b, a) for b, a in moved if b <= best[0]]
+            threads = moved
+            if not threads:
+                break
+        return best
+
     # def _get_new_state(self,
     #     states:Dict[frozenset,int],
     #     dfa: Automata,
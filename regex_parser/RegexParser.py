@@ -1,4 +1,7 @@
 from regex_parser.Automata import Automata
+from regex_parser.builder import NFABuilder
+from regex_parser.charclass import CharClass
+from typing import *
 
 
 class RegexParser:
@@ -12,17 +15,34 @@ class RegexParser:
 
         <term> ::= { <factor> }
 
-        <factor> ::= <base> { '*' }
+        <factor> ::= <base> { '*' | '+' | '?' | <count> }
+
+        <count> ::= '{' <number> [ ',' [ <number> ] ] '}'
+                 |  '{' ',' [ <number> ] '}'
 
         <base> ::= <char>
                 |  '\\' <char>
                 |  '(' <regex> ')'
+                |  '[' [ '^' ] <item> { <item> } ']'
+
+        <item> ::= <class char> [ '-' <class char> ]
 
 
     :param pattern: the pattern to match the string
     :type pattern: str
-
-    :ivar self.pattern: the pattern
+    :param builder: the builder of the automata,
+        default to the static methods of :class:`Automata`,
+        so every `parse_*` method returns an :class:`Automata`;
+        :meth:`build_NFA` then uses a new
+        :class:`regex_parser.builder.NFABuilder`, which builds long
+        patterns in linear time. give a
+        :class:`regex_parser.glushkov.GlushkovBuilder`
+        for the position automata without empty edges
+    :type builder: optional
+
+    :ivar self.pattern: the pattern, never changed while parsing
+    :ivar self.position: the index of the next item of the pattern
+    :ivar self.builder: the builder of the automata
     :ivar self.NFA: the NFA machine
     """
     # alphabet = set([chr(i) for i in range(65, 91)])\
@@ -30,23 +50,41 @@ class RegexParser:
     #     .union([chr(i) for i in range(48, 58)])
 
 
-    def __init__(self, pattern: str):
+    def __init__(self, pattern: str, builder=None):
         """store and parse a apttern
 
         :param pattern: the pattern to match the string
         :type pattern: str
+        :param builder: the builder of the automata
+        :type builder: optional
         """
         self.pattern = pattern
+        self.position = 0
+        self.builder = builder if builder else Automata
+        self._default_builder = not builder
+        self._group_ends = None  # '(' -> the position after its ')'
         # self.NFA = self.build_NFA()
 
 
+    def more(self) -> bool:
+        """checks if there is more input.
+
+        :return: whether the pattern is not consumed up
+        :rtype: bool
+        """
+        return self.position < len(self.pattern)
+
     def peek(self) -> str:
         """returns the next item of input without consuming it;
 
         :return: the next character
         :rtype: str
+        :raises RuntimeError: the pattern is consumed up.
         """
-        return self.pattern[0]
+        if not self.more():
+            raise RuntimeError(
+                f"unexpected end of pattern at position {self.position}")
+        return self.pattern[self.position]
 
     def eat(self, item:str) -> None:
         """eat(item) consumes the next item of input, failing if not equal to item.
@@ -57,9 +95,10 @@ class RegexParser:
         :raises RuntimeError: get the wrong letter.
         """
         if(self.peek() == item):
-            self.pattern = self.pattern[1:]
+            self.position += 1
         else:
-            raise RuntimeError(f"expect: {item}; got {self.peek()}")
+            raise RuntimeError(f"expect: {item}; got {self.peek()} "
+                               f"at position {self.position}")
 
     def next(self) -> str:
         """returns the next item of input and consumes it;
@@ -79,6 +118,7 @@ class RegexParser:
             <base> ::= <char>
                     |  '\\' <char>
                     |  '(' <regex> ')'
+                    |  '[' [ '^' ] <item> { <item> } ']'
 
         :return: Automata of this part
         :rtype: Automata
@@ -89,22 +129,276 @@ class RegexParser:
             self.eat(')')
             return r
 
+        elif self.peek() == '[':
+            return self.builder.basic_construct(self.parse_class_part())
         elif self.peek() == '\\':
             self.eat('\\')
             esc = self.next()
-            return Automata.basic_construct(esc)
+            return self.builder.basic_construct(esc)
         else:
-            return Automata.basic_construct(self.next())
+            return self.builder.basic_construct(self.next())
+
+    def parse_class_part(self):
+        """parse a character class, `-` is a range between two characters
+        and a normal character at the begin or the end,
+        `]` is a normal character at the begin, `\\` escapes a character
+
+        .. code-block:: text
+
+            '[' [ '^' ] <item> { <item> } ']'
+
+            <item> ::= <class char> [ '-' <class char> ]
 
-    def parse_factor_part(self) -> Automata:
+        :return: the class, a single character is returned as a string
+        :rtype: CharClass or str
+        """
+        self.eat('[')
+        negate = self.more() and self.peek() == '^'
+        if negate:
+            self.eat('^')
+        intervals = []
+        first = True
+        while first or self.peek() != ']':
+            first = False
+            low = self._class_char()
+            high = low
+            if self.peek() == '-' and \
+                    self.pattern[self.position + 1:self.position + 2] != ']':
+                self.eat('-')
+                high = self._class_char()
+            if low > high:
+                raise RuntimeError(f"bad range: {low}-{high} "
+                                   f"at position {self.position}")
+            intervals.append((ord(low), ord(high)))
+        self.eat(']')
+
+        cls = CharClass(intervals)
+        if negate:
+            cls = ~cls
+        if len(cls.intervals) == 1 and cls.intervals[0][0] == cls.intervals[0][1]:
+            return cls.first()
+        return cls
+
+    def _class_char(self) -> str:
+        """a character in a class, maybe escaped"""
+        if self.peek() == '\\':
+            self.eat('\\')
+        return self.next()
+
+    def parse_factor_part(self, stop: int = None) -> Automata:
+        """parse a base and the operators after it
+
+        .. code-block:: text
+
+            <factor> ::= <base> { '*' | '+' | '?' | <count> }
+
+        `{m,n}` needs the base `n` times, the base is parsed once more
+        into a syntax tree which is folded for each copy, so it works
+        with any builder. a base repeated `{0}` times is only checked,
+        the builder makes nothing for it but the empty string. as in :mod:`re`, a `{` which does not begin
+        a `<count>`, like in `a{` or `a{x}`, is a character
+
+        :param stop: the position to stop parsing the operators,
+            used to parse a copy of the base
+        :type stop: int,optional
+        :return: the NFA of this part
+        :rtype: Automata
+        """
+        # syntax imports this module
+        from regex_parser.syntax import SyntaxBuilder
+        if not isinstance(self.builder, SyntaxBuilder) and \
+                '{' in self.pattern and self._zero_count_ahead():
+            # the base is not used, it is only checked on a syntax tree,
+            # so the builder makes no state for it
+            parser = RegexParser(self.pattern, builder=SyntaxBuilder())
+            parser.position = self.position
+            parser.parse_factor_part(stop)
+            self.position = parser.position
+            return self.builder.empty_construct()
+
+        begin = self.position
         base = self.parse_base_part()
 
-        while(self.pattern and self.peek() == '*'):
-            self.eat('*')
-            base = Automata.star_operation(base)
+        while(self.more() and self.peek() in '*+?{'
+              and (self.peek() != '{'
+                   or self._count_end(self.position) is not None)
+              and (stop is None or self.position < stop)):
+            operator = self.position
+            if self.peek() == '*':
+                self.eat('*')
+                base = self.builder.star_operation(base)
+            elif self.peek() == '+':
+                self.eat('+')
+                base = self.builder.plus_operation(base)
+            elif self.peek() == '?':
+                self.eat('?')
+                base = self.builder.optional_operation(base)
+            else:
+                low, high = self.parse_count_part()
+                base = self._repeat(base, low, high, begin, operator)
 
         return base
 
+    def _count_end(self, i: int) -> Optional[int]:
+        """the end of the `<count>` beginning at `i`, `{` with
+        a number or a comma and `}`, the same as :mod:`re`
+
+        :return: the position after `}`, None if no count begins at `i`
+        :rtype: Optional[int]
+        """
+        if self.pattern[i:i + 1] != '{':
+            return None
+        digits = 0
+        comma = False
+        for i in range(i + 1, len(self.pattern)):
+            char = self.pattern[i]
+            if char in '0123456789':
+                digits += 1
+            elif char == ',' and not comma:
+                comma = True
+            elif char == '}' and (digits > 0 or comma):
+                return i + 1
+            else:
+                return None
+        return None
+
+    def _base_end(self, i: int) -> Optional[int]:
+        """skip the `<base>` beginning at `i` without parsing it,
+        the ends of the groups are found by one scan of the pattern
+
+        :return: the position after the base, None if it is not closed
+        :rtype: Optional[int]
+        """
+        if self._group_ends is None:
+            self._group_ends = dict()
+            opened = []
+            k = 0
+            while k < len(self.pattern):
+                char = self.pattern[k]
+                if char == '(':
+                    opened.append(k)
+                elif char == ')' and opened:
+                    self._group_ends[opened.pop()] = k + 1
+                k = self._char_end(k)
+        if self.pattern[i:i + 1] == '(':
+            return self._group_ends.get(i)
+        end = self._char_end(i)
+        return end if end <= len(self.pattern) else None
+
+    def _char_end(self, i: int) -> int:
+        """skip a character, an escaped character or a class"""
+        pattern = self.pattern
+        if pattern[i] == '\\':
+            return i + 2
+        if pattern[i] != '[':
+            return i + 1
+        i += 1
+        if pattern[i:i + 1] == '^':
+            i += 1
+        first = True
+        while i < len(pattern) and (first or pattern[i] != ']'):
+            first = False
+            i += 2 if pattern[i] == '\\' else 1
+        return i + 1
+
+    def _zero_count_ahead(self) -> bool:
+        """whether a count of at most zero, like `{0}`, follows the base
+        at the position, so the factor is empty"""
+        i = self._base_end(self.position)
+        while i is not None and i < len(self.pattern):
+            if self.pattern[i] in '*+?':
+                i += 1
+                continue
+            end = self._count_end(i)
+            if end is None:
+                break
+            low, comma, high = self.pattern[i + 1:end - 1].partition(',')
+            high = high if comma else low
+            if high and int(high) == 0 and int(low or 0) == 0:
+                return True
+            i = end
+        return False
+
+    def parse_count_part(self) -> Tuple[int, Optional[int]]:
+        """parse the counter of a repetition, `{,n}` is `{0,n}`
+
+        .. code-block:: text
+
+            <count> ::= '{' <number> [ ',' [ <number> ] ] '}'
+                     |  '{' ',' [ <number> ] '}'
+
+        :raises RuntimeError: the maximum is less than the minimum
+        :return: the minimum and the maximum, None for no maximum
+        :rtype: Tuple[int, Optional[int]]
+        """
+        self.eat('{')
+        low = self._number() if self.peek() != ',' else 0
+        high = low
+        if self.peek() == ',':
+            self.eat(',')
+            high = self._number() if self.peek() != '}' else None
+        self.eat('}')
+        if high is not None and high < low:
+            raise RuntimeError(f"bad count {{{low},{high}}} "
+                               f"at position {self.position}")
+        return low, high
+
+    def _number(self) -> int:
+        """a decimal number"""
+        begin = self.position
+        while self.more() and self.peek() in '0123456789':
+            self.position += 1
+        if begin == self.position:
+            raise RuntimeError(f"expect: a number; got {self.peek()} "
+                               f"at position {self.position}")
+        return int(self.pattern[begin:self.position])
+
+    def _repeat(self, base, low: int, high: Optional[int],
+                begin: int, stop: int):
+        """repeat the base from `low` to `high` times
+
+        the base is parsed once more into a
+        :class:`regex_parser.syntax.SyntaxBuilder` tree, and each copy
+        folds the tree into the builder. the copies of a tree are the
+        same tree, so nested counts like `((a{3}){3}){3}` are not parsed
+        again for each copy
+
+        :param base: the first copy of the base
+        :param low: the minimum
+        :type low: int
+        :param high: the maximum, None for no maximum
+        :type high: Optional[int]
+        :param begin: where the base begins in the pattern
+        :type begin: int
+        :param stop: where the base ends in the pattern
+        :type stop: int
+        :return: the NFA of the repetition
+        """
+        # syntax imports this module
+        from regex_parser.syntax import SyntaxBuilder, fold
+        if high == 0:
+            return self.builder.empty_construct()
+
+        copies = high if high is not None else low + 1
+        if isinstance(self.builder, SyntaxBuilder):
+            # a tree is never changed, the copies share it
+            copy = lambda: base
+        elif copies > 1:
+            parser = RegexParser(self.pattern, builder=SyntaxBuilder())
+            parser.position = begin
+            tree = parser.parse_factor_part(stop)
+            copy = lambda: fold(tree, self.builder, finish=False)
+
+        result = None
+        for i in range(copies):
+            part = base if i == 0 else copy()
+            if i >= low:
+                part = self.builder.optional_operation(part) \
+                    if high is not None else self.builder.star_operation(part)
+            result = part if result is None \
+                else self.builder.concatenation(result, part)
+        return result
+
     def parse_term_part(self) -> Automata:
         """check that it has not reached the boundary of a term or the end of the input:
 
@@ -115,10 +409,10 @@ class RegexParser:
         :return: the NFA of this part
         :rtype: Automata
         """
-        factor = Automata.empty_construct()
-        while(self.pattern and self.peek() != ')' and self.peek() != '|'):
+        factor = self.builder.empty_construct()
+        while(self.more() and self.peek() != ')' and self.peek() != '|'):
             next_factor = self.parse_factor_part()
-            factor = Automata.concatenation(factor, next_factor)
+            factor = self.builder.concatenation(factor, next_factor)
 
         return factor
 
@@ -134,10 +428,45 @@ class RegexParser:
         :return: the NFA
         :rtype: Automata
         """
-        term = self.parse_term_part()
-        if(self.pattern and self.peek() == '|'):
+        terms = [self.parse_term_part()]
+        while(self.more() and self.peek() == '|'):
             self.eat('|')
-            regex = self.parse_regex()
-            return Automata.union(term, regex)
-        else:
-            return term
+            terms.append(self.parse_term_part())
+
+        # union from the right, the same as `<term> '|' <regex>`
+        regex = terms.pop()
+        while terms:
+            regex = self.builder.union(terms.pop(), regex)
+        return regex
+
+    def parse(self):
+        """parse the whole pattern, without finishing the builder,
+        so more patterns can be parsed into the same builder
+
+        :raises RuntimeError: some input is left
+        :return: what the builder gives for the pattern
+        """
+        regex = self.parse_regex()
+        if self.more():
+            raise RuntimeError(f"unexpected {self.peek()} "
+                               f"at position {self.position}")
+        return regex
+
+    def build_NFA(self) -> Automata:
+        """parse the whole pattern and get the NFA,
+        without a given builder the NFA is built by a new
+        :class:`regex_parser.builder.NFABuilder`
+
+        :return: the NFA
+        :rtype: Automata
+        """
+        if self._default_builder:
+            parser = RegexParser(self.pattern, builder=NFABuilder())
+            parser.position = self.position
+            nfa = parser.build_NFA()
+            self.position = parser.position
+            return nfa
+        regex = self.parse()
+        if isinstance(regex, Automata):
+            return regex
+        return self.builder.finish(regex)
@@ -0,0 +1,3 @@
+__version__ = '0.1'
+
+from regex_parser.cache import compile, purge
@@ -0,0 +1,97 @@
+"""
+filename src/batch.py
+
+match many strings on a pool of processes
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import *
+from regex_parser.compiled import CompiledDFA
+
+MODES = ('fullmatch', 'match', 'search')
+
+_dfa = None  # the DFA of the worker process
+
+
+def _init(dfa: CompiledDFA) -> None:
+    """keep the DFA in the worker, once for each process"""
+    global _dfa
+    _dfa = dfa
+
+
+def _run(mode: str, lines: List[str]) -> list:
+    """match a chunk of lines in the worker"""
+    method = getattr(_dfa, mode)
+    return [method(line) for line in lines]
+
+
+def _lines(source, encoding: str) -> Iterator[str]:
+    """the lines of a file without the line ends, or the strings"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding=encoding) as f:
+            for line in f:
+                yield line.rstrip('\r\n')
+    else:
+        yield from source
+
+
+def _chunks(lines: Iterator[str], size: int) -> Iterator[List[str]]:
+    """cut the lines into lists of `size` lines"""
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def match_many(dfa, source, mode: str = 'fullmatch', workers: int = None,
+               chunk_size: int = 4096,
+               encoding: str = 'utf-8') -> Iterator[Any]:
+    """match every string of `source` on a pool of processes.
+
+    the DFA is sent once to each worker by the initializer of the
+    :class:`ProcessPoolExecutor`, the tasks only carry chunks of
+    `chunk_size` strings. at most two chunks for each worker are in
+    flight, so the memory does not grow with the input.
+    the results come in the order of the input.
+
+    .. code-block:: python
+
+        dfa = regex_parser.compile('ERROR')
+        errors = sum(1 for span in match_many(dfa, 'big.log', 'search')
+                     if span is not None)
+
+    :param dfa: the DFA
+    :type dfa: CompiledDFA or regex_parser.dfa.DFA
+    :param source: the strings, or the path of a file whose lines are matched
+    :type source: Iterable[str] or str or os.PathLike
+    :param mode: the method of :class:`CompiledDFA` to call,
+        ``'fullmatch'``, ``'match'`` or ``'search'``
+    :type mode: str,optional
+    :param workers: the number of processes, default to the number of CPUs
+    :type workers: int,optional
+    :param chunk_size: the number of strings in a task
+    :type chunk_size: int,optional
+    :param encoding: the encoding of the file
+    :type encoding: str,optional
+    :raises ValueError: unknown mode
+    :return: the result of `mode` for each string
+    :rtype: Iterator[Any]
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown mode: {mode}")
+    if not isinstance(dfa, CompiledDFA):
+        dfa = dfa.compile()
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(iter(_lines(source, encoding)), chunk_size)
+    with ProcessPoolExecutor(workers, initializer=_init,
+                             initargs=(dfa,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_run, mode, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
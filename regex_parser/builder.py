@@ -0,0 +1,171 @@
+"""
+filename src/builder.py
+
+build the NFA of a whole pattern in one automata
+"""
+from typing import *
+from regex_parser.Automata import Automata
+from regex_parser.charclass import CharClass
+
+
+class Fragment(NamedTuple):
+    """a part of the NFA with one begin state and one end state
+
+    :ivar start: the begin state
+    :ivar final: the end state
+    """
+    start: int
+    final: int
+
+
+class NFABuilder:
+    r"""Thompson construction on a single shared automata.
+
+    the methods have the same names as the static methods of
+    :class:`regex_parser.Automata.Automata`, so it can be given to
+    :class:`regex_parser.RegexParser.RegexParser` as the `builder`.
+    Instead of a new automata, every method returns a :class:`Fragment`
+    of `self.nfa`, the states come from a counter,
+    so no :meth:`Automata.rename` is needed and every operation
+    adds a constant number of states and edges.
+
+    .. code-block:: python
+
+        builder = NFABuilder()
+        nfa = RegexParser('(a|b)*abb', builder=builder).build_NFA()
+
+    :param automata_class: the class of the automata to build,
+        for example :class:`regex_parser.compact.CompactAutomata`
+    :type automata_class: type,optional
+
+    :ivar self.nfa: the automata holding all the fragments
+    :ivar self.counter: the last state allocated
+    """
+
+    def __init__(self, automata_class: type = Automata):
+        self.nfa = automata_class(set())
+        self.counter = 0
+
+    def new_state(self) -> int:
+        """allocate a new state
+
+        :return: the new state
+        :rtype: int
+        """
+        self.counter += 1
+        self.nfa.states.add(self.counter)
+        return self.counter
+
+    def _epsilon(self, from_state: int, to_state: int) -> None:
+        """add an edge on the empty string"""
+        self.nfa.add_transition(from_state, to_state, Automata.empty_string)
+
+    def empty_construct(self) -> Fragment:
+        r"""the fragment of :math:`\epsilon`
+
+        :return: the fragment
+        :rtype: Fragment
+        """
+        start, final = self.new_state(), self.new_state()
+        self._epsilon(start, final)
+        return Fragment(start, final)
+
+    def basic_construct(self, symbol) -> Fragment:
+        """the fragment of a single symbol
+
+        :param symbol: the symbol
+        :type symbol: Set[str] or str or CharClass
+        :return: the fragment
+        :rtype: Fragment
+        """
+        if isinstance(symbol, (str, CharClass)):
+            symbol = set([symbol])
+        start, final = self.new_state(), self.new_state()
+        self.nfa.add_transition(start, final, symbol)
+        self.nfa.input_alphabet |= symbol - Automata.empty_string
+        return Fragment(start, final)
+
+    def star_operation(self, fragment: Fragment) -> Fragment:
+        """the fragment of `s*`
+
+        :param fragment: the fragment of `s`
+        :type fragment: Fragment
+        :return: the new fragment
+        :rtype: Fragment
+        """
+        start, final = self.new_state(), self.new_state()
+        self._epsilon(start, fragment.start)
+        self._epsilon(start, final)
+        self._epsilon(fragment.final, fragment.start)
+        self._epsilon(fragment.final, final)
+        return Fragment(start, final)
+
+    def plus_operation(self, fragment: Fragment) -> Fragment:
+        """the fragment of `s+`
+
+        :param fragment: the fragment of `s`
+        :type fragment: Fragment
+        :return: the new fragment
+        :rtype: Fragment
+        """
+        start, final = self.new_state(), self.new_state()
+        self._epsilon(start, fragment.start)
+        self._epsilon(fragment.final, fragment.start)
+        self._epsilon(fragment.final, final)
+        return Fragment(start, final)
+
+    def optional_operation(self, fragment: Fragment) -> Fragment:
+        """the fragment of `s?`
+
+        :param fragment: the fragment of `s`
+        :type fragment: Fragment
+        :return: the new fragment
+        :rtype: Fragment
+        """
+        start, final = self.new_state(), self.new_state()
+        self._epsilon(start, fragment.start)
+        self._epsilon(start, final)
+        self._epsilon(fragment.final, final)
+        return Fragment(start, final)
+
+    def concatenation(self, base: Fragment, addition: Fragment) -> Fragment:
+        """the fragment of `st`
+
+        :param base: the fragment of `s`
+        :type base: Fragment
+        :param addition: the fragment of `t`
+        :type addition: Fragment
+        :return: the new fragment
+        :rtype: Fragment
+        """
+        self._epsilon(base.final, addition.start)
+        return Fragment(base.start, addition.final)
+
+    def union(self, basic: Fragment, parallel: Fragment) -> Fragment:
+        """the fragment of `s|t`
+
+        :param basic: the fragment of `s`
+        :type basic: Fragment
+        :param parallel: the fragment of `t`
+        :type parallel: Fragment
+        :return: the new fragment
+        :rtype: Fragment
+        """
+        start, final = self.new_state(), self.new_state()
+        self._epsilon(start, basic.start)
+        self._epsilon(start, parallel.start)
+        self._epsilon(basic.final, final)
+        self._epsilon(parallel.final, final)
+        return Fragment(start, final)
+
+    def finish(self, fragment: Fragment) -> Automata:
+        """make the fragment the whole automata
+
+        :param fragment: the fragment of the whole pattern
+        :type fragment: Fragment
+        :return: the NFA
+        :rtype: Automata
+        """
+        self.nfa.set_start_state(fragment.start)
+        self.nfa.add_final_states(fragment.final)
+        return self.nfa
@@ -0,0 +1,194 @@
+"""
+filename src/cache.py
+
+compile a pattern once, keep the result in memory and on disk
+"""
+import hashlib
+import os
+import stat
+import weakref
+from functools import lru_cache
+from typing import *
+import regex_parser
+from regex_parser import syntax
+from regex_parser.builder import NFABuilder
+from regex_parser.compiled import CompiledDFA
+from regex_parser.dfa import DFA
+from regex_parser.equivalence import canonical_hash
+from regex_parser.prefilter import Prefilter
+from regex_parser.utf8 import ByteBuilder, ByteDFA
+
+MAX_CACHED = 256
+"""the most patterns kept by :func:`compile` in memory"""
+
+
+
+def build(pattern: str, minimize: bool = True,
+          utf8: bool = False) -> CompiledDFA:
+    """parse the pattern and compile its DFA, without any cache,
+    the literals of the pattern are kept as the prefilter of the search
+
+    :param pattern: the pattern
+    :type pattern: str
+    :param minimize: whether to minimize the DFA
+    :type minimize: bool
+    :param utf8: build the DFA over the UTF-8 bytes,
+        see :class:`regex_parser.utf8.ByteDFA`
+    :type utf8: bool
+    :return: the compiled DFA
+    :rtype: CompiledDFA
+    """
+    tree = syntax.parse(pattern)
+    return _build(tree, _dfa(tree, minimize, utf8), utf8)
+
+
+def _dfa(tree, minimize: bool, utf8: bool) -> DFA:
+    """the DFA of a syntax tree"""
+    builder = ByteBuilder(NFABuilder()) if utf8 else NFABuilder()
+    dfa = DFA(syntax.fold(tree, builder))
+    if minimize:
+        dfa, _ = dfa.minimize()
+    return dfa
+
+
+def _build(tree, dfa: DFA, utf8: bool) -> CompiledDFA:
+    """compile the DFA of a syntax tree with its prefilter"""
+    compiled = ByteDFA(dfa) if utf8 else dfa.compile()
+    compiled.prefilter = Prefilter.from_syntax(tree, utf8)
+    return compiled
+
+
+# the compiled DFAs in use, by the canonical hash of their minimal DFA
+_shared = weakref.WeakValueDictionary()
+
+
+def _build_shared(pattern: str, minimize: bool,
+                  utf8: bool) -> CompiledDFA:
+    """build the pattern, or reuse the compiled DFA of an equivalent
+    pattern, found by the :func:`canonical_hash` of the minimal DFA.
+    the hash is looked up before the table and the prefilter are made,
+    but the minimal DFA is needed for the hash, so it is always built.
+    the prefilter of the first pattern is kept, it holds for all
+    the patterns, since they match the same strings"""
+    if not minimize:
+        return build(pattern, minimize, utf8)
+    tree = syntax.parse(pattern)
+    dfa = _dfa(tree, minimize, utf8)
+    key = (canonical_hash(dfa, minimize=False), utf8)
+    compiled = _shared.get(key)
+    if compiled is None:
+        compiled = _build(tree, dfa, utf8)
+        _shared[key] = compiled
+    return compiled
+
+
+def cache_key(pattern: str, minimize: bool = True,
+              utf8: bool = False) -> str:
+    """the name of the pattern in the cache directory,
+    a hash of the pattern, the options and the library version
+
+    :param pattern: the pattern
+    :type pattern: str
+    :param minimize: whether to minimize the DFA
+    :type minimize: bool
+    :param utf8: whether the DFA is over the UTF-8 bytes
+    :type utf8: bool
+    :return: the hex digest
+    :rtype: str
+    """
+    key = repr((regex_parser.__version__, pattern, minimize, utf8))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def private_dir(directory: str) -> None:
+    """create the directory only readable by the user, or check that
+    nobody else can write into it, since what is in it is trusted
+
+    :param directory: the directory
+    :type directory: str
+    :raises PermissionError: the directory is not a directory of the
+        user, or others can write into it
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"not a directory: {directory}")
+    if hasattr(os, 'getuid') and (info.st_uid != os.getuid()
+                                  or info.st_mode & 0o022):
+        raise PermissionError(f"unsafe cache directory: {directory}")
+
+
+def _load(path: str, pattern: str, utf8: bool) -> Optional[CompiledDFA]:
+    """map a compiled DFA saved by :meth:`CompiledDFA.dump` and make its
+    prefilter again, None if the file is missing, of another version
+    or broken"""
+    try:
+        compiled = (ByteDFA if utf8 else CompiledDFA).load(path)
+    except (OSError, ValueError):
+        return None
+    compiled.prefilter = Prefilter.from_syntax(syntax.parse(pattern), utf8)
+    return compiled
+
+
+@lru_cache(maxsize=MAX_CACHED)
+def _compile(pattern: str, minimize: bool, utf8: bool,
+             cache_dir: Optional[str]) -> CompiledDFA:
+    if cache_dir is None:
+        return _build_shared(pattern, minimize, utf8)
+    private_dir(cache_dir)
+    path = os.path.join(cache_dir,
+                        cache_key(pattern, minimize, utf8) + '.rxp')
+    compiled = _load(path, pattern, utf8)
+    if compiled is None:
+        compiled = _build_shared(pattern, minimize, utf8)
+        compiled.dump(path)
+    return compiled
+
+
+def compile(pattern: str, minimize: bool = True, cache_dir: str = None,
+            utf8: bool = False) -> CompiledDFA:
+    """compile a pattern to a :class:`CompiledDFA`.
+
+    the last :data:`MAX_CACHED` results are kept in memory,
+    keyed by the pattern and the options.
+    the minimal DFAs are also keyed by their
+    :func:`regex_parser.equivalence.canonical_hash`, so the patterns
+    matching the same strings, like `(a|b)*` and `(a*b*)*`,
+    share one compiled DFA while it is in use. this saves the memory
+    and the transition table of the second pattern, not its parsing,
+    subset construction and minimization, which give the hash.
+    the shared DFA keeps the `prefilter` of the pattern compiled first,
+    so change the prefilter only on a DFA from :func:`build`.
+    if `cache_dir` is given, the result is also stored in that
+    directory in the format of :mod:`regex_parser.serial`, named by
+    :func:`cache_key`, and later processes map it instead of building
+    it again, only the prefilter is made again from the pattern.
+    the directory is made private to the user, see :func:`private_dir`.
+
+    .. code-block:: python
+
+        import regex_parser
+        regex_parser.compile('(a|b)*abb').fullmatch('aabb')
+
+    :param pattern: the pattern
+    :type pattern: str
+    :param minimize: whether to minimize the DFA
+    :type minimize: bool,optional
+    :param cache_dir: the directory of the disk cache
+    :type cache_dir: str,optional
+    :param utf8: build the DFA over the UTF-8 bytes, to match `bytes`,
+        see :class:`regex_parser.utf8.ByteDFA`
+    :type utf8: bool,optional
+    :raises PermissionError: others can write into `cache_dir`
+    :return: the compiled DFA, shared by all the callers
+    :rtype: CompiledDFA
+    """
+    if cache_dir is not None:
+        cache_dir = os.fspath(cache_dir)
+    return _compile(pattern, minimize, utf8, cache_dir)
+
+
+def purge() -> None:
+    """clear the in memory cache of :func:`compile`"""
+    _compile.cache_clear()
+    _shared.clear()
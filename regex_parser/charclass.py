@@ -0,0 +1,242 @@
+"""
+filename src/charclass.py
+
+sets of characters kept as intervals, used as one edge label
+"""
+from __future__ import annotations
+from bisect import bisect_right
+from typing import *
+
+MAX_CODE_POINT = 0x10FFFF
+
+
+class CharClass:
+    r"""a set of characters, as sorted disjoint intervals of code points,
+    for example `[a-z0-9]` is `((48, 57), (97, 122))`.
+
+    a class is put on an edge as one input symbol,
+    `char in cls` tells whether the edge can be taken on `char`,
+    so the automata does not need one edge for each character.
+
+    :param intervals: the closed intervals `(low, high)` of code points,
+        they may overlap and be in any order
+    :type intervals: Iterable[Tuple[int, int]]
+
+    :ivar self.intervals: the sorted, merged intervals
+    :vartype self.intervals: Tuple[Tuple[int, int], ...]
+    """
+    __slots__ = ('intervals', '_lows')
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        merged = []
+        for low, high in sorted(intervals):
+            if merged and low <= merged[-1][1] + 1:
+                if high > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], high)
+            else:
+                merged.append((low, high))
+        self.intervals = tuple(merged)
+        self._lows = [low for low, _ in merged]
+
+    @classmethod
+    def from_chars(cls, chars: Iterable[str]) -> CharClass:
+        """the class of some characters
+
+        :param chars: the characters
+        :type chars: Iterable[str]
+        :return: the class
+        :rtype: CharClass
+        """
+        return cls((ord(c), ord(c)) for c in chars)
+
+    @classmethod
+    def from_range(cls, low: str, high: str) -> CharClass:
+        """the class `[low-high]`
+
+        :param low: the first character
+        :type low: str
+        :param high: the last character
+        :type high: str
+        :raises RuntimeError: `low` is after `high`
+        :return: the class
+        :rtype: CharClass
+        """
+        if ord(low) > ord(high):
+            raise RuntimeError(f"bad range: {low}-{high}")
+        return cls([(ord(low), ord(high))])
+
+    def __contains__(self, char) -> bool:
+        if not isinstance(char, str) or len(char) != 1:
+            return False
+        code = ord(char)
+        i = bisect_right(self._lows, code) - 1
+        return i >= 0 and code <= self.intervals[i][1]
+
+    def __len__(self) -> int:
+        """the number of characters"""
+        return sum(high - low + 1 for low, high in self.intervals)
+
+    def __iter__(self) -> Iterator[str]:
+        for low, high in self.intervals:
+            for code in range(low, high + 1):
+                yield chr(code)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CharClass) and self.intervals == other.intervals
+
+    def __hash__(self) -> int:
+        return hash(self.intervals)
+
+    def __or__(self, other: CharClass) -> CharClass:
+        return CharClass(self.intervals + other.intervals)
+
+    def __and__(self, other: CharClass) -> CharClass:
+        return ~(~self | ~other)
+
+    def __sub__(self, other: CharClass) -> CharClass:
+        return self & ~other
+
+    def __invert__(self) -> CharClass:
+        """the characters not in the class, `[^...]`"""
+        complement = []
+        low = 0
+        for begin, end in self.intervals:
+            if begin > low:
+                complement.append((low, begin - 1))
+            low = end + 1
+        if low <= MAX_CODE_POINT:
+            complement.append((low, MAX_CODE_POINT))
+        return CharClass(complement)
+
+    def first(self) -> str:
+        """the character with the smallest code point
+
+        :return: the character
+        :rtype: str
+        """
+        return chr(self.intervals[0][0])
+
+    def __repr__(self) -> str:
+        def show(code):
+            char = chr(code)
+            if char in '\\]-^' or not char.isprintable():
+                return f"\\x{{{code:x}}}"
+            return char
+        parts = []
+        for low, high in self.intervals:
+            if low == high:
+                parts.append(show(low))
+            else:
+                parts.append(f"{show(low)}-{show(high)}")
+        return '[' + ''.join(parts) + ']'
+
+    __str__ = __repr__
+
+
+def symbol_key(symbol) -> tuple:
+    """the sort key of the input symbols,
+    put the strings before the classes
+
+    :param symbol: the input symbol
+    :type symbol: str or CharClass
+    :return: the key
+    :rtype: tuple
+    """
+    if isinstance(symbol, CharClass):
+        return (1, symbol.intervals)
+    return (0, symbol)
+
+
+def representative(symbol) -> str:
+    """a character on which an edge labelled `symbol` can be taken
+
+    :param symbol: the input symbol
+    :type symbol: str or CharClass
+    :return: the character
+    :rtype: str
+    """
+    if isinstance(symbol, CharClass):
+        return symbol.first()
+    return symbol
+
+
+def partition(symbols: Iterable) -> List:
+    """split the characters of the symbols into disjoint atoms,
+    the characters of an atom are in exactly the same symbols.
+    an atom of one character is the character itself,
+    a longer atom is a :class:`CharClass`, the strings longer than
+    one character are kept as they are
+
+    for example `{'x', [a-z]}` gives `'x', [a-w], [y-z]`
+
+    :param symbols: the input symbols
+    :type symbols: Iterable
+    :return: the atoms, sorted by :func:`symbol_key`
+    :rtype: List
+    """
+    words = set()
+    bounds = []
+    for symbol in symbols:
+        if isinstance(symbol, CharClass):
+            intervals = symbol.intervals
+        elif len(symbol) == 1:
+            intervals = ((ord(symbol), ord(symbol)),)
+        else:
+            words.add(symbol)
+            continue
+        for low, high in intervals:
+            bounds.append((low, 1))  # an interval begins
+            bounds.append((high + 1, -1))  # an interval ends
+    bounds.sort()
+
+    atoms = []
+    depth = 0
+    i = 0
+    while i < len(bounds):
+        point = bounds[i][0]
+        while i < len(bounds) and bounds[i][0] == point:
+            depth += bounds[i][1]
+            i += 1
+        if depth > 0 and i < len(bounds):
+            end = bounds[i][0] - 1
+            atoms.append(chr(point) if point == end
+                         else CharClass([(point, end)]))
+    return sorted(list(words) + atoms, key=symbol_key)
+
+
+def equivalence_classes(symbols: Iterable) -> List:
+    """merge the atoms of :func:`partition` which are in exactly the same
+    symbols, the characters of a class take the same edges from every
+    state, so the class can be one column of a DFA.
+
+    for example `{'x', [a-z]}` gives `'x', [a-wy-z]`,
+    where :func:`partition` gives `'x', [a-w], [y-z]`
+
+    :param symbols: the input symbols
+    :type symbols: Iterable
+    :return: the classes, a class of one character is the character,
+        sorted by :func:`symbol_key`
+    :rtype: List
+    """
+    symbols = set(symbols)
+    labels = [symbol for symbol in symbols if isinstance(symbol, CharClass)]
+    groups = dict()  # the symbols holding an atom -> the atoms
+    classes = []
+    for atom in partition(symbols):
+        if not isinstance(atom, CharClass) and len(atom) != 1:
+            classes.append(atom)  # a word is only in itself
+            continue
+        char = representative(atom)
+        signature = (char if char in symbols else None,
+                     frozenset(i for i, cls in enumerate(labels)
+                               if char in cls))
+        groups.setdefault(signature, []).append(atom)
+    for atoms in groups.values():
+        if len(atoms) == 1:
+            classes.append(atoms[0])
+            continue
+        merged = CharClass(interval for atom in atoms for interval in (
+            atom.intervals if isinstance(atom, CharClass)
+            else ((ord(atom), ord(atom)),)))
+        classes.append(merged)
+    return sorted(classes, key=symbol_key)
@@ -0,0 +1,230 @@
+"""
+filename src/codegen.py
+
+generate a standalone Python module matching a DFA
+"""
+import importlib.util
+import os
+import tempfile
+from types import ModuleType
+from typing import *
+from regex_parser.cache import build, cache_key, private_dir
+from regex_parser.charclass import CharClass
+from regex_parser.compiled import CompiledDFA
+from regex_parser.serial import write_atomic
+
+CACHE_DIR = os.path.join(
+    tempfile.gettempdir(),
+    f"regex_parser-{os.getuid()}" if hasattr(os, 'getuid')
+    else 'regex_parser')
+"""the default directory of the modules made by :func:`load`,
+one for each user"""
+
+TEMPLATE_VERSION = 2
+"""the version of :data:`TEMPLATE`, in the names of the modules,
+change it with the template so the old modules are not loaded"""
+
+TEMPLATE = '''\
+"""
+a matcher of the pattern `PATTERN`
+
+generated by regex_parser.codegen, only the standard library is needed
+"""
+from bisect import bisect_right
+
+PATTERN = {pattern!r}
+
+# the next state on each character, one dict for each state,
+# the characters of the classes are added when they are met
+_NEXT = {next}
+
+# the classes leaving each state, the sorted lows of the intervals
+# and the (high, next state) of each interval
+_LOWS = {lows}
+_RANGES = {ranges}
+
+_ACCEPTING = {accepting}
+
+
+def _step(state, char):
+    """the next state, -1 if there is none"""
+    lows = _LOWS[state]
+    target = -1
+    if lows and len(char) == 1:
+        code = ord(char)
+        i = bisect_right(lows, code) - 1
+        if i >= 0 and code <= _RANGES[state][i][0]:
+            target = _RANGES[state][i][1]
+    _NEXT[state][char] = target
+    return target
+
+
+def match(text, begin=0):
+    """the end of the longest match beginning at `begin`,
+    None if there is no match"""
+    next_ = _NEXT
+    accepting = _ACCEPTING
+    state = 0
+    end = begin if accepting[0] else None
+    for i in range(begin, len(text)):
+        char = text[i]
+        target = next_[state].get(char)
+        if target is None:
+            target = _step(state, char)
+        if target < 0:
+            break
+        state = target
+        if accepting[state]:
+            end = i + 1
+    return end
+
+
+def fullmatch(text):
+    """whether the whole `text` is matched"""
+    next_ = _NEXT
+    state = 0
+    for char in text:
+        target = next_[state].get(char)
+        if target is None:
+            target = _step(state, char)
+        if target < 0:
+            return False
+        state = target
+    return _ACCEPTING[state]
+
+
+def search(text):
+    """the span (begin, end) of the leftmost longest match,
+    None if there is no match.
+    a thread (begin, state) begins at each position until a match is
+    found, a state held by an earlier thread is dropped from the later
+    ones, so the text is read once"""
+    if _ACCEPTING[0]:
+        return (0, match(text))
+    next_ = _NEXT
+    accepting = _ACCEPTING
+    threads = []
+    best = None
+    for i, char in enumerate(text):
+        if best is None:
+            threads.append((i, 0))
+        moved = []
+        claimed = set()
+        for begin, state in threads:
+            target = next_[state].get(char)
+            if target is None:
+                target = _step(state, char)
+            if target < 0 or target in claimed:
+                continue
+            claimed.add(target)
+            moved.append((begin, target))
+            if accepting[target] and (best is None or begin <= best[0]):
+                best = (begin, i + 1)
+        if best is not None:
+            moved = [thread for thread in moved if thread[0] <= best[0]]
+            if not moved:
+                break
+        threads = moved
+    return best
+'''
+
+
+def generate(dfa, pattern: str = None) -> str:
+    """generate the source of a module matching the DFA.
+
+    the module has the functions `fullmatch(text)`, `match(text, begin=0)`
+    and `search(text)` of :class:`CompiledDFA`, as loops over
+    local variables and a dict lookup for each character.
+    it imports only :mod:`bisect`, so it can be used without
+    `regex_parser`, `matplotlib` or `IPython`.
+
+    .. code-block:: python
+
+        dfa, _ = DFA(nfa).minimize()
+        with open('abb.py', 'w') as f:
+            f.write(generate(dfa, '(a|b)*abb'))
+
+    :param dfa: the DFA, minimize it first for a smaller module
+    :type dfa: regex_parser.dfa.DFA or CompiledDFA
+    :param pattern: the pattern, written in the module
+    :type pattern: str,optional
+    :raises ValueError: a symbol is longer than one character
+    :return: the source of the module
+    :rtype: str
+    """
+    if not isinstance(dfa, CompiledDFA):
+        dfa = dfa.compile()
+    next_, lows, ranges = [], [], []
+    for state in range(len(dfa)):
+        chars, intervals = {}, []
+        for column, symbol in enumerate(dfa.symbols):
+            target = dfa.table[state * dfa.width + column]
+            if target < 0:
+                continue
+            if isinstance(symbol, CharClass):
+                intervals.extend((low, high, target)
+                                 for low, high in symbol.intervals)
+            elif len(symbol) == 1:
+                chars[symbol] = target
+            else:
+                raise ValueError(f"bad symbol: {symbol!r}")
+        intervals.sort()
+        next_.append(chars)
+        lows.append(tuple(low for low, _, _ in intervals))
+        ranges.append(tuple((high, target) for _, high, target in intervals))
+    accepting = tuple(dfa.is_accepting(state) for state in range(len(dfa)))
+    return TEMPLATE.format(pattern=pattern, next=_tuple(next_),
+                           lows=_tuple(lows), ranges=_tuple(ranges),
+                           accepting=repr(accepting))
+
+
+def _tuple(items: list) -> str:
+    """the literal of a tuple, one item a line"""
+    return '(\n' + ''.join(f"    {item!r},\n" for item in items) + ')'
+
+
+_modules = dict()  # path -> module
+
+
+def load(pattern: str, minimize: bool = True,
+         cache_dir: str = None) -> ModuleType:
+    """get the generated module of a pattern.
+
+    the module is written once to `cache_dir`, named by the
+    :func:`regex_parser.cache.cache_key` of the pattern and
+    :data:`TEMPLATE_VERSION`, later calls and processes only import it
+    by :mod:`importlib`. since the module is run, the directory must
+    belong to the user and be writable only by the user, the default
+    directory is created with the mode `0700`.
+
+    .. code-block:: python
+
+        abb = load('(a|b)*abb')
+        abb.fullmatch('aabb')
+
+    :param pattern: the pattern
+    :type pattern: str
+    :param minimize: whether to minimize the DFA
+    :type minimize: bool,optional
+    :param cache_dir: the directory of the modules,
+        default to :data:`CACHE_DIR`
+    :type cache_dir: str,optional
+    :raises PermissionError: others can write into the directory
+    :return: the module
+    :rtype: ModuleType
+    """
+    directory = os.fspath(cache_dir) if cache_dir is not None else CACHE_DIR
+    name = f"matcher_v{TEMPLATE_VERSION}_{cache_key(pattern, minimize)}"
+    path = os.path.join(directory, name + '.py')
+    module = _modules.get(path)
+    if module is not None:
+        return module
+    private_dir(directory)
+    if not os.path.exists(path):
+        write_atomic(path, generate(build(pattern, minimize),
+                                     pattern).encode('utf-8'))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _modules[path] = module
+    return module
@@ -0,0 +1,307 @@
+"""
+filename src/compact.py
+
+a memory friendly backend of :class:`regex_parser.Automata.Automata`
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import *
+from regex_parser.Automata import Automata
+from regex_parser.charclass import CharClass
+
+
+class TransitionsView(Mapping):
+    """read only view of the edges of a :class:`CompactAutomata`,
+    it looks like the `transitions` dict of :class:`Automata`,
+    `view[f][t] = d` where d is the set of input symbols
+
+    .. note::
+
+        the inner dicts are built on each access,
+        changing them does not change the automata,
+        use :meth:`CompactAutomata.add_transition` instead
+
+    :param automata: the automata to view
+    :type automata: CompactAutomata
+    """
+
+    def __init__(self, automata: CompactAutomata):
+        self.automata = automata
+
+    def __getitem__(self, from_state: int) -> Dict[int, Set[str]]:
+        automata = self.automata
+        automata.build_index()
+        row = automata.row_of(from_state)
+        if row < 0:
+            raise KeyError(from_state)
+        to_states = dict()
+        for i in range(automata._offsets[row], automata._offsets[row+1]):
+            symbol = automata._symbols[automata._labels[i]]
+            to_states.setdefault(automata._targets[i], set()).add(symbol)
+        return to_states
+
+    def __iter__(self) -> Iterator[int]:
+        self.automata.build_index()
+        return iter(self.automata._rows)
+
+    def __len__(self) -> int:
+        self.automata.build_index()
+        return len(self.automata._rows)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class CompactAutomata(Automata):
+    r"""an :class:`Automata` keep the edges in flat integer arrays
+    instead of dict of dicts of sets.
+
+    every input symbol is given a integer id, an edge costs three
+    machine integers (`from`, `symbol id`, `to`). The edges are sorted
+    into a CSR (compressed sparse row) layout the first time
+    they are read, so :meth:`successors` is a binary search
+    by `(state, symbol)` rather than a scan of all the targets.
+
+    :param input_alphabet: a set of input symbols
+    :type input_alphabet: set,optional
+
+    :ivar self.transitions: a read only :class:`TransitionsView`
+        of the edges, assign a dict to it to replace all edges
+    :ivar self._symbols: the symbol of each symbol id
+    :vartype self._symbols: List[str]
+    :ivar self._symbol_ids: the symbol id of each symbol
+    :vartype self._symbol_ids: Dict[str,int]
+    :ivar self._class_ids: the symbol ids of the :class:`CharClass` symbols
+    :vartype self._class_ids: Dict[int,CharClass]
+    :ivar self._lows: the sorted code points where the set of classes
+        holding a character changes, None until :meth:`successors`
+    :ivar self._segments: the class ids holding the code points from
+        `_lows[i]` to `_lows[i+1] - 1`
+    :ivar self._sources: the begin state of each edge,
+        the edge arrays are `memoryview` of the file after :meth:`load`
+    :ivar self._labels: the symbol id of each edge
+    :ivar self._targets: the next state of each edge
+    :ivar self._rows: the sorted states which have edges leaving them
+    :ivar self._offsets: the edges of `_rows[i]` are
+        `_offsets[i]` to `_offsets[i+1]`
+    """
+    typecode = 'i'
+
+    def __init__(self, input_alphabet: set = None):
+        self._symbols = []
+        self._symbol_ids = dict()
+        self._class_ids = dict()
+        self._lows = None
+        self._segments = None
+        self._clear_edges()
+        super().__init__(input_alphabet)
+
+    def _clear_edges(self) -> None:
+        """remove all the edges"""
+        self._sources = array(self.typecode)
+        self._labels = array(self.typecode)
+        self._targets = array(self.typecode)
+        self._rows = None
+        self._offsets = None
+
+    @property
+    def transitions(self) -> TransitionsView:
+        return TransitionsView(self)
+
+    @transitions.setter
+    def transitions(self, translations: Dict[int, Dict[int, set]]) -> None:
+        self._clear_edges()
+        self.closures = None
+        self.add_transition_from_dict(translations)
+
+    def symbol_id(self, symbol: str) -> int:
+        """get the id of the input symbol, allocate one if it is new
+
+        :param symbol: the input symbol
+        :type symbol: str
+        :return: the symbol id
+        :rtype: int
+        """
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self._symbols)
+            if isinstance(symbol, CharClass):
+                self._class_ids[len(self._symbols)] = symbol
+                self._lows = None
+            self._symbols.append(symbol)
+        return self._symbol_ids[symbol]
+
+    def add_transition(self, from_state: int, to_state: int, input_symbols: set):
+        """add the transition to the edge arrays
+
+        :param from_state: the begin state
+        :type from_state: int
+        :param to_state: the next state
+        :type to_state: int
+        :param input_symbols: the transfer symbols to the next states
+        :type input_symbols: set
+        """
+        self.states.add(from_state)
+        self.states.add(to_state)
+        if not isinstance(self._sources, array):
+            # the views of a loaded file are read only
+            self._sources = array(self.typecode, self._sources)
+            self._labels = array(self.typecode, self._labels)
+            self._targets = array(self.typecode, self._targets)
+        for symbol in input_symbols:
+            self._sources.append(from_state)
+            self._labels.append(self.symbol_id(symbol))
+            self._targets.append(to_state)
+        self._rows = None
+        self.closures = None
+
+    def build_index(self) -> None:
+        """sort the edges by `(from, symbol id, to)`,
+        drop the repeated edges and build the row offsets,
+        do nothing if the index is up to date.
+
+        the edges are put in the order of `from` by a counting sort
+        into an array of edge numbers, then the few edges of each row
+        are sorted, so no tuple is made for all the edges at once
+        """
+        if self._rows is not None:
+            return
+        sources, labels, targets = self._sources, self._labels, self._targets
+        low = min(sources, default=0)
+        # begins[k] is the first edge of the state `low + k`
+        begins = array(self.typecode, [0]) * \
+            (max(sources, default=low) - low + 2)
+        for from_state in sources:
+            begins[from_state - low + 1] += 1
+        for k in range(1, len(begins)):
+            begins[k] += begins[k - 1]
+        order = array(self.typecode, [0]) * len(sources)
+        ends = array(self.typecode, begins)
+        for i, from_state in enumerate(sources):
+            order[ends[from_state - low]] = i
+            ends[from_state - low] += 1
+        del ends
+
+        self._clear_edges()
+        rows = array(self.typecode)
+        offsets = array(self.typecode)
+        for k in range(len(begins) - 1):
+            if begins[k] == begins[k + 1]:
+                continue
+            rows.append(low + k)
+            offsets.append(len(self._sources))
+            for label, to_state in sorted(set(
+                    (labels[i], targets[i])
+                    for i in order[begins[k]:begins[k + 1]])):
+                self._sources.append(low + k)
+                self._labels.append(label)
+                self._targets.append(to_state)
+        offsets.append(len(self._sources))
+        self._rows = rows
+        self._offsets = offsets
+
+    def row_of(self, state: int) -> int:
+        """get the row of `state` in the CSR index
+
+        :param state: the state
+        :type state: int
+        :return: the row number, -1 if no edge leaves `state`
+        :rtype: int
+        """
+        row = bisect_left(self._rows, state)
+        if row < len(self._rows) and self._rows[row] == state:
+            return row
+        return -1
+
+    def successors(self, state: int, symbol: str) -> List[int]:
+        """the states reached from `state` by one edge labelled `symbol`,
+        or labelled a :class:`CharClass` holding `symbol`
+
+        :param state: the begin state
+        :type state: int
+        :param symbol: input symbol
+        :type symbol: str
+        :return: the target states
+        :rtype: List[int]
+        """
+        labels = list(self.class_labels(symbol))
+        if symbol in self._symbol_ids:
+            labels.append(self._symbol_ids[symbol])
+        if not labels:
+            return []
+        self.build_index()
+        row = self.row_of(state)
+        if row < 0:
+            return []
+        begin, end = self._offsets[row], self._offsets[row+1]
+        targets = []
+        for label in labels:
+            lo = bisect_left(self._labels, label, begin, end)
+            hi = bisect_right(self._labels, label, lo, end)
+            targets.extend(self._targets[lo:hi])
+        return targets
+
+    def class_labels(self, symbol: str) -> List[int]:
+        """the ids of the :class:`CharClass` symbols holding `symbol`,
+        by a binary search in the table of the intervals of the classes,
+        as :meth:`regex_parser.compiled.CompiledDFA.column` does
+
+        :param symbol: input symbol
+        :type symbol: str
+        :return: the symbol ids
+        :rtype: List[int]
+        """
+        if not self._class_ids or len(symbol) != 1:
+            return []
+        if self._lows is None:
+            self._index_classes()
+        i = bisect_right(self._lows, ord(symbol)) - 1
+        return self._segments[i] if i >= 0 else []
+
+    def _index_classes(self) -> None:
+        """cut the code points at the ends of the intervals of the
+        classes, each piece is held by the same classes"""
+        bounds = set()
+        for cls in self._class_ids.values():
+            for low, high in cls.intervals:
+                bounds.update((low, high + 1))
+        self._lows = sorted(bounds)
+        self._segments = [[] for _ in self._lows]
+        for label, cls in self._class_ids.items():
+            for low, high in cls.intervals:
+                for i in range(bisect_left(self._lows, low),
+                               bisect_left(self._lows, high + 1)):
+                    self._segments[i].append(label)
+
+    def rename(self, offset: int) -> None:
+        """change the state name to prevent the conflict
+
+        :param offset: offset the number
+        :type offset: int
+        """
+        self.states = set(i+offset for i in self.states)
+        self.start_state += offset
+        self.final_states = set(i+offset for i in self.final_states)
+        self.closures = None
+        self._sources = array(self.typecode, (i+offset for i in self._sources))
+        self._targets = array(self.typecode, (i+offset for i in self._targets))
+        if self._rows is not None:
+            self._rows = array(self.typecode, (i+offset for i in self._rows))
+
+    @classmethod
+    def from_automata(cls, automata: Automata) -> CompactAutomata:
+        """copy an automata into the compact layout
+
+        :param automata: the source automata
+        :type automata: Automata
+        :return: the compact copy
+        :rtype: CompactAutomata
+        """
+        compact = cls(set(automata.input_alphabet))
+        compact.states = set(automata.states)
+        compact.start_state = automata.start_state
+        compact.final_states = set(automata.final_states)
+        compact.add_transition_from_dict(automata.transitions)
+        compact.build_index()
+        return compact
@@ -0,0 +1,305 @@
+"""
+filename src/compiled.py
+
+dense transition table of a DFA for matching
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+from typing import *
+from regex_parser import serial
+from regex_parser.charclass import CharClass, symbol_key
+
+
+class CompiledDFA:
+    r"""a DFA packed into a flat table for matching.
+
+    the states are numbered `0..n-1` (the start state is `0`),
+    every input symbol gets a column, the next state of `s` on the
+    symbol of column `c` is `table[s * width + c]`, `-1` if there is
+    no edge. The accepting states are kept in a bitmap.
+
+    .. code-block:: python
+
+        compiled = DFA(nfa).compile()
+        compiled.fullmatch('abb')
+
+    :param dfa: the DFA to compile
+    :type dfa: regex_parser.dfa.DFA
+
+    :ivar self.symbols: the symbol of each column,
+        the symbols should not overlap
+    :vartype self.symbols: List[str]
+    :ivar self.classes: the column of each symbol, the characters
+        met in a :class:`CharClass` column are added when they are met,
+        `-1` for no column
+    :vartype self.classes: Dict[str,int]
+    :ivar self.ranges: the sorted intervals of code points
+        `(low, high, column)` of the :class:`CharClass` columns
+    :vartype self.ranges: List[Tuple[int,int,int]]
+    :ivar self.width: the number of columns
+    :ivar self.state_ids: the DFA state of each row
+    :vartype self.state_ids: List[int]
+    :ivar self.table: the transition table,
+        a `memoryview` of the file after :meth:`load`
+    :vartype self.table: array
+    :ivar self.accepting: the bitmap of the accepting states
+    :vartype self.accepting: bytearray
+    :ivar self.prefilter: the positions to try in :meth:`search`,
+        set by :func:`regex_parser.compile`, None to try all
+    :vartype self.prefilter: regex_parser.prefilter.Prefilter
+    """
+    start = 0
+    prefilter = None
+
+    def __init__(self, dfa):
+        self.state_ids = [dfa.start_state] + \
+            sorted(dfa.states - set([dfa.start_state]))
+        rows = {state: i for i, state in enumerate(self.state_ids)}
+        delta = dfa.delta()
+
+        symbols = set()
+        for edges in delta.values():
+            symbols.update(edges)
+        self.symbols = sorted(symbols, key=symbol_key)
+        self.width = len(self.symbols)
+        self._index_symbols()
+
+        self.table = array('i', [-1]) * (len(self.state_ids) * self.width)
+        self.accepting = bytearray((len(self.state_ids) + 7) // 8)
+        for state, row in rows.items():
+            for symbol, target in delta[state].items():
+                self.table[row * self.width + self.classes[symbol]] = \
+                    rows[target]
+            if state in dfa.final_states:
+                self.accepting[row >> 3] |= 1 << (row & 7)
+
+    def _index_symbols(self) -> None:
+        """build `self.classes` and `self.ranges` from `self.symbols`"""
+        self.classes = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.ranges = sorted(
+            (low, high, i) for i, symbol in enumerate(self.symbols)
+            if isinstance(symbol, CharClass) for low, high in symbol.intervals)
+        self._lows = [low for low, _, _ in self.ranges]
+
+    def __getstate__(self) -> dict:
+        """copy the views of a loaded file, so it can be pickled"""
+        state = self.__dict__.copy()
+        if isinstance(self.table, memoryview):
+            state['state_ids'] = list(self.state_ids)
+            state['table'] = array('i', self.table)
+            state['accepting'] = bytearray(self.accepting)
+        return state
+
+    def dump(self, path) -> None:
+        """save the compiled DFA in the binary format of
+        :mod:`regex_parser.serial`
+
+        :param path: the path of the file
+        """
+        serial.dump_compiled(self, path)
+
+    @classmethod
+    def load(cls, path, use_mmap: bool = True) -> CompiledDFA:
+        """load a compiled DFA saved by :meth:`dump`.
+        the file is mapped into the memory, the table and the bitmap
+        are views of it, so it is not read or copied before it is used
+
+        :param path: the path of the file
+        :param use_mmap: map the file instead of reading it
+        :type use_mmap: bool,optional
+        :raises ValueError: the file is not a compiled DFA of this version
+        :return: the compiled DFA
+        :rtype: CompiledDFA
+        """
+        return serial.load_compiled(cls, path, use_mmap)
+
+    def __len__(self) -> int:
+        """the number of states"""
+        return len(self.state_ids)
+
+    def is_accepting(self, state: int) -> bool:
+        """check the bitmap
+
+        :param state: the row of the state
+        :type state: int
+        :return: whether the state is accepting
+        :rtype: bool
+        """
+        return bool(self.accepting[state >> 3] >> (state & 7) & 1)
+
+    def column(self, symbol: str) -> int:
+        """the column of the symbol
+
+        :param symbol: the input symbol
+        :type symbol: str
+        :return: the column, -1 if no edge is labelled by the symbol
+        :rtype: int
+        """
+        column = self.classes.get(symbol)
+        if column is not None:
+            return column
+        column = -1
+        if self.ranges and isinstance(symbol, str) and len(symbol) == 1:
+            code = ord(symbol)
+            i = bisect_right(self._lows, code) - 1
+            if i >= 0 and code <= self.ranges[i][1]:
+                column = self.ranges[i][2]
+            self.classes[symbol] = column
+        return column
+
+    def step(self, state: int, symbol: str) -> int:
+        """the next state
+
+        :param state: the row of the current state
+        :type state: int
+        :param symbol: the input symbol
+        :type symbol: str
+        :return: the row of the next state, -1 if there is no edge
+        :rtype: int
+        """
+        column = self.column(symbol)
+        if column < 0:
+            return -1
+        return self.table[state * self.width + column]
+
+    def fullmatch(self, text: str) -> bool:
+        """check whether the whole `text` is accepted
+
+        :param text: the input string
+        :type text: str
+        :return: whether the DFA accept the string
+        :rtype: bool
+        """
+        table, classes, width = self.table, self.classes, self.width
+        state = self.start
+        for char in text:
+            column = classes.get(char)
+            if column is None:
+                column = self.column(char)
+            if column < 0:
+                return False
+            state = table[state * width + column]
+            if state < 0:
+                return False
+        return self.is_accepting(state)
+
+    def match(self, text: str, begin: int = 0) -> Optional[int]:
+        """find the longest accepted substring beginning at `begin`
+
+        :param text: the input string
+        :type text: str
+        :param begin: the begin position
+        :type begin: int
+        :return: the end of the longest match, None if there is no match
+        :rtype: Optional[int]
+        """
+        table, classes, width = self.table, self.classes, self.width
+        accepting = self.accepting
+        state = self.start
+        end = begin if self.is_accepting(state) else None
+        for i in range(begin, len(text)):
+            column = classes.get(text[i])
+            if column is None:
+                column = self.column(text[i])
+            if column < 0:
+                break
+            state = table[state * width + column]
+            if state < 0:
+                break
+            if accepting[state >> 3] >> (state & 7) & 1:
+                end = i + 1
+        return end
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """find the leftmost longest accepted substring by one scan,
+        see :meth:`_search`, only the candidates of `self.prefilter`
+        begin a match if it is set
+
+        :param text: the input string
+        :type text: str
+        :return: the span `(begin, end)` of the match,
+            None if there is no match
+        :rtype: Optional[Tuple[int, int]]
+        """
+        if self.is_accepting(self.start):
+            return (0, self.match(text))
+        classes = self.classes
+
+        def column(i: int) -> int:
+            column = classes.get(text[i])
+            return self.column(text[i]) if column is None else column
+
+        begins = None if self.prefilter is None \
+            else self.prefilter.candidates(text)
+        return self._search(len(text), column, begins)
+
+    def _search(self, size: int, column: Callable[[int], int],
+                begins: Optional[Iterable[int]]) -> Optional[Tuple[int, int]]:
+        """the leftmost longest match of a DFA whose start state is not
+        accepting, the input is read once.
+
+        a thread `(begin, state)` begins at each position until a match
+        is found, the threads are kept in the order of their begin,
+        a state already held by an earlier thread is dropped from the
+        later ones, since the earlier begin wins. so at most `len(self)`
+        threads are alive, :math:`O(n \\times states)` in the worst
+        case instead of :math:`O(n^2)` for a :meth:`match` at each
+        position. when no thread is alive the input is skipped
+        to the next begin, or to the next symbol leaving the start state.
+
+        :param size: the length of the input
+        :type size: int
+        :param column: the column of the symbol at a position, -1 for none
+        :type column: Callable[[int], int]
+        :param begins: the positions where a match may begin, in order,
+            None for all
+        :type begins: Optional[Iterable[int]]
+        :return: the span `(begin, end)` of the match,
+            None if there is no match
+        :rtype: Optional[Tuple[int, int]]
+        """
+        table, width, accepting = self.table, self.width, self.accepting
+        begins = iter(begins) if begins is not None else None
+        next_begin = next(begins, size) if begins is not None else 0
+        first = self.start * width
+        threads = []
+        best = None
+        i = 0
+        while i < size:
+            if not threads:
+                if best is not None or next_begin >= size:
+                    break
+                i = next_begin
+                if begins is None:
+                    # skip the symbols without an edge from the start state
+                    while i < size:
+                        symbol = column(i)
+                        if symbol >= 0 and table[first + symbol] >= 0:
+                            break
+                        i += 1
+                    if i >= size:
+                        break
+                    next_begin = i
+            if best is None and i == next_begin:
+                threads.append((i, self.start))
+                next_begin = next(begins, size) if begins is not None \
+                    else i + 1
+            symbol = column(i)
+            moved = []
+            if symbol >= 0:
+                claimed = set()
+                for begin, state in threads:
+                    target = table[state * width + symbol]
+                    if target < 0 or target in claimed:
+                        continue
+                    claimed.add(target)
+                    moved.append((begin, target))
+                    if accepting[target >> 3] >> (target & 7) & 1 and \
+                            (best is None or begin <= best[0]):
+                        best = (begin, i + 1)
+            if best is not None:
+                moved = [thread for thread in moved if thread[0] <= best[0]]
+            threads = moved
+            i += 1
+        return best
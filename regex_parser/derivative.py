@@ -0,0 +1,391 @@
+"""
+filename src/derivative.py
+
+match by the Brzozowski derivatives of a pattern
+"""
+from __future__ import annotations
+from typing import *
+from regex_parser.charclass import CharClass
+from regex_parser.RegexParser import RegexParser
+from regex_parser.syntax import fold
+
+EMPTY_SET = 'empty set'
+EPSILON = 'epsilon'
+SYMBOL = 'symbol'
+CONCAT = 'concat'
+STAR = 'star'
+OR = 'or'
+AND = 'and'
+NOT = 'not'
+
+
+class Term:
+    r"""a normalized regular expression, made by a :class:`TermTable`.
+
+    the terms are hash-consed, two equal terms are the same object,
+    so they are compared and hashed by identity. The derivative
+    :math:`\partial_c r` on each character is computed once and kept
+    in the term, the terms met while matching are the states of a DFA
+    built only along the input.
+
+    `r | s`, `r & s` and `~r` are the union, the intersection
+    and the complement, `r + s` is the concatenation.
+
+    :ivar self.kind: the operator
+    :ivar self.args: the operands, the symbols of :data:`SYMBOL`,
+        a frozenset of terms for :data:`OR` and :data:`AND`
+    :ivar self.nullable: whether the term matches the empty string
+    :ivar self.table: the table which made the term
+    """
+    __slots__ = ('kind', 'args', 'nullable', 'table', '_next')
+
+    def __init__(self, table: TermTable, kind: str, args: tuple,
+                 nullable: bool):
+        self.table = table
+        self.kind = kind
+        self.args = args
+        self.nullable = nullable
+        self._next = dict()  # char -> derivative
+
+    def __or__(self, other: Term) -> Term:
+        return self.table.union(self, other)
+
+    def __and__(self, other: Term) -> Term:
+        return self.table.intersection(self, other)
+
+    def __invert__(self) -> Term:
+        return self.table.complement(self)
+
+    def __add__(self, other: Term) -> Term:
+        return self.table.concatenation(self, other)
+
+    def __repr__(self) -> str:
+        if self.kind == EMPTY_SET:
+            return '[]'
+        if self.kind == EPSILON:
+            return '()'
+        if self.kind == SYMBOL:
+            labels = sorted(map(str, self.args))
+            return labels[0] if len(labels) == 1 else '|'.join(labels)
+        if self.kind == CONCAT:
+            return ''.join(map(repr, self.args))
+        if self.kind == STAR:
+            return f"({self.args[0]!r})*"
+        if self.kind == NOT:
+            return f"~({self.args[0]!r})"
+        operator = '|' if self.kind == OR else '&'
+        return '(' + operator.join(sorted(map(repr, self.args[0]))) + ')'
+
+    def derivative(self, char: str) -> Term:
+        r"""the derivative :math:`\partial_c r`, the term matching
+        the strings `w` such that `char + w` is matched by this term
+
+        :param char: the character
+        :type char: str
+        :return: the derivative
+        :rtype: Term
+        """
+        result = self._next.get(char)
+        if result is None:
+            result = self.table._derivative(self, char)
+            self._next[char] = result
+        return result
+
+    def fullmatch(self, text: str) -> bool:
+        """check whether the whole `text` is matched
+
+        :param text: the input string
+        :type text: str
+        :return: whether the term matches the string
+        :rtype: bool
+        """
+        term = self
+        empty_set = self.table.empty_set
+        for char in text:
+            term = term.derivative(char)
+            if term is empty_set:
+                return False
+        return term.nullable
+
+    def match(self, text: str, begin: int = 0) -> Optional[int]:
+        """find the longest matched substring beginning at `begin`
+
+        :param text: the input string
+        :type text: str
+        :param begin: the begin position
+        :type begin: int
+        :return: the end of the longest match, None if there is no match
+        :rtype: Optional[int]
+        """
+        term = self
+        empty_set = self.table.empty_set
+        end = begin if term.nullable else None
+        for i in range(begin, len(text)):
+            term = term.derivative(text[i])
+            if term is empty_set:
+                break
+            if term.nullable:
+                end = i + 1
+        return end
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """find the leftmost longest matched substring, the input is
+        read once.
+
+        a thread `(begin, term)` begins at each position until a match
+        is found, as in :meth:`regex_parser.compiled.CompiledDFA.search`
+        with the derivatives as the states. a term already held by an
+        earlier thread is dropped from the later ones, since the earlier
+        begin wins
+
+        :param text: the input string
+        :type text: str
+        :return: the span `(begin, end)` of the match,
+            None if there is no match
+        :rtype: Optional[Tuple[int, int]]
+        """
+        if self.nullable:
+            return (0, self.match(text))
+        empty_set = self.table.empty_set
+        threads = []  # (begin, term), in the order of begin
+        best = None
+        for i, char in enumerate(text):
+            if best is None:
+                threads.append((i, self))
+            moved = []
+            claimed = set()
+            for begin, term in threads:
+                term = term.derivative(char)
+                if term is empty_set or term in claimed:
+                    continue
+                claimed.add(term)
+                moved.append((begin, term))
+                if term.nullable and (best is None or begin <= best[0]):
+                    best = (begin, i + 1)
+            if best is not None:
+                moved = [thread for thread in moved if thread[0] <= best[0]]
+                if not moved:
+                    break
+            threads = moved
+        return best
+
+
+class TermTable:
+    r"""make the hash-consed :class:`Term`.
+
+    the terms are normalized when they are made:
+
+    * `|` and `&` are associative, commutative and idempotent,
+      their operands are kept as a flat frozenset
+    * :math:`\emptyset` is dropped from `|` and absorbs `&` and
+      concatenation, :math:`\epsilon` is dropped from concatenation,
+      `~`:math:`\emptyset` is dropped from `&` and absorbs `|`
+    * the concatenation is nested to the right, `(r*)*` is `r*`,
+      `~~r` is `r`
+
+    so the derivatives of a term are finitely many.
+    The methods of the builder are given, so the table can be given to
+    :class:`regex_parser.RegexParser.RegexParser` as the `builder`.
+
+    .. code-block:: python
+
+        table = TermTable()
+        r = table.parse('(a|b)*abb') & ~table.parse('b(a|b)*')
+        r.fullmatch('aabb')  # True
+        r.fullmatch('babb')  # False
+        len(table)  # the terms made
+
+    :ivar self.empty_set: the term :math:`\emptyset`, matching nothing
+    :ivar self.epsilon: the term :math:`\epsilon`
+    :ivar self.everything: the term `~`:math:`\emptyset`, matching everything
+    """
+
+    def __init__(self):
+        self._terms = dict()  # (kind, args) -> term
+        self.empty_set = self._make(EMPTY_SET, (), False)
+        self.epsilon = self._make(EPSILON, (), True)
+        self.everything = self._make(NOT, (self.empty_set,), True)
+
+    def __len__(self) -> int:
+        """the number of terms"""
+        return len(self._terms)
+
+    def _make(self, kind: str, args: tuple, nullable: bool) -> Term:
+        """the unique term of `kind` and `args`"""
+        key = (kind, args)
+        term = self._terms.get(key)
+        if term is None:
+            term = Term(self, kind, args, nullable)
+            self._terms[key] = term
+        return term
+
+    def parse(self, pattern: str) -> Term:
+        """the term of a pattern
+
+        :param pattern: the pattern
+        :type pattern: str
+        :raises RuntimeError: the pattern is wrong
+        :return: the term
+        :rtype: Term
+        """
+        return RegexParser(pattern, builder=self).parse()
+
+    def from_syntax(self, tree) -> Term:
+        """the term of a syntax tree
+
+        :param tree: the syntax tree, see :mod:`regex_parser.syntax`
+        :return: the term
+        :rtype: Term
+        """
+        return fold(tree, self)
+
+    def empty_construct(self) -> Term:
+        r"""the term :math:`\epsilon`"""
+        return self.epsilon
+
+    def basic_construct(self, symbol) -> Term:
+        """the term of a single symbol
+
+        :param symbol: the symbol
+        :type symbol: Set[str] or str or CharClass
+        :return: the term
+        :rtype: Term
+        """
+        if isinstance(symbol, (str, CharClass)):
+            symbol = set([symbol])
+        if not symbol:
+            return self.empty_set
+        return self._make(SYMBOL, frozenset(symbol), False)
+
+    def concatenation(self, base: Term, addition: Term) -> Term:
+        """the term of `st`"""
+        if base is self.empty_set or addition is self.empty_set:
+            return self.empty_set
+        if base is self.epsilon:
+            return addition
+        if addition is self.epsilon:
+            return base
+        # nest to the right, without recursion for long concatenations
+        spine = []
+        while base.kind == CONCAT:
+            first, base = base.args
+            spine.append(first)
+        spine.append(base)
+        for term in reversed(spine):
+            addition = self._make(CONCAT, (term, addition),
+                                  term.nullable and addition.nullable)
+        return addition
+
+    def star_operation(self, term: Term) -> Term:
+        """the term of `s*`"""
+        if term is self.empty_set or term is self.epsilon:
+            return self.epsilon
+        if term.kind == STAR:
+            return term
+        return self._make(STAR, (term,), True)
+
+    def plus_operation(self, term: Term) -> Term:
+        """the term of `s+`, that is `ss*`"""
+        return self.concatenation(term, self.star_operation(term))
+
+    def optional_operation(self, term: Term) -> Term:
+        """the term of `s?`, that is `s|()`"""
+        return self.union(term, self.epsilon)
+
+    def _operands(self, kind: str, terms: Iterable[Term]) -> Set[Term]:
+        """the operands of `|` or `&`, flattened"""
+        operands = set()
+        for term in terms:
+            if term.kind == kind:
+                operands |= term.args[0]
+            else:
+                operands.add(term)
+        return operands
+
+    def union(self, *terms: Term) -> Term:
+        """the term of `s|t|...`"""
+        operands = self._operands(OR, terms)
+        operands.discard(self.empty_set)
+        if self.everything in operands:
+            return self.everything
+        if not operands:
+            return self.empty_set
+        if len(operands) == 1:
+            return operands.pop()
+        return self._make(OR, (frozenset(operands),),
+                          any(term.nullable for term in operands))
+
+    def intersection(self, *terms: Term) -> Term:
+        """the term of `s&t&...`, matching the strings matched by all"""
+        operands = self._operands(AND, terms)
+        operands.discard(self.everything)
+        if self.empty_set in operands:
+            return self.empty_set
+        if not operands:
+            return self.everything
+        if len(operands) == 1:
+            return operands.pop()
+        return self._make(AND, (frozenset(operands),),
+                          all(term.nullable for term in operands))
+
+    def complement(self, term: Term) -> Term:
+        """the term of `~s`, matching the strings not matched by `s`"""
+        if term.kind == NOT:
+            return term.args[0]
+        return self._make(NOT, (term,), not term.nullable)
+
+    def _derivative(self, term: Term, char: str) -> Term:
+        """compute the derivative, see :meth:`Term.derivative`.
+        the derivatives of the operands are computed first on an
+        explicit stack, so deep terms like `a?a?...a?b` are fine"""
+        stack = [term]
+        while stack:
+            node = stack[-1]
+            if char in node._next:
+                stack.pop()
+                continue
+            missing = [operand for operand in self._derived_operands(node)
+                       if char not in operand._next]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            node._next[char] = self._combine(node, char)
+        return term._next[char]
+
+    @staticmethod
+    def _derived_operands(term: Term) -> Iterable[Term]:
+        """the operands whose derivatives make the derivative of `term`"""
+        kind = term.kind
+        if kind == CONCAT:
+            first, rest = term.args
+            return (first, rest) if first.nullable else (first,)
+        if kind in (STAR, NOT):
+            return term.args[:1]
+        if kind in (OR, AND):
+            return term.args[0]
+        return ()
+
+    def _combine(self, term: Term, char: str) -> Term:
+        """the derivative of `term`, from the derivatives of its operands"""
+        kind = term.kind
+        if kind == SYMBOL:
+            matched = char in term.args or any(
+                char in label for label in term.args
+                if isinstance(label, CharClass))
+            return self.epsilon if matched else self.empty_set
+        if kind == CONCAT:
+            first, rest = term.args
+            result = self.concatenation(first._next[char], rest)
+            if first.nullable:
+                result = self.union(result, rest._next[char])
+            return result
+        if kind == STAR:
+            return self.concatenation(term.args[0]._next[char], term)
+        if kind == OR:
+            return self.union(*(t._next[char] for t in term.args[0]))
+        if kind == AND:
+            return self.intersection(*(t._next[char] for t in term.args[0]))
+        if kind == NOT:
+            return self.complement(term.args[0]._next[char])
+        return self.empty_set  # the empty set and epsilon
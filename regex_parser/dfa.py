@@ -1,4 +1,14 @@
+from __future__ import annotations
 from regex_parser.Automata import Automata
+from regex_parser.charclass import CharClass, equivalence_classes, \
+    representative, symbol_key
+from regex_parser import serial
+from regex_parser.compact import CompactAutomata
+from regex_parser.compiled import CompiledDFA
+from regex_parser.glushkov import GlushkovBuilder
+from regex_parser import equivalence, product
+from regex_parser.syntax import fold
+from collections import deque
 from typing import *
 
 class DFA(Automata):
@@ -8,20 +18,382 @@ class DFA(Automata):
     one edge with that symbol leaving that state
 
     """
-    def __init__(self,nfa:Automata):
+    def __init__(self,nfa:Automata=None,method:str='worklist'):
         """generate from Automata
 
-        :param nfa: a NFA
-        :type nfa: Automata
+        :param nfa: a NFA, give None to get an empty DFA
+        :type nfa: Automata,optional
+        :param method: ``'worklist'`` for the iterative subset construction
+        :type method: str
+        :raises ValueError: unknown method
 
         :ivar self.NFA_map: the map from NFA to DFA
         :type self.NFA_map: Dict[Frozenset[int],int]
         """
-        super().__init__(nfa.input_alphabet)
+        super().__init__(nfa.input_alphabet if nfa else set())
         self.NFA_map = {}
-        initial = nfa.e_closure(nfa.start_state)
-        self.set_start_state(1)
-        self._get_new_state(nfa=nfa,cur=initial)
+        if nfa is None:
+            return
+        if method != 'worklist':
+            raise ValueError(f"unknown method: {method}")
+        self._subset_construction(nfa)
+
+    def _subset_construction(self, nfa: Automata) -> None:
+        r"""the subset construction driven by a worklist,
+        every DFA state is expanded exactly once and
+        every edge is computed once,
+        the NFA states sets are the bit masks of
+        :meth:`Automata.precompute_closures`,
+        the input symbols are the classes of
+        :func:`regex_parser.charclass.equivalence_classes`
+
+        .. code-block:: text
+
+            Dstates = { e_closure(s0) }, unmarked
+            while there is an unmarked state T in Dstates:
+                mark T
+                for each input symbol a:
+                    U = e_closure(move(T, a))
+                    if U not in Dstates: add U as unmarked
+                    Dtran[T, a] = U
+
+        :param nfa: the nfa automata
+        :type nfa: Automata
+        """
+        if nfa.closures is None:
+            nfa.precompute_closures()
+        # the edges on all the characters of a class are the same,
+        # so the classes are the columns instead of the symbols
+        alphabet = equivalence_classes(
+            nfa.input_alphabet - Automata.empty_string)
+        final_mask = 0
+        for state in nfa.final_states:
+            final_mask |= 1 << nfa.state_bits[state]
+
+        mask_ids = {}
+        unmarked = deque()
+
+        def get_id(mask: int) -> int:
+            if mask not in mask_ids:
+                state_id = self._get_states_id(nfa.mask_to_states(mask))
+                mask_ids[mask] = state_id
+                unmarked.append(mask)
+                if mask & final_mask:
+                    self.add_final_states(state_id)
+            return mask_ids[mask]
+
+        self.set_start_state(get_id(nfa.closure_mask([nfa.start_state])))
+        while unmarked:
+            mask = unmarked.popleft()
+            cur_id = mask_ids[mask]
+            for symbol in alphabet:
+                to_id = get_id(nfa.move_mask(mask, representative(symbol)))
+                self.add_transition(cur_id, to_id, set([symbol]))
+
+    @classmethod
+    def from_syntax(cls, tree) -> DFA:
+        r"""build the DFA from the syntax tree directly, without the NFA,
+        by the followpos of the Dragon book (algorithm 3.36).
+
+        the tree is augmented to `(s)#`, :math:`nullable`, :math:`firstpos`,
+        :math:`lastpos` and :math:`followpos` are computed by
+        :class:`regex_parser.glushkov.GlushkovBuilder`.
+        A DFA state is a set of positions, a state holding
+        the position of `#` is accepting, no :math:`\epsilon`-closure
+        is needed. `self.NFA_map` maps the sets of positions to the states.
+
+        .. code-block:: text
+
+            Dstates = { firstpos(root) }, unmarked
+            while there is an unmarked state S in Dstates:
+                mark S
+                for each input symbol a:
+                    U = union of followpos(p) for p in S matching a
+                    if U not in Dstates: add U as unmarked
+                    Dtran[S, a] = U
+
+        .. code-block:: python
+
+            dfa = DFA.from_syntax(syntax.parse('(a|b)*abb'))
+
+        :param tree: the syntax tree, see :mod:`regex_parser.syntax`
+        :return: the DFA
+        :rtype: DFA
+        """
+        builder = GlushkovBuilder()
+        root = fold(tree, builder, finish=False)
+        end = builder.basic_construct(set())  # `#` matches no symbol
+        root = builder.concatenation(root, end)
+        end, = end.first
+        follow = builder.follow
+
+        dfa = cls()
+        for symbols in builder.symbols.values():
+            dfa.input_alphabet |= symbols
+        # the positions matching each class of the alphabet
+        matching = []
+        for symbol in equivalence_classes(dfa.input_alphabet):
+            char = representative(symbol)
+            matching.append((symbol, frozenset(
+                position for position, symbols in builder.symbols.items()
+                if char in symbols or any(
+                    char in label for label in symbols
+                    if isinstance(label, CharClass)))))
+
+        unmarked = deque()
+
+        def get_id(positions: FrozenSet[int]) -> int:
+            if positions not in dfa.NFA_map:
+                unmarked.append(positions)
+                if end in positions:
+                    dfa.add_final_states(dfa._get_states_id(positions))
+            return dfa._get_states_id(positions)
+
+        dfa.set_start_state(get_id(root.first))
+        while unmarked:
+            positions = unmarked.popleft()
+            cur_id = dfa.NFA_map[positions]
+            for symbol, matched in matching:
+                reached = set()
+                for position in positions & matched:
+                    reached |= follow[position]
+                to_id = get_id(frozenset(reached))
+                dfa.add_transition(cur_id, to_id, set([symbol]))
+        return dfa
+
+    def delta(self) -> Dict[int, Dict[str, int]]:
+        """the transition function,
+        `delta[s][a]` is the next state of `s` on the symbol `a`
+
+        :return: the transition function
+        :rtype: Dict[int, Dict[str, int]]
+        """
+        delta = {state: {} for state in self.states}
+        for from_state, to_states in self.transitions.items():
+            for to_state, symbols in to_states.items():
+                for symbol in symbols:
+                    delta[from_state][symbol] = to_state
+        return delta
+
+    def minimize(self, tags: Dict[int, Any] = None) \
+            -> Tuple[DFA, Dict[int, int]]:
+        r"""merge the equivalent states by Hopcroft's
+        partition refinement, :math:`O(n k \log n)`.
+
+        begin with the partition {final states, other states},
+        the final states are split by their tags if `tags` is given,
+        a block `A` in the worklist splits every block `Y` into
+        the states which go into `A` on a symbol and the others,
+        only the smaller half of a split is put in the worklist.
+
+        the states which are unreachable or reach no final state are
+        trimmed first (see :meth:`Automata.useful_states`), their edges
+        and the missing edges go to an implicit dead state,
+        which is not kept in the result
+
+        :param tags: the tag of the final states, the final states
+            with different tags are never merged
+        :type tags: Dict[int, Any],optional
+        :return: the minimal DFA and the map from
+            the old states to the new states, the trimmed states
+            are not in the map
+        :rtype: Tuple[DFA, Dict[int, int]]
+        """
+        useful = self.useful_states()
+        delta = {state: {symbol: target for symbol, target in edges.items()
+                         if target in useful}
+                 for state, edges in self.delta().items() if state in useful}
+        alphabet = set()
+        for edges in delta.values():
+            alphabet.update(edges)
+        alphabet = sorted(alphabet, key=symbol_key)
+        dead = None  # the implicit dead state
+        delta[dead] = {}
+        states = list(useful) + [dead]
+
+        # the sources of the edges into each state
+        inverse = {symbol: {state: [] for state in states}
+                   for symbol in alphabet}
+        for state in states:
+            for symbol in alphabet:
+                inverse[symbol][delta[state].get(symbol)].append(state)
+
+        finals = self.final_states & useful
+        groups = {}
+        for state in finals:
+            groups.setdefault(tags.get(state) if tags else None, set()).add(state)
+        blocks = [block for block in list(groups.values()) +
+                  [set(states) - finals] if block]
+        block_of = {}
+        for i, block in enumerate(blocks):
+            for state in block:
+                block_of[state] = i
+        # all the blocks but the largest one
+        largest = max(range(len(blocks)), key=lambda i: len(blocks[i]))
+        waiting = set(range(len(blocks))) - set([largest])
+
+        while waiting:
+            splitter = list(blocks[waiting.pop()])
+            for symbol in alphabet:
+                # group the sources of the splitter by their blocks
+                touched = {}
+                for target in splitter:
+                    for source in inverse[symbol][target]:
+                        touched.setdefault(block_of[source], set()).add(source)
+                for i, inside in touched.items():
+                    if len(inside) == len(blocks[i]):
+                        continue
+                    outside = blocks[i] - inside
+                    small, large = (inside, outside) \
+                        if len(inside) <= len(outside) else (outside, inside)
+                    # if `i` is waiting both halves are waiting now,
+                    # otherwise only the smaller half is needed
+                    blocks[i] = large
+                    blocks.append(small)
+                    waiting.add(len(blocks) - 1)
+                    for state in small:
+                        block_of[state] = len(blocks) - 1
+
+        # number the blocks from the start state, the dead block is dropped
+        dead_block = block_of[dead] if len(blocks[block_of[dead]]) == 1 else None
+        members = [[s for s in block if s is not None] for block in blocks]
+        block_ids = {block_of[self.start_state]: 1}
+        queue = deque(block_ids)
+        while queue:
+            block = queue.popleft()
+            for symbol in alphabet:
+                target = block_of[delta[members[block][0]].get(symbol)]
+                if target != dead_block and target not in block_ids:
+                    block_ids[target] = len(block_ids) + 1
+                    queue.append(target)
+        for block in range(len(blocks)):
+            if block != dead_block and block not in block_ids:
+                block_ids[block] = len(block_ids) + 1
+
+        minimal = DFA()
+        minimal.input_alphabet = set(self.input_alphabet)
+        mapping = {state: block_ids[block_of[state]] for state in useful}
+        minimal.set_start_state(mapping[self.start_state])
+        for block, block_id in block_ids.items():
+            minimal.states.add(block_id)
+            state = members[block][0]
+            if state in finals:
+                minimal.add_final_states(block_id)
+            for symbol, target in delta[state].items():
+                minimal.add_transition(block_id, mapping[target], set([symbol]))
+        for key, state in self.NFA_map.items():
+            if state in mapping:
+                minimal.NFA_map[key] = mapping[state]
+        return minimal, mapping
+
+    def trim(self, keep_sink: bool = False) -> Set[int]:
+        """remove the useless states, see :meth:`Automata.trim`,
+        and their entries of `self.NFA_map`
+
+        :param keep_sink: keep the dead sink
+        :type keep_sink: bool,optional
+        :return: the removed states
+        :rtype: Set[int]
+        """
+        removed = super().trim(keep_sink)
+        if removed:
+            self.NFA_map = {key: state for key, state in self.NFA_map.items()
+                            if state not in removed}
+        return removed
+
+    def dump(self, path, keep_sink: bool = True) -> None:
+        """save the DFA in the binary format of :mod:`regex_parser.serial`,
+        `self.NFA_map` is not saved, the unreachable states are not saved
+
+        :param path: the path of the file
+        :param keep_sink: save the dead sink, so a complete DFA stays complete
+        :type keep_sink: bool,optional
+        """
+        serial.dump_automata(self, path, serial.KIND_DFA, keep_sink)
+
+    @classmethod
+    def load(cls, path, use_mmap: bool = True) -> DFA:
+        """load a DFA saved by :meth:`dump`, the edges are copied from
+        the mapped file into the dicts, use :meth:`CompiledDFA.load`
+        to match without any copy
+
+        :param path: the path of the file
+        :param use_mmap: map the file instead of reading it
+        :type use_mmap: bool,optional
+        :raises ValueError: the file is not a DFA of this version
+        :return: the DFA
+        :rtype: DFA
+        """
+        compact = serial.load_automata(CompactAutomata, path,
+                                       serial.KIND_DFA, use_mmap)
+        dfa = cls()
+        dfa.input_alphabet = compact.input_alphabet
+        dfa.states = compact.states
+        dfa.start_state = compact.start_state
+        dfa.final_states = compact.final_states
+        dfa.add_transition_from_dict(compact.transitions)
+        return dfa
+
+    def intersection(self, other) -> product.Product:
+        """the strings accepted by both DFAs, built lazily,
+        see :class:`regex_parser.product.Product`
+
+        :param other: the other DFA, compile it once to use it in many
+            products
+        :type other: DFA or CompiledDFA or regex_parser.product.Product
+        :return: the lazy product
+        :rtype: regex_parser.product.Product
+        """
+        return product.intersection(self, other)
+
+    def difference(self, other) -> product.Product:
+        """the strings accepted by this DFA but not by `other`,
+        built lazily, see :class:`regex_parser.product.Product`
+
+        :param other: the other DFA
+        :type other: DFA or CompiledDFA or regex_parser.product.Product
+        :return: the lazy product
+        :rtype: regex_parser.product.Product
+        """
+        return product.difference(self, other)
+
+    def complement(self) -> product.Product:
+        """the strings not accepted by this DFA, over all the characters,
+        built lazily, see :class:`regex_parser.product.Product`
+
+        :return: the lazy product
+        :rtype: regex_parser.product.Product
+        """
+        return product.complement(self)
+
+    def equivalent(self, other) -> bool:
+        """check whether both DFAs accept the same strings,
+        see :func:`regex_parser.equivalence.equivalent`
+
+        :param other: the other DFA
+        :type other: DFA or CompiledDFA
+        :return: whether they are equivalent
+        :rtype: bool
+        """
+        return equivalence.equivalent(self, other)
+
+    def canonical_hash(self) -> str:
+        """a hash of the strings accepted by the DFA,
+        see :func:`regex_parser.equivalence.canonical_hash`
+
+        :return: the hex digest
+        :rtype: str
+        """
+        return equivalence.canonical_hash(self)
+
+    def compile(self) -> CompiledDFA:
+        """pack the DFA into a dense transition table for matching,
+        see :class:`regex_parser.compiled.CompiledDFA`
+
+        :return: the compiled DFA
+        :rtype: CompiledDFA
+        """
+        return CompiledDFA(self)
 
     def _get_states_id(self,states_set:Set[int]) -> int:
         """get the DFA state id of the NFA states set
@@ -40,39 +412,3 @@ class DFA(Automata):
             self.NFA_map[key] = state_id
             self.states.add(state_id)
         return self.NFA_map[key]
-
-    def _get_new_state(self,
-        nfa: Automata,
-        cur:Set[int],
-        input_:str='') -> None:
-        """a recursion method to get the new set from
-        state `cur` to new states with the input `input_`
-
-        :param nfa: the nfa automata
-        :type nfa: Automata
-        :param cur: the sets of current states
-        :type cur: Set[int]
-        :param input_: the input character default to ''
-        :type input_: str
-        """
-        # manage the initial state
-        if not input_:
-            for i in nfa.input_alphabet:
-                self._get_new_state(nfa=nfa,cur=cur,input_=i)
-
-        # get current state and next state id
-        cur_id = self._get_states_id(cur)
-        to_state = nfa.move(cur,input_)
-        to_id = self._get_states_id(to_state)
-
-        # stop if the states set exits
-        if cur_id in self.transitions and to_id in self.transitions[cur_id]:
-            return None
-        self.add_transition(cur_id,to_id,set([input_]))
-
-        # recursion call to find next's next
-        for i in self.input_alphabet:
-            self._get_new_state(
-                nfa=nfa,
-                cur=to_state,
-                input_=i)
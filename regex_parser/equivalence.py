@@ -0,0 +1,139 @@
+"""
+filename src/equivalence.py
+
+check whether two DFAs accept the same strings, and hash a DFA by its language
+"""
+import hashlib
+from collections import deque
+from typing import *
+from regex_parser.charclass import CharClass, equivalence_classes, \
+    representative
+from regex_parser.compiled import CompiledDFA
+
+_DEAD = None  # the dead state, shared by both DFAs
+
+
+def _compiled(dfa) -> CompiledDFA:
+    """compile a DFA for its :meth:`CompiledDFA.step`"""
+    return dfa if isinstance(dfa, CompiledDFA) else dfa.compile()
+
+
+def equivalent(left, right) -> bool:
+    r"""check whether two DFAs accept the same strings, by the
+    algorithm of Hopcroft and Karp, no DFA is minimized.
+
+    the states of both DFAs are the items of a union-find, the start
+    states are merged first, then each merged pair `(p, q)` merges
+    the next states of `p` and `q` on every symbol, until no pair is
+    left. the DFAs are not equivalent as soon as an accepting state
+    is merged with a non-accepting one.
+    each union takes a pair into the worklist, so at most
+    :math:`n` pairs are expanded, :math:`O(n k \alpha(n))` for
+    :math:`n` states and :math:`k` classes of symbols.
+
+    use :func:`regex_parser.product.difference` to get a string
+    accepted by one but not by the other.
+
+    .. code-block:: python
+
+        equivalent(regex_parser.compile('(a|b)*'),
+                   regex_parser.compile('(a*b*)*'))  # True
+
+    :param left: a DFA
+    :type left: regex_parser.dfa.DFA or CompiledDFA
+    :param right: another DFA
+    :type right: regex_parser.dfa.DFA or CompiledDFA
+    :return: whether they accept the same strings
+    :rtype: bool
+    """
+    dfas = (_compiled(left), _compiled(right))
+    chars = [representative(symbol) for symbol in equivalence_classes(
+        set(dfas[0].symbols) | set(dfas[1].symbols))]
+
+    def accepting(node) -> bool:
+        return node is not _DEAD and dfas[node[0]].is_accepting(node[1])
+
+    def step(node, char: str):
+        if node is _DEAD:
+            return _DEAD
+        side, state = node
+        target = dfas[side].step(state, char)
+        return _DEAD if target < 0 else (side, target)
+
+    parent = dict()
+
+    def find(node):
+        root = node
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while node != root:  # compress the path
+            parent[node], node = root, parent[node]
+        return root
+
+    pairs = [((0, dfas[0].start), (1, dfas[1].start))]
+    parent[pairs[0][1]] = pairs[0][0]
+    if accepting(pairs[0][0]) != accepting(pairs[0][1]):
+        return False
+    while pairs:
+        first, second = pairs.pop()
+        for char in chars:
+            p, q = step(first, char), step(second, char)
+            p_root, q_root = find(p), find(q)
+            if p_root == q_root:
+                continue
+            if accepting(p) != accepting(q):
+                return False
+            parent[q_root] = p_root
+            pairs.append((p, q))
+    return True
+
+
+def canonical_hash(dfa, minimize: bool = True) -> str:
+    """a hash of the language of a DFA, the same for all the DFAs
+    accepting the same strings.
+
+    the minimal DFA is unique up to the names of its states and the
+    labels of its edges. the labels from a state into the same target
+    are merged into one set of characters, the targets are sorted
+    by the lowest character of their sets, and the states are numbered
+    by a breadth first walk in that order, so the numbers do not
+    depend on how the DFA was built. the numbered DFA is hashed by SHA-256.
+
+    :param dfa: the DFA
+    :type dfa: regex_parser.dfa.DFA
+    :param minimize: minimize the DFA first, give False if it is minimal
+    :type minimize: bool,optional
+    :return: the hex digest
+    :rtype: str
+    """
+    if minimize:
+        dfa, _ = dfa.minimize()
+    numbers = {dfa.start_state: 0}
+    queue = deque([dfa.start_state])
+    rows = []
+    while queue:
+        state = queue.popleft()
+        labels = dict()  # target -> (code point intervals, words)
+        for target, symbols in dfa.transitions.get(state, {}).items():
+            intervals, words = labels.setdefault(target, ([], []))
+            for symbol in symbols:
+                if isinstance(symbol, CharClass):
+                    intervals.extend(symbol.intervals)
+                elif len(symbol) == 1:
+                    intervals.append((ord(symbol), ord(symbol)))
+                else:
+                    words.append(symbol)
+        edges = []
+        for target, (intervals, words) in labels.items():
+            intervals = tuple(tuple(i) for i in CharClass(intervals).intervals)
+            if intervals or words:
+                edges.append((intervals, tuple(sorted(words)), target))
+        edges.sort(key=lambda edge: edge[:2])
+        row = []
+        for intervals, words, target in edges:
+            if target not in numbers:
+                numbers[target] = len(numbers)
+                queue.append(target)
+            row.append((intervals, words, numbers[target]))
+        rows.append((state in dfa.final_states, tuple(row)))
+    return hashlib.sha256(repr(rows).encode('utf-8')).hexdigest()
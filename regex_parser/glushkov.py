@@ -0,0 +1,166 @@
+"""
+filename src/glushkov.py
+
+build the position automata of a pattern, without empty edges
+"""
+from typing import *
+from regex_parser.Automata import Automata
+from regex_parser.charclass import CharClass
+
+
+class Positions(NamedTuple):
+    """the positions of a part of the pattern
+
+    :ivar nullable: whether the part matches the empty string
+    :ivar first: the positions which can begin a match of the part
+    :ivar last: the positions which can end a match of the part
+    """
+    nullable: bool
+    first: FrozenSet[int]
+    last: FrozenSet[int]
+
+
+class GlushkovBuilder:
+    r"""Glushkov construction of the position automata.
+
+    every symbol of the pattern is a position, numbered from 1.
+    The methods compute the :class:`Positions` of each part
+    and fill `self.follow`, the positions which can come after
+    a position. The automata has the start state `0` and one state
+    for each position, an edge goes to a position on its own symbol, so
+    there are `n + 1` states for `n` symbols and no :math:`\epsilon` edge.
+
+    the methods have the same names as the static methods of
+    :class:`regex_parser.Automata.Automata`, so it can be given to
+    :class:`regex_parser.RegexParser.RegexParser` as the `builder`.
+
+    .. code-block:: python
+
+        nfa = RegexParser('(a|b)*abb', builder=GlushkovBuilder()).build_NFA()
+
+    :param automata_class: the class of the automata to build
+    :type automata_class: type,optional
+
+    :ivar self.symbols: the symbols of each position
+    :vartype self.symbols: Dict[int, Set[str]]
+    :ivar self.follow: the positions after each position
+    :vartype self.follow: Dict[int, Set[int]]
+    """
+
+    def __init__(self, automata_class: type = Automata):
+        self.automata_class = automata_class
+        self.symbols = dict()
+        self.follow = dict()
+
+    def _connect(self, last: Iterable[int], first: FrozenSet[int]) -> None:
+        """the positions of `first` can come after the positions of `last`"""
+        if first:
+            for position in last:
+                self.follow[position] |= first
+
+    def empty_construct(self) -> Positions:
+        r"""the positions of :math:`\epsilon`
+
+        :return: the positions
+        :rtype: Positions
+        """
+        return Positions(True, frozenset(), frozenset())
+
+    def basic_construct(self, symbol) -> Positions:
+        """the positions of a single symbol
+
+        :param symbol: the symbol
+        :type symbol: Set[str] or str or CharClass
+        :return: the positions
+        :rtype: Positions
+        """
+        if isinstance(symbol, (str, CharClass)):
+            symbol = set([symbol])
+        position = len(self.symbols) + 1
+        self.symbols[position] = set(symbol)
+        self.follow[position] = set()
+        return Positions(False, frozenset([position]), frozenset([position]))
+
+    def star_operation(self, part: Positions) -> Positions:
+        """the positions of `s*`
+
+        :param part: the positions of `s`
+        :type part: Positions
+        :return: the new positions
+        :rtype: Positions
+        """
+        self._connect(part.last, part.first)
+        return Positions(True, part.first, part.last)
+
+    def plus_operation(self, part: Positions) -> Positions:
+        """the positions of `s+`
+
+        :param part: the positions of `s`
+        :type part: Positions
+        :return: the new positions
+        :rtype: Positions
+        """
+        self._connect(part.last, part.first)
+        return part
+
+    def optional_operation(self, part: Positions) -> Positions:
+        """the positions of `s?`
+
+        :param part: the positions of `s`
+        :type part: Positions
+        :return: the new positions
+        :rtype: Positions
+        """
+        return Positions(True, part.first, part.last)
+
+    def concatenation(self, base: Positions, addition: Positions) -> Positions:
+        """the positions of `st`
+
+        :param base: the positions of `s`
+        :type base: Positions
+        :param addition: the positions of `t`
+        :type addition: Positions
+        :return: the new positions
+        :rtype: Positions
+        """
+        self._connect(base.last, addition.first)
+        first = base.first | addition.first if base.nullable else base.first
+        last = base.last | addition.last if addition.nullable else addition.last
+        return Positions(base.nullable and addition.nullable, first, last)
+
+    def union(self, basic: Positions, parallel: Positions) -> Positions:
+        """the positions of `s|t`
+
+        :param basic: the positions of `s`
+        :type basic: Positions
+        :param parallel: the positions of `t`
+        :type parallel: Positions
+        :return: the new positions
+        :rtype: Positions
+        """
+        return Positions(basic.nullable or parallel.nullable,
+                         basic.first | parallel.first,
+                         basic.last | parallel.last)
+
+    def finish(self, part: Positions) -> Automata:
+        """build the automata of the whole pattern
+
+        :param part: the positions of the whole pattern
+        :type part: Positions
+        :return: the NFA, without empty edges
+        :rtype: Automata
+        """
+        nfa = self.automata_class(set())
+        nfa.set_start_state(0)
+        nfa.states.update(self.symbols)
+        for symbols in self.symbols.values():
+            nfa.input_alphabet |= symbols
+        for position in part.first:
+            nfa.add_transition(0, position, self.symbols[position])
+        for position, after in self.follow.items():
+            for target in after:
+                nfa.add_transition(position, target, self.symbols[target])
+        nfa.add_final_states(*part.last)
+        if part.nullable:
+            nfa.add_final_states(0)
+        return nfa
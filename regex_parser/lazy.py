@@ -0,0 +1,286 @@
+"""
+filename src/lazy.py
+
+build the DFA on the fly while matching
+"""
+from bisect import bisect_right
+from typing import *
+from regex_parser.Automata import Automata, iter_bits
+from regex_parser.charclass import CharClass, equivalence_classes, \
+    representative
+
+
+class LazyDFA:
+    r"""a DFA built from the NFA only where the input goes,
+    in the style of RE2.
+
+    a DFA state is the closure bit mask of NFA states
+    (see :meth:`Automata.precompute_closures`), a new state is made by
+    one step of the NFA the first time an edge is used,
+    and the edge is cached. The edges are labelled by the
+    :func:`regex_parser.charclass.equivalence_classes` of the symbols,
+    found by a binary search, so neither the edges nor the NFA steps
+    keep anything for each character of the input.
+    At most `max_states` states are cached,
+    when the cache is full it is flushed. If the cache thrashes,
+    that is it is flushed again before `min_progress` symbols are read,
+    the rest of the input is matched by simulating the NFA,
+    so the memory never grows beyond the budget, whatever the pattern.
+
+    a cached state costs about `len(nfa.states) / 8` bytes for
+    the mask and a dict entry for each class leaving it.
+
+    :param nfa: the NFA
+    :type nfa: Automata
+    :param max_states: the most DFA states to cache
+    :type max_states: int,optional
+    :param min_progress: the fewest symbols to read between two flushes,
+        default to `10 * max_states`
+    :type min_progress: int,optional
+
+    :ivar self.flushes: how many times the cache is flushed
+    :ivar self.progress: the symbols read since the last flush
+    :ivar self.fallbacks: how many scans fall back to the NFA simulation
+    """
+
+    def __init__(self, nfa: Automata, max_states: int = 1024,
+                 min_progress: int = None):
+        self.nfa = nfa
+        self.max_states = max_states
+        self.min_progress = min_progress if min_progress is not None \
+            else 10 * max_states
+        if nfa.closures is None:
+            nfa.precompute_closures()
+        self.start_mask = nfa.closure_mask([nfa.start_state])
+        self.final_mask = nfa.states_mask(nfa.final_states)
+        self.symbols = set()
+        for to_states in nfa.transitions.values():
+            for symbols in to_states.values():
+                self.symbols |= symbols
+        self.symbols -= Automata.empty_string
+        self.classes = equivalence_classes(self.symbols)
+        self._chars = [representative(cls) for cls in self.classes]
+        self._class_ids = {cls: i for i, cls in enumerate(self.classes)
+                           if not isinstance(cls, CharClass)}
+        self._ranges = sorted(
+            (low, high, i) for i, cls in enumerate(self.classes)
+            if isinstance(cls, CharClass) for low, high in cls.intervals)
+        self._lows = [low for low, _, _ in self._ranges]
+        self.flushes = 0
+        self.fallbacks = 0
+        self._flush()
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        """the number of cached states"""
+        return len(self._masks)
+
+    def _flush(self) -> None:
+        """drop all the cached states"""
+        self._ids = dict()  # mask -> state
+        self._masks = []  # state -> mask
+        self._next = []  # state -> class -> state, -1 for dead
+        self._accepting = []
+        self.flushes += 1
+        self.progress = 0
+
+    def _add(self, mask: int) -> int:
+        """cache a new state
+
+        :param mask: the closure mask
+        :type mask: int
+        :return: the new state
+        :rtype: int
+        """
+        state = len(self._masks)
+        self._ids[mask] = state
+        self._masks.append(mask)
+        self._next.append(dict())
+        self._accepting.append(bool(mask & self.final_mask))
+        return state
+
+    def _class_of(self, symbol: str) -> int:
+        """the class of the symbol, -1 if no edge is labelled by it"""
+        cls = self._class_ids.get(symbol)
+        if cls is not None:
+            return cls
+        if self._ranges and len(symbol) == 1:
+            code = ord(symbol)
+            i = bisect_right(self._lows, code) - 1
+            if i >= 0 and code <= self._ranges[i][1]:
+                return self._ranges[i][2]
+        return -1
+
+    def _move(self, mask: int, cls: int) -> int:
+        """the NFA step on a class, 0 for the dead state.
+        unlike :meth:`Automata.move_mask` nothing is memoized, so the
+        memory of the fallback stays within the budget"""
+        if cls < 0:
+            return 0
+        nfa, char = self.nfa, self._chars[cls]
+        reached = 0
+        for bit in iter_bits(mask):
+            reached |= nfa.closure_mask(
+                nfa.successors(nfa.bit_states[bit], char))
+        return reached
+
+    def _scan(self, text: str, begin: int) -> Iterator[bool]:
+        """read `text` from `begin`, yield whether the state after
+        each symbol is accepting, stop at the dead state
+
+        :param text: the input string
+        :type text: str
+        :param begin: the begin position
+        :type begin: int
+        """
+        state = self._ids.get(self.start_mask)
+        if state is None:
+            if len(self._masks) >= self.max_states:
+                self._flush()
+            state = self._add(self.start_mask)
+        for i in range(begin, len(text)):
+            cls = self._class_of(text[i])
+            target = self._next[state].get(cls)
+            if target is None:
+                mask = self._move(self._masks[state], cls)
+                target = self._ids.get(mask, -1) if mask else -1
+                if target < 0 and mask:
+                    if len(self._masks) < self.max_states:
+                        target = self._add(mask)
+                    elif self.progress < self.min_progress and self.flushes:
+                        # the cache thrashes, the next scans begin with
+                        # an empty cache, so they fall back only if
+                        # it thrashes again
+                        self.fallbacks += 1
+                        self._flush()
+                        yield from self._simulate(mask, text, i + 1)
+                        return
+                    else:
+                        self._flush()
+                        state = None
+                        target = self._add(mask)
+                if state is not None:
+                    self._next[state][cls] = target
+            if target < 0:
+                return
+            state = target
+            self.progress += 1
+            yield self._accepting[state]
+
+    def _simulate(self, mask: int, text: str, begin: int) -> Iterator[bool]:
+        """go on by the NFA simulation, without caching"""
+        yield bool(mask & self.final_mask)
+        for i in range(begin, len(text)):
+            mask = self._move(mask, self._class_of(text[i]))
+            if not mask:
+                return
+            yield bool(mask & self.final_mask)
+
+    def fullmatch(self, text: str) -> bool:
+        """check whether the whole `text` is accepted
+
+        :param text: the input string
+        :type text: str
+        :return: whether the automata accept the string
+        :rtype: bool
+        """
+        accepting = bool(self.start_mask & self.final_mask)
+        read = 0
+        for accepting in self._scan(text, 0):
+            read += 1
+        return read == len(text) and accepting
+
+    def match(self, text: str, begin: int = 0) -> Optional[int]:
+        """find the longest accepted substring beginning at `begin`
+
+        :param text: the input string
+        :type text: str
+        :param begin: the begin position
+        :type begin: int
+        :return: the end of the longest match, None if there is no match
+        :rtype: Optional[int]
+        """
+        end = begin if self.start_mask & self.final_mask else None
+        for i, accepting in enumerate(self._scan(text, begin), begin + 1):
+            if accepting:
+                end = i
+        return end
+
+    def _advance(self, mask: int, cls: int) -> int:
+        """the next closure mask, by the cached edge if there is one,
+        the new edge is cached while there is room, the cache is
+        never flushed here
+
+        :param mask: the closure mask
+        :type mask: int
+        :param cls: the class of the input symbol
+        :type cls: int
+        :return: the next mask, 0 for the dead state
+        :rtype: int
+        """
+        state = self._ids.get(mask)
+        if state is not None:
+            target = self._next[state].get(cls)
+            if target is not None:
+                return self._masks[target] if target >= 0 else 0
+        reached = self._move(mask, cls)
+        if state is None:
+            return reached
+        target = self._ids.get(reached, -1) if reached else -1
+        if target < 0 and reached:
+            if len(self._masks) >= self.max_states:
+                return reached
+            target = self._add(reached)
+        self._next[state][cls] = target
+        return reached
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """find the leftmost longest accepted substring by one scan.
+
+        a thread `(begin, mask)` begins at each position until a match
+        is found, the threads are kept in the order of their begin,
+        a mask already held by an earlier thread is dropped from the
+        later ones, so at most as many threads as distinct states are
+        alive and the text is read once, as in
+        :meth:`regex_parser.compiled.CompiledDFA.search`.
+        the threads step by the cached edges, the new states are cached
+        while there is room
+
+        :param text: the input string
+        :type text: str
+        :return: the span `(begin, end)` of the match,
+            None if there is no match
+        :rtype: Optional[Tuple[int, int]]
+        """
+        start, final = self.start_mask, self.final_mask
+        if start & final:
+            return (0, self.match(text))
+        if start not in self._ids and len(self._masks) < self.max_states:
+            self._add(start)
+        threads = []
+        best = None
+        for i, char in enumerate(text):
+            cls = self._class_of(char)
+            if best is None:
+                if not threads and cls < 0:
+                    continue
+                threads.append((i, start))
+            if cls < 0:
+                threads = []
+                continue
+            moved = []
+            claimed = set()
+            for begin, mask in threads:
+                mask = self._advance(mask, cls)
+                if not mask or mask in claimed:
+                    continue
+                claimed.add(mask)
+                moved.append((begin, mask))
+                if mask & final and (best is None or begin <= best[0]):
+                    best = (begin, i + 1)
+            if best is not None:
+                moved = [thread for thread in moved if thread[0] <= best[0]]
+            threads = moved
+            if best is not None and not threads:
+                break
+        return best
@@ -0,0 +1,157 @@
+"""
+filename src/lexer.py
+
+a lexer generator: many token patterns in one DFA
+"""
+from array import array
+from typing import *
+from regex_parser.Automata import Automata
+from regex_parser.RegexParser import RegexParser
+from regex_parser.builder import NFABuilder
+from regex_parser.dfa import DFA
+from regex_parser.stream import CHUNK_SIZE, iter_chunks, munch
+
+
+class Token(NamedTuple):
+    """a token found by :class:`Lexer`
+
+    :ivar name: the name of the rule
+    :ivar value: the text of the token
+    :ivar position: where the token begins
+    """
+    name: str
+    value: str
+    position: int
+
+
+class Lexer:
+    r"""build one DFA for an ordered list of token rules.
+
+    the NFAs of the rules share a new start state, every final state
+    is tagged by its rule, the union is determinized once by
+    :class:`regex_parser.dfa.DFA` and minimized without merging states
+    of different rules. A DFA state accepts the first rule
+    whose final state it holds, so an earlier rule wins a tie.
+    :meth:`tokenize` takes the longest token at each position
+    (maximal munch), reading each character once per token.
+
+    .. code-block:: python
+
+        lexer = Lexer([('id', '[a-z][a-z0-9]*'),
+                       ('+', '\\+'), ('*', '\\*'),
+                       ('(', '\\('), (')', '\\)'),
+                       ('space', '[ \t\n]+')],
+                      skip=['space'])
+        [t.name for t in lexer.tokenize('a + b1 * c')]
+        # ['id', '+', 'id', '*', 'id']
+
+    :param rules: the `(name, pattern)` of the tokens, in priority order
+    :type rules: List[Tuple[str, str]]
+    :param skip: the names of the tokens not to yield, such as spaces
+    :type skip: Iterable[str],optional
+
+    :ivar self.names: the name of each rule
+    :ivar self.dfa: the compiled DFA
+    :vartype self.dfa: regex_parser.compiled.CompiledDFA
+    :ivar self.accept: the rule accepted by each row of `self.dfa`,
+        -1 for not accepting
+    :vartype self.accept: array
+    """
+
+    def __init__(self, rules: List[Tuple[str, str]], skip: Iterable[str] = ()):
+        self.names = [name for name, _ in rules]
+        self.skip = set(skip)
+
+        # union the NFAs and tag the final states
+        builder = NFABuilder()
+        nfa = builder.nfa
+        start = builder.new_state()
+        nfa.set_start_state(start)
+        rule_of = {}
+        for rule, (_, pattern) in enumerate(rules):
+            fragment = RegexParser(pattern, builder=builder).parse()
+            nfa.add_transition(start, fragment.start, Automata.empty_string)
+            nfa.add_final_states(fragment.final)
+            rule_of[fragment.final] = rule
+
+        dfa = DFA(nfa)
+        tags = {}
+        for nfa_states, state in dfa.NFA_map.items():
+            accepted = [rule_of[s] for s in nfa_states if s in rule_of]
+            if accepted:
+                tags[state] = min(accepted)
+        dfa, mapping = dfa.minimize(tags)
+        tags = {mapping[state]: rule for state, rule in tags.items()}
+
+        self.dfa = dfa.compile()
+        self.accept = array('i', (tags.get(state, -1)
+                                  for state in self.dfa.state_ids))
+
+    def longest(self, text: str, begin: int) -> Tuple[int, int]:
+        """find the longest token at `begin`
+
+        :param text: the input string
+        :type text: str
+        :param begin: the begin position
+        :type begin: int
+        :return: the rule and the end of the token,
+            `(-1, begin)` if there is no token
+        :rtype: Tuple[int, int]
+        """
+        dfa = self.dfa
+        table, classes, width, accept = \
+            dfa.table, dfa.classes, dfa.width, self.accept
+        state = dfa.start
+        rule, end = accept[state], begin
+        for i in range(begin, len(text)):
+            column = classes.get(text[i])
+            if column is None:
+                column = dfa.column(text[i])
+            if column < 0:
+                break
+            state = table[state * width + column]
+            if state < 0:
+                break
+            if accept[state] >= 0:
+                rule, end = accept[state], i + 1
+        return rule, end
+
+    def tokenize(self, text: str) -> Iterator[Token]:
+        """split the text into tokens
+
+        :param text: the input string
+        :type text: str
+        :raises RuntimeError: no rule matches at a position
+        :return: the tokens, without the skipped ones
+        :rtype: Iterator[Token]
+        """
+        position = 0
+        while position < len(text):
+            rule, end = self.longest(text, position)
+            if rule < 0 or end == position:
+                raise RuntimeError(f"unexpected {text[position]} "
+                                   f"at position {position}")
+            name = self.names[rule]
+            if name not in self.skip:
+                yield Token(name, text[position:end], position)
+            position = end
+
+    def tokenize_stream(self, source, chunk_size: int = CHUNK_SIZE,
+                        encoding: str = 'utf-8') -> Iterator[Token]:
+        """split a stream into tokens, in constant memory,
+        a token may span many chunks
+
+        :param source: the input, see :func:`regex_parser.stream.iter_chunks`
+        :param chunk_size: the size of the chunks read from a buffer or a file
+        :type chunk_size: int,optional
+        :param encoding: the encoding of the bytes
+        :type encoding: str,optional
+        :raises RuntimeError: no rule matches at a position
+        :return: the tokens, without the skipped ones
+        :rtype: Iterator[Token]
+        """
+        chunks = iter_chunks(source, chunk_size, encoding)
+        for rule, begin, _, value in munch(self.dfa, self.accept, chunks):
+            name = self.names[rule]
+            if name not in self.skip:
+                yield Token(name, value, begin)
@@ -0,0 +1,235 @@
+"""
+filename src/prefilter.py
+
+find the literals a match must have, to skip the text without them
+"""
+from __future__ import annotations
+from typing import *
+from regex_parser.charclass import CharClass
+from regex_parser.syntax import fold
+from regex_parser.utf8 import ByteBuilder
+
+MAX_LITERALS = 16
+"""the most strings kept in a set of literals, a bigger set is dropped"""
+
+
+class Literals(NamedTuple):
+    """what is known of the strings matched by a part of the pattern
+
+    :ivar exact: all the strings it matches, None if they are too many
+    :ivar prefixes: every match begins with one of them,
+        `{''}` if nothing is known
+    :ivar suffixes: every match ends with one of them,
+        `{''}` if nothing is known
+    :ivar required: a string in every match, `''` if nothing is known
+    """
+    exact: Optional[FrozenSet[str]]
+    prefixes: FrozenSet[str]
+    suffixes: FrozenSet[str]
+    required: str
+
+
+NOTHING_KNOWN = frozenset([''])
+
+
+def _cross(heads: FrozenSet[str], tails: FrozenSet[str]) \
+        -> Optional[FrozenSet[str]]:
+    """the concatenations, None if they are too many"""
+    if len(heads) * len(tails) > MAX_LITERALS:
+        return None
+    return frozenset(head + tail for head in heads for tail in tails)
+
+
+def _prefixes(strings: Optional[FrozenSet[str]]) -> FrozenSet[str]:
+    """the prefixes of a match, when the match is one of `strings`"""
+    if strings is None or '' in strings or len(strings) > MAX_LITERALS:
+        return NOTHING_KNOWN
+    return strings
+
+
+def _literals(exact: Optional[FrozenSet[str]], prefixes: FrozenSet[str],
+              suffixes: FrozenSet[str], required: str = '') -> Literals:
+    """the literals, a single prefix or suffix is also required,
+    the longest required string is kept"""
+    for strings in (prefixes, suffixes):
+        if len(strings) == 1 and len(next(iter(strings))) > len(required):
+            required, = strings
+    return Literals(exact, prefixes, suffixes, required)
+
+
+def _exact(strings: Optional[FrozenSet[str]]) -> Literals:
+    """the literals of a part matching exactly `strings`"""
+    if strings is None or len(strings) > MAX_LITERALS:
+        return Literals(None, NOTHING_KNOWN, NOTHING_KNOWN, '')
+    return _literals(strings, _prefixes(strings), _prefixes(strings))
+
+
+class LiteralBuilder:
+    r"""compute the :class:`Literals` of a pattern.
+
+    the methods have the same names as the static methods of
+    :class:`regex_parser.Automata.Automata`, so it can be given to
+    :class:`regex_parser.RegexParser.RegexParser` as the `builder`,
+    or to :func:`regex_parser.syntax.fold` with a syntax tree.
+
+    for example `err(or|no)*` gives the prefixes `{'err'}`
+    and the required `'err'`, `[a-z]+ERROR` gives the suffixes `{'ERROR'}`
+    and the required `'ERROR'`.
+    """
+
+    def empty_construct(self) -> Literals:
+        """the literals of the empty string"""
+        return Literals(NOTHING_KNOWN, NOTHING_KNOWN, NOTHING_KNOWN, '')
+
+    def basic_construct(self, symbol) -> Literals:
+        """the literals of a symbol, a small class gives its characters"""
+        if isinstance(symbol, (str, CharClass)):
+            symbol = set([symbol])
+        chars = set()
+        for label in symbol:
+            if isinstance(label, CharClass) and len(label) <= MAX_LITERALS:
+                chars.update(label)
+            elif isinstance(label, str) and len(label) == 1:
+                chars.add(label)
+            else:
+                return _exact(None)
+        return _exact(frozenset(chars))
+
+    def star_operation(self, part: Literals) -> Literals:
+        """the literals of `s*`"""
+        if part.exact == NOTHING_KNOWN:
+            return part
+        return _exact(None)
+
+    def plus_operation(self, part: Literals) -> Literals:
+        """the literals of `s+`, the same as `s` without the exact strings"""
+        if part.exact == NOTHING_KNOWN:
+            return part
+        return Literals(None, part.prefixes, part.suffixes, part.required)
+
+    def optional_operation(self, part: Literals) -> Literals:
+        """the literals of `s?`"""
+        if part.exact is None:
+            return _exact(None)
+        return _exact(part.exact | NOTHING_KNOWN)
+
+    def concatenation(self, base: Literals, addition: Literals) -> Literals:
+        """the literals of `st`"""
+        if base.exact is not None and addition.exact is not None:
+            exact = _cross(base.exact, addition.exact)
+            if exact is not None:
+                return _exact(exact)
+        prefixes = base.prefixes
+        if base.exact is not None:
+            prefixes = _cross(base.exact, addition.prefixes)
+            prefixes = _prefixes(prefixes) if prefixes is not None \
+                else base.prefixes
+        suffixes = addition.suffixes
+        if addition.exact is not None:
+            suffixes = _cross(base.suffixes, addition.exact)
+            suffixes = _prefixes(suffixes) if suffixes is not None \
+                else addition.suffixes
+        required = max(base.required, addition.required, key=len)
+        return _literals(None, prefixes, suffixes, required)
+
+    def union(self, basic: Literals, parallel: Literals) -> Literals:
+        """the literals of `s|t`"""
+        if basic.exact is not None and parallel.exact is not None:
+            literals = _exact(basic.exact | parallel.exact)
+            if literals.exact is not None:
+                return literals
+        prefixes, suffixes = (
+            NOTHING_KNOWN if NOTHING_KNOWN in (mine, theirs)
+            else _prefixes(mine | theirs)
+            for mine, theirs in ((basic.prefixes, parallel.prefixes),
+                                 (basic.suffixes, parallel.suffixes)))
+        required = basic.required \
+            if basic.required == parallel.required else ''
+        return _literals(None, prefixes, suffixes, required)
+
+
+class Prefilter:
+    r"""find the positions where a match may begin,
+    so a search runs the automata only there.
+
+    if every match begins with one of a few literal prefixes, the
+    candidates are the places of the prefixes, found by `str.find`.
+    else if every match has a required literal, a text without
+    it has no match and no position is tried.
+
+    .. code-block:: python
+
+        prefilter = Prefilter.from_syntax(syntax.parse('err(or|no)*'))
+        prefilter.prefixes  # ('err',)
+        list(prefilter.candidates('an error, an err'))  # [3, 13]
+
+    :param literals: the literals of the pattern
+    :type literals: Literals
+
+    :ivar self.prefixes: the sorted prefixes, empty if they are unknown,
+        `bytes` for a pattern over the UTF-8 bytes
+    :vartype self.prefixes: Tuple[str, ...]
+    :ivar self.required: the required literal, empty if it is unknown
+    :vartype self.required: str
+    """
+
+    def __init__(self, literals: Literals):
+        prefixes = literals.prefixes
+        self.prefixes = tuple(sorted(prefixes)) \
+            if prefixes != NOTHING_KNOWN else ()
+        self.required = literals.required
+
+    @classmethod
+    def from_syntax(cls, tree, utf8: bool = False) -> Optional[Prefilter]:
+        """the prefilter of a syntax tree
+
+        :param tree: the syntax tree, see :mod:`regex_parser.syntax`
+        :param utf8: find the literals in the UTF-8 bytes instead of a string,
+            for :class:`regex_parser.utf8.ByteDFA`
+        :type utf8: bool,optional
+        :return: the prefilter, None if no literal is known
+        :rtype: Optional[Prefilter]
+        """
+        if utf8:
+            prefilter = cls(fold(tree, ByteBuilder(LiteralBuilder())))
+            # the symbols are the bytes
+            prefilter.prefixes = tuple(
+                prefix.encode('latin-1') for prefix in prefilter.prefixes)
+            prefilter.required = prefilter.required.encode('latin-1')
+        else:
+            prefilter = cls(fold(tree, LiteralBuilder()))
+        if not prefilter.prefixes and not prefilter.required:
+            return None
+        return prefilter
+
+    def candidates(self, text: str) -> Iterator[int]:
+        """the positions where a match may begin, in order;
+        with no prefix known, the positions up to the last place of
+        the required literal
+
+        :param text: the input string, or the bytes if
+            the literals are bytes
+        :type text: str
+        :return: the positions
+        :rtype: Iterator[int]
+        """
+        if self.prefixes:
+            # the next place of each prefix
+            places = {prefix: text.find(prefix) for prefix in self.prefixes}
+            while True:
+                found = [place for place in places.values() if place >= 0]
+                if not found:
+                    return
+                position = min(found)
+                yield position
+                for prefix, place in places.items():
+                    if place == position:
+                        places[prefix] = text.find(prefix, position + 1)
+        else:
+            # a match holds the literal, so it begins at its last place
+            # or before
+            yield from range(text.rfind(self.required) + 1)
+
+    def __repr__(self) -> str:
+        return f"Prefilter(prefixes={self.prefixes!r}, " \
+            f"required={self.required!r})"
@@ -0,0 +1,267 @@
+"""
+filename src/product.py
+
+intersection, difference and complement of DFAs, built lazily
+"""
+from __future__ import annotations
+from collections import deque
+from typing import *
+from regex_parser.charclass import CharClass, equivalence_classes, \
+    representative
+from regex_parser.compiled import CompiledDFA
+
+DEAD = -1
+"""the dead state of a :class:`Product`, as in :class:`CompiledDFA`"""
+
+
+class _Empty:
+    """an operand accepting nothing, the right side of a complement"""
+    symbols = ()
+    start = DEAD
+
+    def step(self, state, symbol: str) -> int:
+        return DEAD
+
+    def is_accepting(self, state) -> bool:
+        return False
+
+
+class Product:
+    r"""a boolean combination of the languages of two DFAs.
+
+    a state is a pair `(left state, right state)`, `-1` stands for
+    the dead state of an operand. the pairs are made only when they are
+    reached, by :meth:`step`, so :meth:`is_empty` and :meth:`witness`
+    walk the reachable pairs and stop at the first accepting one,
+    without building the whole product.
+
+    the input symbols are the
+    :func:`regex_parser.charclass.equivalence_classes` of the symbols
+    of both operands, every character of a class takes the same edges,
+    so one character of each class is enough to explore a state.
+    a pair which can no more accept is the dead state, for example
+    a pair whose left state is dead in an intersection.
+
+    .. code-block:: python
+
+        words = regex_parser.compile('[a-z]+')
+        keywords = regex_parser.compile('if|else|while')
+        Product(keywords, words, lambda a, b: a and not b).is_empty()  # True
+        DFA(nfa).complement().witness()  # a string the NFA refuses
+
+    :param left: the left operand
+    :type left: regex_parser.dfa.DFA or CompiledDFA or Product
+    :param right: the right operand, None for a DFA accepting nothing
+    :type right: regex_parser.dfa.DFA or CompiledDFA or Product,optional
+    :param accept: whether a pair is accepting, given whether its left
+        and its right states are accepting
+    :type accept: Callable[[bool, bool], bool]
+
+    :ivar self.symbols: the input symbols, the characters on no edge
+        of the operands are a class if the dead pair accepts
+    :vartype self.symbols: List
+    :ivar self.start: the start pair
+    """
+
+    def __init__(self, left, right, accept: Callable[[bool, bool], bool]):
+        self.left = _operand(left)
+        self.right = _operand(right)
+        self.accept = accept
+        # whether a pair can accept after one side is dead
+        self._live_without_left = accept(False, True) or accept(False, False)
+        self._live_without_right = accept(True, False) or accept(False, False)
+
+        symbols = set(self.left.symbols) | set(self.right.symbols)
+        if accept(False, False):
+            known = CharClass(interval for symbol in symbols
+                              for interval in _intervals(symbol))
+            if ~known:
+                symbols.add(~known)
+        self.symbols = equivalence_classes(symbols)
+        self._chars = [representative(symbol) for symbol in self.symbols]
+        self.start = self._pair(self.left.start, self.right.start)
+
+    def _pair(self, left, right):
+        """the pair of the states, :data:`DEAD` if it can no more accept"""
+        if left == DEAD and right == DEAD:
+            live = self.accept(False, False)
+        elif left == DEAD:
+            live = self._live_without_left
+        elif right == DEAD:
+            live = self._live_without_right
+        else:
+            live = True
+        return (left, right) if live else DEAD
+
+    def step(self, state, symbol: str):
+        """the next state
+
+        :param state: the current pair
+        :param symbol: the input symbol
+        :type symbol: str
+        :return: the next pair, :data:`DEAD` if there is no edge
+        """
+        if state == DEAD:
+            return DEAD
+        left, right = state
+        return self._pair(
+            DEAD if left == DEAD else self.left.step(left, symbol),
+            DEAD if right == DEAD else self.right.step(right, symbol))
+
+    def is_accepting(self, state) -> bool:
+        """whether the pair is accepting
+
+        :param state: the pair
+        :return: whether the pair is accepting
+        :rtype: bool
+        """
+        if state == DEAD:
+            return False
+        left, right = state
+        return self.accept(
+            left != DEAD and self.left.is_accepting(left),
+            right != DEAD and self.right.is_accepting(right))
+
+    def fullmatch(self, text: str) -> bool:
+        """check whether the whole `text` is accepted
+
+        :param text: the input string
+        :type text: str
+        :return: whether the product accept the string
+        :rtype: bool
+        """
+        state = self.start
+        for char in text:
+            state = self.step(state, char)
+            if state == DEAD:
+                return False
+        return self.is_accepting(state)
+
+    def states(self) -> Iterator:
+        """the reachable pairs, in breadth first order,
+        a pair is made only when the iterator gets to it
+
+        :return: the iterator of the pairs, without the dead state
+        :rtype: Iterator
+        """
+        for state, _ in self._walk():
+            yield state
+
+    def _walk(self) -> Iterator[Tuple[Any, dict]]:
+        """the breadth first walk, yield each pair and the map from
+        the pairs to their parent pair and symbol"""
+        if self.start == DEAD:
+            return
+        parents = {self.start: None}
+        queue = deque([self.start])
+        while queue:
+            state = queue.popleft()
+            yield state, parents
+            for char in self._chars:
+                target = self.step(state, char)
+                if target != DEAD and target not in parents:
+                    parents[target] = (state, char)
+                    queue.append(target)
+
+    def witness(self) -> Optional[str]:
+        """a shortest accepted string, the walk stops at the first
+        accepting pair
+
+        :return: the string, None if no string is accepted
+        :rtype: Optional[str]
+        """
+        for state, parents in self._walk():
+            if self.is_accepting(state):
+                chars = []
+                while parents[state] is not None:
+                    state, char = parents[state]
+                    chars.append(char)
+                return ''.join(reversed(chars))
+        return None
+
+    def is_empty(self) -> bool:
+        """check whether no string is accepted, see :meth:`witness`
+
+        :return: whether the language is empty
+        :rtype: bool
+        """
+        return self.witness() is None
+
+    def to_dfa(self):
+        """build the reachable pairs into a DFA, the states are
+        numbered from 1 in breadth first order
+
+        :return: the DFA
+        :rtype: regex_parser.dfa.DFA
+        """
+        from regex_parser.dfa import DFA  # dfa imports this module
+        dfa = DFA()
+        dfa.input_alphabet = set(self.symbols)
+        ids = dict()
+        for state in self.states():
+            ids[state] = len(ids) + 1
+        dfa.set_start_state(1)
+        for state, state_id in ids.items():
+            dfa.states.add(state_id)
+            if self.is_accepting(state):
+                dfa.add_final_states(state_id)
+            for symbol, char in zip(self.symbols, self._chars):
+                target = self.step(state, char)
+                if target != DEAD:
+                    dfa.add_transition(state_id, ids[target], set([symbol]))
+        return dfa
+
+
+def _operand(operand):
+    """compile a DFA for its :meth:`CompiledDFA.step`"""
+    if operand is None:
+        return _Empty()
+    if isinstance(operand, (CompiledDFA, Product)):
+        return operand
+    return operand.compile()
+
+
+def _intervals(symbol) -> Iterable[Tuple[int, int]]:
+    """the code points of a symbol, none for a word"""
+    if isinstance(symbol, CharClass):
+        return symbol.intervals
+    if len(symbol) == 1:
+        return ((ord(symbol), ord(symbol)),)
+    return ()
+
+
+def intersection(left, right) -> Product:
+    """the strings accepted by both
+
+    :param left: a DFA
+    :type left: regex_parser.dfa.DFA or CompiledDFA or Product
+    :param right: another DFA
+    :type right: regex_parser.dfa.DFA or CompiledDFA or Product
+    :return: the lazy product
+    :rtype: Product
+    """
+    return Product(left, right, lambda a, b: a and b)
+
+
+def difference(left, right) -> Product:
+    """the strings accepted by `left` but not by `right`
+
+    :param left: a DFA
+    :type left: regex_parser.dfa.DFA or CompiledDFA or Product
+    :param right: another DFA
+    :type right: regex_parser.dfa.DFA or CompiledDFA or Product
+    :return: the lazy product
+    :rtype: Product
+    """
+    return Product(left, right, lambda a, b: a and not b)
+
+
+def complement(operand) -> Product:
+    """the strings not accepted, over all the characters
+
+    :param operand: a DFA
+    :type operand: regex_parser.dfa.DFA or CompiledDFA or Product
+    :return: the lazy product
+    :rtype: Product
+    """
+    return Product(operand, None, lambda a, b: not a)
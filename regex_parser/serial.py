@@ -0,0 +1,305 @@
+"""
+filename src/serial.py
+
+a binary file format of the automata, loaded without copying
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import *
+from regex_parser.charclass import CharClass, symbol_key
+
+MAGIC = b'RXPA'
+VERSION = 1
+"""the version of the format, a file of another version is refused"""
+
+KIND_AUTOMATA = 1
+KIND_DFA = 2
+KIND_COMPILED = 3
+
+_HEADER = struct.Struct('<4sHHII')  # magic, version, kind, fields, sections
+
+
+def _int_array(items: Iterable[int]) -> array:
+    """a little endian array of 32 bits integers"""
+    items = array('i', items)
+    if sys.byteorder == 'big':
+        items.byteswap()
+    return items
+
+
+def _cast(view: memoryview, typecode: str):
+    """view the bytes as integers, copy them on a big endian machine"""
+    view = view.cast(typecode)
+    if sys.byteorder == 'big' and view.itemsize > 1:
+        view = array(typecode, view)
+        view.byteswap()
+    return view
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """write a file through a temporary file,
+    so a reader never sees a half written file
+
+    :param path: the path of the file
+    :type path: str
+    :param data: the content
+    :type data: bytes
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def write(path, kind: int, fields: List[int], sections: List[bytes]) -> None:
+    """write a file of the format, through a temporary file,
+    so a reader never sees a half written file.
+
+    .. code-block:: text
+
+        magic 'RXPA', version, kind        8 bytes
+        the number of fields and sections  8 bytes
+        the fields                         4 bytes each
+        the byte size of each section      4 bytes each
+        the sections, padded to 4 bytes
+
+    all the integers are little endian
+
+    :param path: the path of the file
+    :param kind: what is in the file, :data:`KIND_AUTOMATA`,
+        :data:`KIND_DFA` or :data:`KIND_COMPILED`
+    :type kind: int
+    :param fields: the integer fields
+    :type fields: List[int]
+    :param sections: the sections
+    :type sections: List[bytes]
+    """
+    parts = [_HEADER.pack(MAGIC, VERSION, kind, len(fields), len(sections)),
+             _int_array(fields).tobytes(),
+             _int_array(len(section) for section in sections).tobytes()]
+    for section in sections:
+        parts.append(bytes(section))
+        parts.append(b'\0' * (-len(section) % 4))
+    write_atomic(os.fspath(path), b''.join(parts))
+
+
+def read(path, kind: int, use_mmap: bool = True) \
+        -> Tuple[List[int], List[memoryview]]:
+    """read a file of the format, see :func:`write`
+
+    :param path: the path of the file
+    :param kind: what should be in the file
+    :type kind: int
+    :param use_mmap: map the file into the memory instead of reading it,
+        the sections are views of the mapped file
+    :type use_mmap: bool,optional
+    :raises ValueError: not a file of this kind or of this version
+    :return: the fields and the sections
+    :rtype: Tuple[List[int], List[memoryview]]
+    """
+    with open(path, 'rb') as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = f.read()
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError(f"not an automata file: {path}")
+    magic, version, found, n_fields, n_sections = \
+        _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"not an automata file: {path}")
+    if version != VERSION:
+        raise ValueError(f"unsupported version {version}: {path}")
+    if found != kind:
+        raise ValueError(f"expect kind {kind}, got {found}: {path}")
+    position = _HEADER.size
+    if len(view) < position + 4 * (n_fields + n_sections):
+        raise ValueError(f"truncated automata file: {path}")
+    fields = list(_cast(view[position:position + 4 * n_fields], 'i'))
+    position += 4 * n_fields
+    sizes = list(_cast(view[position:position + 4 * n_sections], 'i'))
+    position += 4 * n_sections
+    sections = []
+    for size in sizes:
+        # the padding is written too, a shorter file is cut
+        if size < 0 or len(view) < position + size + (-size % 4):
+            raise ValueError(f"truncated automata file: {path}")
+        sections.append(view[position:position + size])
+        position += size + (-size % 4)
+    return fields, sections
+
+
+def pack_symbols(symbols: List) -> Tuple[bytes, bytes]:
+    """pack the input symbols into two arrays, the symbol `i` is
+    `data[offsets[i]:offsets[i+1]]`, `[0, code points...]` for a string,
+    `[1, low, high, low, high...]` for a :class:`CharClass`
+
+    :param symbols: the symbols
+    :type symbols: List
+    :return: the offsets and the data
+    :rtype: Tuple[bytes, bytes]
+    """
+    offsets, data = [0], []
+    for symbol in symbols:
+        if isinstance(symbol, CharClass):
+            data.append(1)
+            for interval in symbol.intervals:
+                data.extend(interval)
+        else:
+            data.append(0)
+            data.extend(map(ord, symbol))
+        offsets.append(len(data))
+    return _int_array(offsets).tobytes(), _int_array(data).tobytes()
+
+
+def unpack_symbols(offsets: memoryview, data: memoryview) -> List:
+    """the symbols packed by :func:`pack_symbols`
+
+    :param offsets: the offsets
+    :type offsets: memoryview
+    :param data: the data
+    :type data: memoryview
+    :return: the symbols
+    :rtype: List
+    """
+    offsets, data = _cast(offsets, 'i'), _cast(data, 'i')
+    symbols = []
+    for i in range(len(offsets) - 1):
+        item = data[offsets[i]:offsets[i + 1]]
+        if item[0]:
+            symbols.append(CharClass(zip(item[1::2], item[2::2])))
+        else:
+            symbols.append(''.join(map(chr, item[1:])))
+    return symbols
+
+
+def dump_automata(automata, path, kind: int = KIND_AUTOMATA,
+                  keep_sink: bool = False) -> None:
+    """write an automata, the edges are written sorted,
+    in the layout of :class:`regex_parser.compact.CompactAutomata`.
+    only the useful states are written, see
+    :meth:`regex_parser.Automata.Automata.trim`,
+    the automata is not changed
+
+    :param automata: the automata
+    :type automata: regex_parser.Automata.Automata
+    :param path: the path of the file
+    :param kind: :data:`KIND_AUTOMATA` or :data:`KIND_DFA`
+    :type kind: int,optional
+    :param keep_sink: write the dead sink
+    :type keep_sink: bool,optional
+    """
+    useful = automata.useful_states(keep_sink)
+    edges = set()
+    symbols = set(automata.input_alphabet)
+    for from_state, to_states in automata.transitions.items():
+        if from_state not in useful:
+            continue
+        for to_state, labels in to_states.items():
+            if to_state not in useful:
+                continue
+            symbols |= labels
+            edges.update((from_state, label, to_state) for label in labels)
+    symbols = sorted(symbols, key=symbol_key)
+    ids = {symbol: i for i, symbol in enumerate(symbols)}
+    edges = sorted((f, ids[label], t) for f, label, t in edges)
+
+    rows, offsets = [], []
+    for i, (from_state, _, _) in enumerate(edges):
+        if not rows or rows[-1] != from_state:
+            rows.append(from_state)
+            offsets.append(i)
+    offsets.append(len(edges))
+
+    arrays = [
+        sorted(automata.states & useful),
+        sorted(automata.final_states & useful),
+        sorted(ids[symbol] for symbol in automata.input_alphabet),
+        rows, offsets,
+        [edge[0] for edge in edges],
+        [edge[1] for edge in edges],
+        [edge[2] for edge in edges]]
+    sections = list(pack_symbols(symbols))
+    sections += [_int_array(items).tobytes() for items in arrays]
+    start = automata.start_state
+    write(path, kind, [0 if start is None else 1, start or 0], sections)
+
+
+def load_automata(cls, path, kind: int = KIND_AUTOMATA,
+                  use_mmap: bool = True):
+    """read an automata written by :func:`dump_automata`
+    into a :class:`regex_parser.compact.CompactAutomata`,
+    the edge arrays are views of the file
+
+    :param cls: the class of the result, a subclass of
+        :class:`regex_parser.compact.CompactAutomata`
+    :type cls: type
+    :param path: the path of the file
+    :param kind: :data:`KIND_AUTOMATA` or :data:`KIND_DFA`
+    :type kind: int,optional
+    :param use_mmap: map the file instead of reading it
+    :type use_mmap: bool,optional
+    :return: the automata
+    """
+    (has_start, start), sections = read(path, kind, use_mmap)
+    symbols = unpack_symbols(sections[0], sections[1])
+    states, finals, alphabet, rows, offsets, sources, labels, targets = \
+        (_cast(section, 'i') for section in sections[2:])
+    automata = cls(set(symbols[i] for i in alphabet))
+    automata.states = set(states)
+    automata.final_states = set(finals)
+    automata.start_state = start if has_start else None
+    for symbol in symbols:
+        automata.symbol_id(symbol)
+    automata._sources, automata._labels, automata._targets = \
+        sources, labels, targets
+    automata._rows, automata._offsets = rows, offsets
+    return automata
+
+
+def dump_compiled(compiled, path) -> None:
+    """write a :class:`regex_parser.compiled.CompiledDFA`
+
+    :param compiled: the compiled DFA
+    :type compiled: regex_parser.compiled.CompiledDFA
+    :param path: the path of the file
+    """
+    sections = list(pack_symbols(compiled.symbols)) + [
+        _int_array(compiled.state_ids).tobytes(),
+        _int_array(compiled.table).tobytes(),
+        bytes(compiled.accepting)]
+    write(path, KIND_COMPILED, [compiled.width], sections)
+
+
+def load_compiled(cls, path, use_mmap: bool = True):
+    """read a compiled DFA written by :func:`dump_compiled`,
+    the table and the bitmap are views of the file
+
+    :param cls: the class of the result
+    :type cls: type
+    :param path: the path of the file
+    :param use_mmap: map the file instead of reading it
+    :type use_mmap: bool,optional
+    :return: the compiled DFA
+    :rtype: regex_parser.compiled.CompiledDFA
+    """
+    (width,), sections = read(path, KIND_COMPILED, use_mmap)
+    compiled = cls.__new__(cls)
+    compiled.symbols = unpack_symbols(sections[0], sections[1])
+    compiled.state_ids = _cast(sections[2], 'i')
+    compiled.table = _cast(sections[3], 'i')
+    compiled.accepting = sections[4][:(len(compiled.state_ids) + 7) // 8]
+    compiled.width = width
+    compiled._index_symbols()
+    return compiled
@@ -0,0 +1,244 @@
+"""
+filename src/stream.py
+
+match a DFA over a stream of chunks, in constant memory
+"""
+import codecs
+from array import array
+from typing import *
+from regex_parser.compiled import CompiledDFA
+
+CHUNK_SIZE = 1 << 16
+
+
+def iter_chunks(source, chunk_size: int = CHUNK_SIZE,
+                encoding: str = 'utf-8') -> Iterator[str]:
+    """cut the source into strings
+
+    the bytes are decoded incrementally, so a character may be split
+    between two chunks
+
+    :param source: a string, a bytes-like object (`bytes`, `memoryview`,
+        `mmap`), a file opened in text or binary mode,
+        or an iterable of strings or bytes-like objects
+    :param chunk_size: the size of the chunks read from a buffer or a file
+    :type chunk_size: int,optional
+    :param encoding: the encoding of the bytes
+    :type encoding: str,optional
+    :return: the chunks
+    :rtype: Iterator[str]
+    """
+    if isinstance(source, str):
+        yield source
+        return
+    if hasattr(source, 'read'):
+        parts = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        try:
+            view = memoryview(source)
+        except TypeError:
+            parts = source
+        else:
+            parts = (view[i:i + chunk_size]
+                     for i in range(0, view.nbytes, chunk_size))
+    decoder = None
+    for part in parts:
+        if isinstance(part, str):
+            yield part
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(encoding)()
+        yield decoder.decode(part)
+    if decoder is not None:
+        yield decoder.decode(b'', final=True)
+
+
+def munch(dfa: CompiledDFA, accept: array, chunks: Iterable[str],
+          search: bool = False) -> Iterator[Tuple[int, int, int, str]]:
+    """find the longest tokens of a stream
+
+    only the text from the begin of the pending token to the current
+    position is kept, chunks are joined to it when the scan
+    reaches their end, so the memory is one chunk and one token.
+    The DFA state and the last accepted end are kept between the chunks.
+
+    the pending token is only settled when the DFA stops, so a rule
+    which can match any text, like `".*"` without a closing quote,
+    keeps the rest of the stream in memory; a token is read again from
+    its end after the DFA stops, which is quadratic in the worst case,
+    as for any maximal munch.
+
+    :param dfa: the compiled DFA
+    :type dfa: CompiledDFA
+    :param accept: the tag accepted by each row of `dfa`, -1 for none
+    :type accept: array
+    :param chunks: the input
+    :type chunks: Iterable[str]
+    :param search: skip the text between the tokens instead of raising,
+        see :func:`_search`
+    :type search: bool,optional
+    :raises RuntimeError: no token at a position and `search` is False
+    :return: the tag, the begin, the end and the text of each token
+    :rtype: Iterator[Tuple[int, int, int, str]]
+    """
+    if search:
+        yield from _search(dfa, accept, chunks)
+        return
+    table, classes, width = dfa.table, dfa.classes, dfa.width
+    start = dfa.start
+    chunks = iter(chunks)
+    buffer = ''
+    offset = 0  # the position of buffer[0] in the stream
+    begin = i = 0  # the begin of the token and the next symbol in buffer
+    state = start
+    tag, end = accept[state], begin
+    while True:
+        if i == len(buffer):
+            chunk = next(chunks, None)
+            if chunk is not None:
+                # drop the settled text
+                buffer = buffer[begin:] + chunk
+                offset += begin
+                i -= begin
+                end -= begin
+                begin = 0
+                continue
+            if begin == len(buffer):
+                return
+            # the end of the input settles the token
+        else:
+            column = classes.get(buffer[i])
+            if column is None:
+                column = dfa.column(buffer[i])
+            state = table[state * width + column] if column >= 0 else -1
+            if state >= 0:
+                i += 1
+                if accept[state] >= 0:
+                    tag, end = accept[state], i
+                continue
+
+        if tag >= 0 and end > begin:
+            yield tag, offset + begin, offset + end, buffer[begin:end]
+            begin = end
+        else:
+            raise RuntimeError(f"unexpected {buffer[begin]} "
+                               f"at position {offset + begin}")
+        i = begin
+        state = start
+        tag, end = accept[state], begin
+
+
+def _search(dfa: CompiledDFA, accept: array, chunks: Iterable[str]
+            ) -> Iterator[Tuple[int, int, int, str]]:
+    """find the non-empty, non-overlapping leftmost longest tokens of
+    a stream, in one scan as :meth:`CompiledDFA.search` does.
+
+    a thread `(begin, state)` begins at each position until a token
+    is found, the threads are kept in the order of their begin and
+    a state held by an earlier thread is dropped from the later ones,
+    so a failed begin is never read again. the kept text begins at
+    the oldest thread or the found token, when no thread is alive
+    the text is dropped. a token is settled when its threads stop,
+    the scan goes on from its end, so only the text read past the end
+    of a token by its longer threads is read again.
+
+    :param dfa: the compiled DFA
+    :type dfa: CompiledDFA
+    :param accept: the tag accepted by each row of `dfa`, -1 for none
+    :type accept: array
+    :param chunks: the input
+    :type chunks: Iterable[str]
+    :return: the tag, the begin, the end and the text of each token
+    :rtype: Iterator[Tuple[int, int, int, str]]
+    """
+    table, classes, width = dfa.table, dfa.classes, dfa.width
+    start = dfa.start
+    chunks = iter(chunks)
+    buffer = ''
+    offset = 0  # the position of buffer[0] in the stream
+    i = 0  # the next symbol in buffer
+    threads = []  # (begin in buffer, state), in the order of begin
+    best = None  # (tag, begin, end) of the token found
+    while True:
+        if i == len(buffer):
+            chunk = next(chunks, None)
+            if chunk is not None:
+                # drop the text before the pending token
+                keep = best[1] if best is not None \
+                    else threads[0][0] if threads else i
+                buffer = buffer[keep:] + chunk
+                offset += keep
+                i -= keep
+                threads = [(begin - keep, state) for begin, state in threads]
+                if best is not None:
+                    best = (best[0], best[1] - keep, best[2] - keep)
+                continue
+            # the end of the input settles the token
+            if best is None:
+                return
+            threads = []
+        else:
+            if best is None:
+                threads.append((i, start))
+            column = classes.get(buffer[i])
+            if column is None:
+                column = dfa.column(buffer[i])
+            moved = []
+            if column >= 0:
+                claimed = set()
+                for begin, state in threads:
+                    target = table[state * width + column]
+                    if target < 0 or target in claimed:
+                        continue
+                    claimed.add(target)
+                    moved.append((begin, target))
+                    if accept[target] >= 0 and \
+                            (best is None or begin <= best[1]):
+                        best = (accept[target], begin, i + 1)
+            if best is not None:
+                moved = [thread for thread in moved if thread[0] <= best[1]]
+            threads = moved
+            i += 1
+            if threads or best is None:
+                continue
+
+        tag, begin, end = best
+        yield tag, offset + begin, offset + end, buffer[begin:end]
+        i = end
+        best = None
+
+
+def finditer(dfa, source, chunk_size: int = CHUNK_SIZE,
+             encoding: str = 'utf-8') -> Iterator[Tuple[int, int, str]]:
+    """find the non-empty, non-overlapping leftmost longest matches
+    in a stream
+
+    .. code-block:: python
+
+        with open('big.log', 'rb') as file, \\
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for begin, end, text in finditer(dfa, data):
+                ...
+
+    the memory is one chunk and the text of the pending match, a pattern
+    like `a.*b` keeps the text from an `a` until the end of the stream if
+    no `b` follows it.
+
+    :param dfa: the DFA
+    :type dfa: CompiledDFA or regex_parser.dfa.DFA
+    :param source: the input, see :func:`iter_chunks`
+    :param chunk_size: the size of the chunks read from a buffer or a file
+    :type chunk_size: int,optional
+    :param encoding: the encoding of the bytes
+    :type encoding: str,optional
+    :return: the begin, the end and the text of each match,
+        the positions count characters from the begin of the stream
+    :rtype: Iterator[Tuple[int, int, str]]
+    """
+    if not isinstance(dfa, CompiledDFA):
+        dfa = dfa.compile()
+    accept = array('i', (0 if dfa.is_accepting(row) else -1
+                         for row in range(len(dfa))))
+    chunks = iter_chunks(source, chunk_size, encoding)
+    for _, begin, end, text in munch(dfa, accept, chunks, search=True):
+        yield begin, end, text
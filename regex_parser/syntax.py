@@ -0,0 +1,154 @@
+"""
+filename src/syntax.py
+
+the syntax tree of a pattern
+"""
+from typing import *
+from regex_parser.charclass import CharClass
+from regex_parser.RegexParser import RegexParser
+
+
+class Empty(NamedTuple):
+    r"""the empty string :math:`\epsilon`"""
+
+
+class Symbol(NamedTuple):
+    """a single symbol
+
+    :ivar symbols: the symbols it matches, strings or :class:`CharClass`
+    """
+    symbols: FrozenSet
+
+
+class Star(NamedTuple):
+    """`s*`"""
+    child: Any
+
+
+class Plus(NamedTuple):
+    """`s+`"""
+    child: Any
+
+
+class Maybe(NamedTuple):
+    """`s?`"""
+    child: Any
+
+
+class Concat(NamedTuple):
+    """`st`"""
+    left: Any
+    right: Any
+
+
+class Choice(NamedTuple):
+    """`s|t`"""
+    left: Any
+    right: Any
+
+
+class SyntaxBuilder:
+    r"""build the syntax tree of a pattern.
+
+    the methods have the same names as the static methods of
+    :class:`regex_parser.Automata.Automata`, so it can be given to
+    :class:`regex_parser.RegexParser.RegexParser` as the `builder`,
+    they return the nodes :class:`Empty`, :class:`Symbol`, :class:`Star`,
+    :class:`Plus`, :class:`Maybe`, :class:`Concat` and :class:`Choice`.
+    The nodes are tuples, so equal trees are equal and hashable.
+
+    .. code-block:: python
+
+        tree = RegexParser('(a|b)*abb', builder=SyntaxBuilder()).parse()
+        nfa = fold(tree, NFABuilder())
+    """
+
+    def empty_construct(self) -> Empty:
+        """the node of the empty string"""
+        return Empty()
+
+    def basic_construct(self, symbol) -> Symbol:
+        """the node of a symbol, a string, a :class:`CharClass` or a set"""
+        if isinstance(symbol, (str, CharClass)):
+            symbol = set([symbol])
+        return Symbol(frozenset(symbol))
+
+    def star_operation(self, child) -> Star:
+        """the node of `s*`"""
+        return Star(child)
+
+    def plus_operation(self, child) -> Plus:
+        """the node of `s+`"""
+        return Plus(child)
+
+    def optional_operation(self, child) -> Maybe:
+        """the node of `s?`"""
+        return Maybe(child)
+
+    def concatenation(self, base, addition) -> Concat:
+        """the node of `st`"""
+        return Concat(base, addition)
+
+    def union(self, basic, parallel) -> Choice:
+        """the node of `s|t`"""
+        return Choice(basic, parallel)
+
+    def finish(self, tree):
+        """the tree is the result"""
+        return tree
+
+
+def parse(pattern: str):
+    """parse the pattern into a syntax tree
+
+    :param pattern: the pattern
+    :type pattern: str
+    :raises RuntimeError: the pattern is wrong
+    :return: the root of the tree
+    """
+    return RegexParser(pattern, builder=SyntaxBuilder()).parse()
+
+
+def fold(tree, builder, finish: bool = True):
+    """give the tree to another builder, from the leaves to the root,
+    the same as parsing the pattern again with the builder.
+    the tree is walked without recursion, so deep trees are fine
+
+    :param tree: the root of the tree
+    :param builder: the builder, for example
+        :class:`regex_parser.builder.NFABuilder`
+    :param finish: call the `finish` method of the builder, if it has one
+    :type finish: bool,optional
+    :return: what the builder gives for the root
+    """
+    results = []
+    stack = [(tree, False)]
+    while stack:
+        node, visited = stack.pop()
+        if isinstance(node, Empty):
+            results.append(builder.empty_construct())
+        elif isinstance(node, Symbol):
+            symbols = set(node.symbols)
+            if len(symbols) == 1:
+                symbols, = symbols
+            results.append(builder.basic_construct(symbols))
+        elif not visited:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node))
+        elif isinstance(node, (Star, Plus, Maybe)):
+            child = results.pop()
+            results.append({
+                Star: builder.star_operation,
+                Plus: builder.plus_operation,
+                Maybe: builder.optional_operation,
+            }[type(node)](child))
+        else:
+            right = results.pop()
+            left = results.pop()
+            operation = builder.concatenation if isinstance(node, Concat) \
+                else builder.union
+            results.append(operation(left, right))
+    result, = results
+    if finish and hasattr(builder, 'finish'):
+        return builder.finish(result)
+    return result
@@ -0,0 +1,220 @@
+"""
+filename src/utf8.py
+
+lower the characters of a pattern to UTF-8 bytes, and match bytes
+"""
+from array import array
+from typing import *
+from regex_parser.charclass import CharClass
+from regex_parser.compiled import CompiledDFA
+
+SURROGATES = CharClass([(0xD800, 0xDFFF)])
+"""the code points which have no UTF-8 encoding"""
+
+# the last code point encoded in 1, 2, 3 and 4 bytes
+_LENGTH_ENDS = (0x7F, 0x7FF, 0xFFFF, 0x10FFFF)
+
+
+def _split(low: int, high: int) -> Iterator[Tuple[int, int]]:
+    """split an interval of code points, so in each part, the lowest
+    and the highest code points have the same length and differ only
+    in the bytes where one has all its bits 0 and the other all 1"""
+    begin = 0
+    for end in _LENGTH_ENDS:
+        # the interval of the code points of one length
+        if low <= end and high >= begin:
+            yield from _align(max(low, begin), min(high, end))
+        begin = end + 1
+
+
+def _align(low: int, high: int) -> Iterator[Tuple[int, int]]:
+    """split an interval of code points of the same length"""
+    for i in range(1, 4):
+        mask = (1 << 6 * i) - 1
+        if low & ~mask != high & ~mask:
+            if low & mask:
+                yield from _align(low, low | mask)
+                yield from _align((low | mask) + 1, high)
+                return
+            if high & mask != mask:
+                yield from _align(low, (high & ~mask) - 1)
+                yield from _align(high & ~mask, high)
+                return
+    yield low, high
+
+
+def utf8_sequences(cls: CharClass) -> List[Tuple[Tuple[int, int], ...]]:
+    """the UTF-8 encodings of a class of characters, as sequences of
+    ranges of bytes, the surrogates are left out.
+
+    for example `[\\x{80}-\\x{10ffff}]` is
+    `((c2-df)(80-bf))`, `((e0-ef)(80-bf)(80-bf))`,
+    `((f0-f4)(80-bf)(80-bf)(80-bf))` and a few more
+
+    :param cls: the class
+    :type cls: CharClass
+    :return: the sequences, a byte string is matched by the class when
+        its bytes are in the ranges of one of them
+    :rtype: List[Tuple[Tuple[int, int], ...]]
+    """
+    sequences = []
+    for low, high in (cls - SURROGATES).intervals:
+        for begin, end in _split(low, high):
+            lows = chr(begin).encode('utf-8')
+            highs = chr(end).encode('utf-8')
+            sequences.append(tuple(zip(lows, highs)))
+    return sequences
+
+
+class ByteBuilder:
+    r"""build a pattern over the bytes of its UTF-8 encoding.
+
+    it wraps another builder, every character and class given to
+    :meth:`basic_construct` becomes the byte sequences of
+    :func:`utf8_sequences`, a byte `b` is the symbol `chr(b)`, a range of
+    bytes is a :class:`CharClass` in `[\x00-\xff]`, so the automata
+    have at most 256 symbols whatever the classes of the pattern.
+    the other methods are passed to the wrapped builder.
+
+    .. code-block:: python
+
+        builder = ByteBuilder(NFABuilder())
+        nfa = RegexParser('[α-ω]+', builder=builder).build_NFA()
+        ByteDFA(DFA(nfa)).fullmatch('αβγ'.encode())
+
+    :param builder: the wrapped builder
+    """
+
+    def __init__(self, builder):
+        self.builder = builder
+
+    def __getattr__(self, name: str):
+        return getattr(self.builder, name)
+
+    def _range(self, low: int, high: int):
+        """the part of a range of bytes"""
+        if low == high:
+            return self.builder.basic_construct(chr(low))
+        return self.builder.basic_construct(CharClass([(low, high)]))
+
+    def basic_construct(self, symbol):
+        """the part of the UTF-8 encodings of a symbol
+
+        :param symbol: the symbol
+        :type symbol: Set[str] or str or CharClass
+        :return: what the wrapped builder gives
+        """
+        if isinstance(symbol, (str, CharClass)):
+            symbol = set([symbol])
+        intervals = []
+        for label in symbol:
+            if isinstance(label, CharClass):
+                intervals.extend(label.intervals)
+            else:
+                intervals.extend((ord(char), ord(char)) for char in label)
+        sequences = utf8_sequences(CharClass(intervals))
+        if not sequences:
+            return self.builder.basic_construct(set())
+        result = None
+        for sequence in sequences:
+            part = None
+            for low, high in sequence:
+                byte = self._range(low, high)
+                part = byte if part is None \
+                    else self.builder.concatenation(part, byte)
+            result = part if result is None \
+                else self.builder.union(result, part)
+        return result
+
+
+class ByteDFA(CompiledDFA):
+    r"""a :class:`CompiledDFA` matching `bytes`.
+
+    the DFA should be built by :class:`ByteBuilder`, its symbols are
+    bytes, the column of each byte is looked up in a table of 256 entries,
+    so `bytes`, `bytearray`, `memoryview` and `mmap` are matched
+    without decoding. The positions are byte offsets.
+
+    .. code-block:: python
+
+        compiled = regex_parser.compile('[α-ω]+', utf8=True)
+        compiled.search('abc αβγ'.encode())  # (4, 10)
+
+    :param dfa: the DFA to compile
+    :type dfa: regex_parser.dfa.DFA
+
+    :ivar self.byte_columns: the column of each byte, -1 for no column
+    :vartype self.byte_columns: array
+    """
+
+    def _index_symbols(self) -> None:
+        """build the columns of the symbols and of the bytes"""
+        super()._index_symbols()
+        self.byte_columns = array('i', (self.column(chr(byte))
+                                        for byte in range(256)))
+
+    def fullmatch(self, data) -> bool:
+        """check whether all the bytes are accepted
+
+        :param data: the input bytes
+        :type data: bytes-like
+        :return: whether the DFA accept the bytes
+        :rtype: bool
+        """
+        table, columns, width = self.table, self.byte_columns, self.width
+        state = self.start
+        for byte in memoryview(data).cast('B'):
+            column = columns[byte]
+            if column < 0:
+                return False
+            state = table[state * width + column]
+            if state < 0:
+                return False
+        return self.is_accepting(state)
+
+    def match(self, data, begin: int = 0) -> Optional[int]:
+        """find the longest accepted bytes beginning at `begin`
+
+        :param data: the input bytes
+        :type data: bytes-like
+        :param begin: the begin offset
+        :type begin: int
+        :return: the end of the longest match, None if there is no match
+        :rtype: Optional[int]
+        """
+        table, columns, width = self.table, self.byte_columns, self.width
+        accepting = self.accepting
+        state = self.start
+        end = begin if self.is_accepting(state) else None
+        data = memoryview(data).cast('B')
+        for i in range(begin, len(data)):
+            column = columns[data[i]]
+            if column < 0:
+                break
+            state = table[state * width + column]
+            if state < 0:
+                break
+            if accepting[state >> 3] >> (state & 7) & 1:
+                end = i + 1
+        return end
+
+    def search(self, data) -> Optional[Tuple[int, int]]:
+        """find the leftmost longest accepted bytes by one scan,
+        see :meth:`CompiledDFA._search`, only the candidates of
+        `self.prefilter` begin a match if it is set and the input has
+        a `find` method
+
+        :param data: the input bytes
+        :type data: bytes-like
+        :return: the span `(begin, end)` of the match,
+            None if there is no match
+        :rtype: Optional[Tuple[int, int]]
+        """
+        if self.is_accepting(self.start):
+            return (0, self.match(data))
+        view = memoryview(data).cast('B')
+        begins = None
+        if self.prefilter is not None and hasattr(data, 'find'):
+            begins = self.prefilter.candidates(data)
+        columns = self.byte_columns
+        return self._search(len(view), lambda i: columns[view[i]], begins)
@@ -124,3 +124,46 @@ def test_move(nfa):
     moved = nfa.move([1],'a')
     expect = set([1,2,3,4,6])
     assert moved == expect
+
+def test_e_closure_chain():
+    nfa = Automata()
+    nfa.set_start_state(1)
+    nfa.add_transition(1, 2, set([r'\epsilon']))
+    nfa.add_transition(2, 3, set([r'\epsilon']))
+    nfa.add_transition(3, 1, set([r'\epsilon']))
+    nfa.add_transition(3, 4, set(['a']))
+    assert nfa.e_closure(1) == set([1, 2, 3])
+
+def test_precompute_closures():
+    nfa = RegexParser('(a|b)*abb').parse_regex()
+    expect = {state: nfa.e_closure(state) for state in nfa.states}
+    moves = {state: nfa.move([state], 'a') for state in nfa.states}
+    nfa.precompute_closures()
+    for state in nfa.states:
+        assert nfa.e_closure(state) == expect[state]
+        assert nfa.move([state], 'a') == moves[state]
+    assert nfa.e_closure(nfa.states) == set(nfa.states)
+    # a new edge drops the table
+    nfa.add_transition(1, 2, set(['a']))
+    assert nfa.closures is None
+
+def test_fullmatch():
+    nfa = RegexParser('(a|b)*abb').parse_regex()
+    assert nfa.fullmatch('abb')
+    assert nfa.fullmatch('babaabb')
+    assert not nfa.fullmatch('ab')
+    assert not nfa.fullmatch('abbc')
+
+def test_match():
+    nfa = RegexParser('(a|b)*abb').parse_regex()
+    assert nfa.match('abbabbc') == 6
+    assert nfa.match('ba') is None
+    assert RegexParser('a*').parse_regex().match('b') == 0
+
+def test_search():
+    nfa = RegexParser('(a|b)*abb').parse_regex()
+    assert nfa.search('ccabbabbc') == (2, 8)
+    assert nfa.search('cab') is None
+    # the leftmost match wins over a longer one on the right
+    nfa = RegexParser('ab|bccc').parse_regex()
+    assert nfa.search('abccc') == (0, 2)
@@ -0,0 +1,29 @@
+import random
+import pytest
+import regex_parser
+from regex_parser.batch import match_many
+
+
+def test_match_many():
+    compiled = regex_parser.compile('[a-c]+d?')
+    random.seed(18)
+    lines = [''.join(random.choice('abcdx') for _ in range(random.randrange(8)))
+             for _ in range(500)]
+    for mode in ('fullmatch', 'match', 'search'):
+        results = list(match_many(compiled, iter(lines), mode, workers=2,
+                                  chunk_size=16))
+        assert results == [getattr(compiled, mode)(line) for line in lines]
+
+
+def test_file(tmp_path):
+    path = tmp_path / 'lines.txt'
+    path.write_text('ab\nxy\r\nabcd\n')
+    compiled = regex_parser.compile('[a-c]+d?')
+    assert list(match_many(compiled, path, workers=1)) == [True, False, True]
+    assert list(match_many(compiled, str(path), 'search', workers=1)) == \
+        [(0, 2), None, (0, 4)]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        list(match_many(regex_parser.compile('a'), ['a'], 'scan'))
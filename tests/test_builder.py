@@ -0,0 +1,65 @@
+from regex_parser.Automata import Automata
+from regex_parser.RegexParser import RegexParser
+from regex_parser.builder import NFABuilder, Fragment
+from regex_parser.compact import CompactAutomata
+from regex_parser.dfa import DFA
+
+
+def test_basic():
+    builder = NFABuilder()
+    fragment = builder.basic_construct('a')
+    assert fragment == Fragment(1, 2)
+    nfa = builder.finish(fragment)
+    assert nfa.transitions == {1: {2: {'a'}}}
+    assert nfa.input_alphabet == set(['a'])
+    assert nfa.final_states == set([2])
+
+
+def test_union():
+    nfa = RegexParser('a|b', builder=NFABuilder()).build_NFA()
+    expect = {
+        1: {2: {'\\epsilon'}},
+        2: {3: {'\\epsilon'}},
+        3: {4: {'a'}},
+        5: {6: {'\\epsilon'}},
+        6: {7: {'\\epsilon'}},
+        7: {8: {'b'}},
+        9: {1: {'\\epsilon'}, 5: {'\\epsilon'}},
+        4: {10: {'\\epsilon'}},
+        8: {10: {'\\epsilon'}},
+    }
+    assert nfa.transitions == expect
+    assert nfa.start_state == 9
+    assert nfa.final_states == set([10])
+
+
+def test_same_dfa():
+    for builder in (NFABuilder(), NFABuilder(CompactAutomata)):
+        nfa = RegexParser('(a|b)*abb', builder=builder).build_NFA()
+        dfa = DFA(nfa)
+        expect = {
+            1: {2: {'a'}, 3: {'b'}},
+            2: {2: {'a'}, 4: {'b'}},
+            3: {2: {'a'}, 3: {'b'}},
+            4: {2: {'a'}, 5: {'b'}},
+            5: {2: {'a'}, 3: {'b'}},
+        }
+        assert dfa.transitions == expect
+        assert dfa.final_states == set([5])
+
+
+def test_long_pattern(monkeypatch):
+    renames = []
+    monkeypatch.setattr(Automata, 'rename',
+                        lambda self, offset: renames.append(offset))
+    sizes = []
+    for n in (2000, 4000, 6000):
+        pattern = '|'.join('ab' for _ in range(n))
+        # build_NFA uses a new NFABuilder when no builder is given
+        nfa = RegexParser(pattern).build_NFA()
+        edges = sum(len(to_states) for to_states in nfa.transitions.values())
+        sizes.append((len(nfa.states), edges))
+    # no state is renamed, and each 'ab|' adds the same states and edges
+    assert not renames
+    assert sizes[2][0] - sizes[1][0] == sizes[1][0] - sizes[0][0]
+    assert sizes[2][1] - sizes[1][1] == sizes[1][1] - sizes[0][1]
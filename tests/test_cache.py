@@ -0,0 +1,69 @@
+import os
+import pytest
+import regex_parser
+from regex_parser import serial
+from regex_parser.cache import build, cache_key
+
+
+def test_compile():
+    compiled = regex_parser.compile('(a|b)*abb')
+    assert compiled.fullmatch('babb')
+    assert regex_parser.compile('(a|b)*abb') is compiled
+    assert regex_parser.compile('(a|b)*abb', minimize=False) is not compiled
+    regex_parser.purge()
+    assert regex_parser.compile('(a|b)*abb') is not compiled
+
+
+def test_disk_cache(tmp_path):
+    compiled = regex_parser.compile('ab*', cache_dir=tmp_path)
+    path = os.path.join(tmp_path, cache_key('ab*') + '.rxp')
+    assert os.path.exists(path)
+    regex_parser.purge()
+    loaded = regex_parser.compile('ab*', cache_dir=tmp_path)
+    assert loaded is not compiled
+    # the table is a view of the file, the prefilter is made again
+    assert isinstance(loaded.table, memoryview)
+    assert list(loaded.table) == list(compiled.table)
+    assert loaded.fullmatch('abbb')
+    assert repr(loaded.prefilter) == repr(compiled.prefilter)
+    regex_parser.purge()
+    loaded = regex_parser.compile('[α-ω]b', cache_dir=tmp_path, utf8=True)
+    regex_parser.purge()
+    loaded = regex_parser.compile('[α-ω]b', cache_dir=tmp_path, utf8=True)
+    assert loaded.search('xβb'.encode()) == (1, 4)
+
+
+def test_broken_file(tmp_path):
+    path = os.path.join(tmp_path, cache_key('a|b') + '.rxp')
+    with open(path, 'wb') as f:
+        f.write(b'broken')
+    assert regex_parser.compile('a|b', cache_dir=tmp_path).fullmatch('b')
+
+
+def test_old_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(serial, 'VERSION', serial.VERSION - 1)
+    regex_parser.compile('a|b', cache_dir=tmp_path)
+    monkeypatch.undo()
+    regex_parser.purge()
+    # the file of another version is a miss and is written again
+    compiled = regex_parser.compile('a|b', cache_dir=tmp_path)
+    assert compiled.search('xb') == (1, 2)
+    regex_parser.purge()
+    assert isinstance(regex_parser.compile('a|b', cache_dir=tmp_path).table,
+                      memoryview)
+
+
+def test_unsafe_directory(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    with pytest.raises(PermissionError):
+        regex_parser.compile('ab', cache_dir=shared)
+    private = tmp_path / 'private'
+    regex_parser.compile('ab', cache_dir=private)
+    assert os.stat(private).st_mode & 0o777 == 0o700
+
+
+def test_key():
+    assert cache_key('a') != cache_key('b')
+    assert cache_key('a') != cache_key('a', minimize=False)
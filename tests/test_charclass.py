@@ -0,0 +1,42 @@
+from regex_parser.charclass import CharClass, partition, equivalence_classes, \
+    MAX_CODE_POINT
+
+
+def test_intervals():
+    cls = CharClass([(ord('d'), ord('f')), (ord('a'), ord('c')), (48, 57)])
+    assert cls.intervals == ((48, 57), (97, 102))
+    assert 'e' in cls
+    assert '5' in cls
+    assert 'g' not in cls
+    assert 'ab' not in cls
+    assert len(cls) == 16
+    assert repr(cls) == '[0-9a-f]'
+    assert cls == CharClass.from_range('0', '9') | CharClass.from_range('a', 'f')
+
+
+def test_operations():
+    letters = CharClass.from_range('a', 'z')
+    vowels = CharClass.from_chars('aeiou')
+    assert 'b' in letters - vowels
+    assert 'a' not in letters - vowels
+    assert letters & vowels == vowels
+    assert (~letters).intervals == ((0, 96), (123, MAX_CODE_POINT))
+    assert ~~letters == letters
+
+
+def test_partition():
+    atoms = partition(['x', CharClass.from_range('a', 'z'), 'id'])
+    assert atoms == ['id', 'x', CharClass.from_range('a', 'w'),
+                     CharClass.from_range('y', 'z')]
+    assert partition(['a', 'b']) == ['a', 'b']
+
+
+def test_equivalence_classes():
+    letters = CharClass.from_range('a', 'z')
+    classes = equivalence_classes(['x', letters, 'id'])
+    assert classes == ['id', 'x', letters - CharClass.from_chars('x')]
+    assert equivalence_classes(['a', 'b']) == ['a', 'b']
+    # the atoms around 'm' are in the same symbols
+    classes = equivalence_classes(['m', letters, CharClass.from_range('k', 'p')])
+    assert classes == ['m', CharClass([(97, 106), (113, 122)]),
+                       CharClass([(107, 108), (110, 112)])]
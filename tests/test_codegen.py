@@ -0,0 +1,77 @@
+import os
+import random
+import pytest
+import re
+import subprocess
+import sys
+import regex_parser
+from regex_parser.codegen import TEMPLATE_VERSION, generate, load
+from regex_parser.cache import cache_key
+
+
+def test_load(tmp_path):
+    module = load('(a|b)*abb', cache_dir=tmp_path)
+    assert module.PATTERN == '(a|b)*abb'
+    assert module.fullmatch('babb')
+    assert not module.fullmatch('bab')
+    assert module.match('abbb') == 3
+    assert module.search('xxabbx') == (2, 5)
+    assert load('(a|b)*abb', cache_dir=tmp_path) is module
+    name = f"matcher_v{TEMPLATE_VERSION}_{cache_key('(a|b)*abb')}.py"
+    assert os.path.exists(os.path.join(tmp_path, name))
+
+
+def test_unsafe_directory(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    with pytest.raises(PermissionError):
+        load('ab', cache_dir=shared)
+    private = tmp_path / 'private'
+    load('ab', cache_dir=private)
+    assert os.stat(private).st_mode & 0o777 == 0o700
+
+
+def test_standalone(tmp_path):
+    compiled = regex_parser.compile('[a-z]+[0-9]?')
+    path = tmp_path / 'word.py'
+    path.write_text(generate(compiled))
+    # no regex_parser, matplotlib or IPython is imported
+    code = ("import sys, word\n"
+            "assert word.search('  abc1 ') == (2, 6)\n"
+            "assert not {'regex_parser', 'matplotlib', 'IPython'}"
+            " & set(sys.modules)\n")
+    subprocess.run([sys.executable, '-S', '-c', code], cwd=tmp_path,
+                   check=True)
+
+
+def test_random(tmp_path):
+    random.seed(17)
+    for pattern in ['a?b+|c*', '(ab|b)*a?', '[a-c]{1,3}b?', '[^a]b|a{2,}']:
+        module = load(pattern, cache_dir=tmp_path)
+        compiled = regex_parser.compile(pattern)
+        for _ in range(200):
+            text = ''.join(random.choice('abcd')
+                           for _ in range(random.randrange(7)))
+            assert module.fullmatch(text) == \
+                bool(re.fullmatch(pattern, text)), (pattern, text)
+            assert module.search(text) == compiled.search(text)
+
+
+class Counted(dict):
+    """a row of `_NEXT` counting its reads"""
+    reads = 0
+
+    def get(self, char):
+        Counted.reads += 1
+        return super().get(char)
+
+
+def test_search_one_scan(tmp_path):
+    module = load('a*b', cache_dir=tmp_path)
+    module._NEXT = tuple(Counted(row) for row in module._NEXT)
+    text = 'a' * 2000
+    assert module.search(text) is None
+    # a begin whose state is held by an earlier thread is dropped
+    assert Counted.reads < 4 * len(text)
+    assert module.search('c' + 'a' * 50 + 'b') == (1, 52)
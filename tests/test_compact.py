@@ -0,0 +1,68 @@
+from regex_parser.Automata import Automata
+from regex_parser.compact import CompactAutomata
+
+
+def test_same_transitions():
+    test = CompactAutomata(set('ab'))
+    test.set_start_state(1)
+    test.add_final_states(2)
+    test.add_transition(1, 2, set(['a', 'b']))
+    test.add_transition(1, 1, set('b'))
+    test.add_transition(1, 2, set('a'))
+    expect = {1: {2: {'a', 'b'}, 1: {'b'}}}
+    assert test.transitions == expect
+    assert sorted(test.successors(1, 'b')) == [1, 2]
+    assert test.successors(2, 'a') == []
+    assert test.successors(1, 'c') == []
+
+
+def test_union_like_automata():
+    test1 = Automata.union(Automata.basic_construct('a'),
+                           Automata.basic_construct('b'))
+    test2 = CompactAutomata.union(CompactAutomata.basic_construct('a'),
+                                  CompactAutomata.basic_construct('b'))
+    assert isinstance(test2, CompactAutomata)
+    assert test2.transitions == test1.transitions
+    assert test2.states == test1.states
+    assert test2.final_states == test1.final_states
+    assert test2.move([1], 'a') == test1.move([1], 'a')
+
+
+def test_from_automata():
+    nfa = Automata.star_operation(Automata.basic_construct('a'))
+    compact = CompactAutomata.from_automata(nfa)
+    assert compact.transitions == nfa.transitions
+    assert compact.e_closure(2) == nfa.e_closure(2)
+
+
+def test_class_successors():
+    from regex_parser.charclass import CharClass
+    test = CompactAutomata()
+    test.set_start_state(1)
+    test.add_transition(1, 2, set([CharClass([(ord('a'), ord('m'))])]))
+    test.add_transition(1, 3, set([CharClass([(ord('f'), ord('z'))])]))
+    test.add_transition(1, 4, set('g'))
+    assert sorted(test.successors(1, 'b')) == [2]
+    assert sorted(test.successors(1, 'g')) == [2, 3, 4]
+    assert sorted(test.successors(1, 'x')) == [3]
+    assert test.successors(1, '0') == []
+    # a new class is indexed on the next lookup
+    test.add_transition(1, 5, set([CharClass([(ord('0'), ord('9'))])]))
+    assert test.successors(1, '0') == [5]
+    assert test.successors(1, 'ab') == []
+
+
+def test_index_order():
+    test = CompactAutomata()
+    test.set_start_state(5)
+    # added out of order, with a repeated edge
+    edges = [(9, 2, 'b'), (5, 9, 'b'), (9, 1, 'a'),
+             (5, 7, 'a'), (5, 9, 'b'), (0, 5, 'a')]
+    for from_state, to_state, symbol in edges:
+        test.add_transition(from_state, to_state, set(symbol))
+    test.build_index()
+    assert list(test._rows) == [0, 5, 9]
+    assert list(test._offsets) == [0, 1, 3, 5]
+    # by symbol id, 'b' is 0 and 'a' is 1
+    assert list(test._targets) == [5, 9, 7, 2, 1]
+    assert sorted(test.successors(5, 'b')) == [9]
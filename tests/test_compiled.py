@@ -0,0 +1,62 @@
+import random
+import regex_parser
+from regex_parser.RegexParser import RegexParser
+from regex_parser.builder import NFABuilder
+from regex_parser.dfa import DFA
+
+
+def compiled(pattern):
+    nfa = RegexParser(pattern, builder=NFABuilder()).build_NFA()
+    return DFA(nfa).minimize()[0].compile()
+
+
+def test_table():
+    dfa = compiled('(a|b)*abb')
+    assert len(dfa) == 4
+    assert dfa.symbols == ['a', 'b']
+    assert list(dfa.table) == [1, 0, 1, 2, 1, 3, 1, 0]
+    assert [dfa.is_accepting(i) for i in range(4)] == \
+        [False, False, False, True]
+    assert dfa.step(0, 'c') == -1
+
+
+def test_fullmatch():
+    dfa = compiled('(a|b)*abb')
+    assert dfa.fullmatch('abb')
+    assert dfa.fullmatch('aababb')
+    assert not dfa.fullmatch('abba')
+    assert not dfa.fullmatch('abc')
+
+
+def test_match_and_search():
+    dfa = compiled('(a|b)*abb')
+    assert dfa.match('abbabbc') == 6
+    assert dfa.match('c') is None
+    assert dfa.search('ccabbabbc') == (2, 8)
+    assert dfa.search('cab') is None
+    assert compiled('c*').search('ab') == (0, 0)
+
+
+def test_class_columns():
+    dfa = compiled('x[a-z0-9]*')
+    assert dfa.fullmatch('xq7z')
+    assert dfa.fullmatch('xx')
+    assert not dfa.fullmatch('xA')
+    assert dfa.search('ABx12 ') == (2, 5)
+
+
+def test_search_one_scan():
+    random.seed(8)
+    for pattern in ['(a|b)*abb', 'a+b?c', '(ab|a)(bc|c)', '[ab]c*a', 'ca*']:
+        for dfa in (compiled(pattern), regex_parser.compile(pattern)):
+            for _ in range(300):
+                text = ''.join(random.choice('abcx')
+                               for _ in range(random.randrange(12)))
+                # the first begin with a match
+                expect = next(((begin, dfa.match(text, begin))
+                               for begin in range(len(text))
+                               if dfa.match(text, begin) is not None), None)
+                assert dfa.search(text) == expect, (pattern, text)
+    # one match tried at each position would read n * n / 2 symbols
+    assert compiled('a*b').search('a' * 100000) is None
+    assert compiled('a*b').search('a' * 100000 + 'b') == (0, 100001)
@@ -0,0 +1,106 @@
+import random
+import re
+import regex_parser
+from regex_parser import syntax
+from regex_parser.derivative import TermTable
+
+
+def test_normalize():
+    table = TermTable()
+    a, b = table.parse('a'), table.parse('b')
+    assert (a | b) is (b | a)
+    assert (a | b | a) is (a | b)
+    assert (a | table.empty_set) is a
+    assert (a + table.epsilon) is a
+    assert (a + table.empty_set) is table.empty_set
+    assert ~~a is a
+    assert table.parse('(a*)*') is table.parse('a*')
+    assert table.parse('(ab)c') is table.parse('a(bc)')
+
+
+def test_memoized():
+    table = TermTable()
+    term = table.parse('(a|b)*abb')
+    assert term.fullmatch('aabb')
+    assert not term.fullmatch('abab')
+    terms = len(table)
+    for _ in range(10):
+        assert term.fullmatch('aabb')
+        assert not term.fullmatch('abab')
+    # no new term, every derivative is found in the cache
+    assert len(table) == terms
+
+
+def test_finite_derivatives():
+    table = TermTable()
+    term = table.parse('(a|b)*a(a|b)(a|b)')
+    random.seed(16)
+    for _ in range(100):
+        term.fullmatch(''.join(random.choice('ab') for _ in range(30)))
+    # the distinct derivatives are the states of the DFA: 2 ** 3
+    seen, todo = set([term]), [term]
+    while todo:
+        current = todo.pop()
+        for char in 'ab':
+            after = current.derivative(char)
+            if after not in seen:
+                seen.add(after)
+                todo.append(after)
+    assert len(seen) == 8
+
+
+def test_intersection_complement():
+    table = TermTable()
+    even = table.parse('((a|b)(a|b))*')
+    no_bb = ~table.parse('(a|b)*bb(a|b)*')
+    term = even & no_bb
+    random.seed(16)
+    for _ in range(300):
+        text = ''.join(random.choice('ab') for _ in range(random.randrange(8)))
+        assert term.fullmatch(text) == \
+            (len(text) % 2 == 0 and 'bb' not in text), text
+
+
+def test_random():
+    random.seed(16)
+    table = TermTable()
+    patterns = ['(a|b)*abb', 'a?b+|c*', '(ab|b)*a?', '[a-c]{1,3}b?', '()',
+                '(a*b*)*c', '[^a]b|a{2,}']
+    for pattern in patterns:
+        term = table.from_syntax(syntax.parse(pattern))
+        dfa = regex_parser.compile(pattern)
+        for _ in range(200):
+            text = ''.join(random.choice('abcd')
+                           for _ in range(random.randrange(7)))
+            assert term.fullmatch(text) == \
+                bool(re.fullmatch(pattern, text)), (pattern, text)
+            assert term.search(text) == dfa.search(text), (pattern, text)
+
+
+def test_match_search():
+    term = TermTable().parse('ab+')
+    assert term.match('abbbc') == 4
+    assert term.match('xab') is None
+    assert term.search('xxabbc') == (2, 5)
+    assert term.search('xx') is None
+
+
+def test_search_one_scan(monkeypatch):
+    from regex_parser.derivative import Term
+    calls = []
+    derivative = Term.derivative
+    monkeypatch.setattr(Term, 'derivative',
+                        lambda self, char: calls.append(char)
+                        or derivative(self, char))
+    term = TermTable().parse('a*b')
+    assert term.search('a' * 2000) is None
+    # a begin whose term is held by an earlier thread is dropped
+    assert len(calls) < 4 * 2000
+    assert term.search('c' + 'a' * 50 + 'b') == (1, 52)
+
+
+def test_deep_derivative():
+    # deeper than the recursion limit
+    term = TermTable().parse('a?' * 1500 + 'b')
+    assert term.fullmatch('aab')
+    assert not term.fullmatch('aabb')
@@ -1,5 +1,6 @@
 from regex_parser.RegexParser import RegexParser
 from regex_parser.dfa import DFA
+from regex_parser.builder import NFABuilder
 import pytest
 
 def figure_path(s):
@@ -27,4 +28,102 @@ def dfa():
 
 def test_dfa(dfa):
     assert False
-    pass
\ No newline at end of file
+    pass
+
+def test_worklist():
+    nfa = RegexParser('(a|b)*abb').parse_regex()
+    dfa = DFA(nfa)
+    # the DFA of figure 3.36 in the dragon book
+    expect = {
+        1: {2: {'a'}, 3: {'b'}},
+        2: {2: {'a'}, 4: {'b'}},
+        3: {2: {'a'}, 3: {'b'}},
+        4: {2: {'a'}, 5: {'b'}},
+        5: {2: {'a'}, 3: {'b'}},
+    }
+    assert dfa.transitions == expect
+    assert dfa.start_state == 1
+    assert dfa.final_states == set([5])
+    assert dfa.NFA_map[frozenset(nfa.e_closure(nfa.start_state))] == 1
+
+
+def test_worklist_deep():
+    # over 2 ** 9 states, far beyond the recursion limit of the old method
+    nfa = RegexParser('(a|b)*a' + '(a|b)' * 8).parse_regex()
+    dfa = DFA(nfa)
+    assert len(dfa.states) >= 2 ** 9
+
+
+def test_unknown_method():
+    nfa = RegexParser('a').parse_regex()
+    with pytest.raises(ValueError):
+        DFA(nfa, method='magic')
+    # the recursive construction built no final states, it is removed
+    with pytest.raises(ValueError):
+        DFA(nfa, method='recursive')
+
+
+def test_minimize():
+    dfa = DFA(RegexParser('(a|b)*abb').parse_regex())
+    minimal, mapping = dfa.minimize()
+    # figure 3.36 of the dragon book, A and C are merged
+    expect = {
+        1: {2: {'a'}, 1: {'b'}},
+        2: {2: {'a'}, 3: {'b'}},
+        3: {2: {'a'}, 4: {'b'}},
+        4: {2: {'a'}, 1: {'b'}},
+    }
+    assert minimal.transitions == expect
+    assert minimal.final_states == set([4])
+    assert mapping == {1: 1, 2: 2, 3: 1, 4: 3, 5: 4}
+    assert set(minimal.NFA_map.values()) == set([1, 2, 3, 4])
+
+
+def test_minimize_partial():
+    dfa = DFA()
+    dfa.set_start_state(1)
+    dfa.add_transition(1, 2, set(['a']))
+    dfa.add_transition(1, 3, set(['b']))
+    dfa.add_transition(3, 3, set(['b']))
+    dfa.add_final_states(2)
+    minimal, mapping = dfa.minimize()
+    # 3 reaches no final state, it is trimmed
+    assert 3 not in mapping
+    assert minimal.transitions == {1: {2: {'a'}}}
+    again, _ = minimal.minimize()
+    assert again.transitions == minimal.transitions
+
+
+def test_trim():
+    dfa = DFA()
+    dfa.set_start_state(1)
+    dfa.add_transition(1, 2, set(['a']))
+    dfa.add_transition(1, 3, set(['b']))
+    dfa.add_transition(3, 3, set(['a', 'b']))
+    dfa.add_transition(4, 2, set(['a']))  # unreachable
+    dfa.add_final_states(2, 4)
+    dfa.NFA_map = {frozenset([1]): 1, frozenset(): 3, frozenset([4]): 4}
+    assert dfa.useful_states() == set([1, 2])
+    assert dfa.useful_states(keep_sink=True) == set([1, 2, 3])
+    assert dfa.trim(keep_sink=True) == set([4])
+    assert dfa.final_states == set([2])
+    assert dfa.trim() == set([3])
+    assert dfa.states == set([1, 2])
+    assert dfa.transitions == {1: {2: {'a'}}}
+    assert dfa.NFA_map == {frozenset([1]): 1}
+    assert dfa.trim() == set()
+
+
+def test_equivalence_classes():
+    nfa = RegexParser('[a-z]*(x|[0-9])', builder=NFABuilder()).build_NFA()
+    dfa = DFA(nfa)
+    symbols = set()
+    for to_states in dfa.transitions.values():
+        for labels in to_states.values():
+            symbols |= labels
+    # [a-wy-z], x and [0-9], instead of [a-w], x, [y-z] and [0-9]
+    assert len(symbols) == 3
+    compiled = dfa.compile()
+    assert compiled.width == 3
+    assert compiled.fullmatch('abz7') and compiled.fullmatch('yx')
+    assert not compiled.fullmatch('ab')
@@ -0,0 +1,64 @@
+import pytest
+import regex_parser
+from regex_parser import cache
+from regex_parser.RegexParser import RegexParser
+from regex_parser.builder import NFABuilder
+from regex_parser.dfa import DFA
+from regex_parser.equivalence import equivalent
+
+
+def dfa(pattern):
+    return DFA(RegexParser(pattern, builder=NFABuilder()).build_NFA())
+
+
+@pytest.mark.parametrize('first, second', [
+    ('a|b', '[ab]'),
+    ('(a|b)*', '(a*b*)*'),
+    ('(a|b)*abb', '(a|b)*abb|abb'),
+    ('[a-z]+', '[a-m]+([n-z][a-z]*)?|[n-z][a-z]*'),
+    ('(ab)*a', 'a(ba)*'),
+])
+def test_equivalent(first, second):
+    assert equivalent(dfa(first), dfa(second))
+    assert dfa(first).equivalent(dfa(second).compile())
+    assert dfa(first).canonical_hash() == dfa(second).canonical_hash()
+
+
+@pytest.mark.parametrize('first, second', [
+    ('a|b', '[abc]'),
+    ('(a|b)*', '(a|b)+'),
+    ('(a|b)*abb', '(a|b)*ab'),
+    ('[a-z]+', '[a-y]+'),
+])
+def test_not_equivalent(first, second):
+    assert not equivalent(dfa(first), dfa(second))
+    assert not equivalent(dfa(second), dfa(first))
+    assert dfa(first).canonical_hash() != dfa(second).canonical_hash()
+
+
+def test_all_pairs():
+    patterns = ['(a|b)*', 'a*', '(ab)*', 'a*b*', '(a|b)*a', '(a*b)*a*',
+                '(b|a)*', '(a*b*)*a', 'a(ba)*b', '(ab)+']
+    dfas = [dfa(pattern) for pattern in patterns]
+    for left in dfas:
+        for right in dfas:
+            # equivalent exactly when no string tells them apart
+            assert equivalent(left, right) == (
+                left.difference(right).is_empty() and
+                right.difference(left).is_empty())
+            assert equivalent(left, right) == \
+                (left.canonical_hash() == right.canonical_hash())
+
+
+def test_shared_by_the_cache(monkeypatch):
+    regex_parser.purge()
+    built = []
+    build = cache._build
+    monkeypatch.setattr(cache, '_build',
+                        lambda *args: built.append(args) or build(*args))
+    compiled = regex_parser.compile('(a|b)*')
+    assert regex_parser.compile('(a*b*)*') is compiled
+    assert len(built) == 1  # no table or prefilter for the second one
+    assert regex_parser.compile('(a|b)*', utf8=True) is not compiled
+    assert regex_parser.compile('(a|b)+') is not compiled
+    assert regex_parser.compile('(a*b*)*', minimize=False) is not compiled
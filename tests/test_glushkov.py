@@ -0,0 +1,55 @@
+import random
+import re
+from regex_parser.RegexParser import RegexParser
+from regex_parser.glushkov import GlushkovBuilder, Positions
+from regex_parser.compact import CompactAutomata
+from regex_parser.dfa import DFA
+from regex_parser.Automata import Automata
+
+
+def test_positions():
+    builder = GlushkovBuilder()
+    part = RegexParser('(a|b)*abb', builder=builder).parse()
+    assert part == Positions(False, frozenset([1, 2, 3]), frozenset([5]))
+    assert builder.follow == {
+        1: {1, 2, 3}, 2: {1, 2, 3}, 3: {4}, 4: {5}, 5: set()}
+
+
+def test_no_empty_edge():
+    nfa = RegexParser('(a|b)*a(b|c?)+', builder=GlushkovBuilder()).build_NFA()
+    assert len(nfa.states) == 6
+    for to_states in nfa.transitions.values():
+        for symbols in to_states.values():
+            assert not symbols & Automata.empty_string
+
+
+def test_same_dfa():
+    for automata_class in (Automata, CompactAutomata):
+        builder = GlushkovBuilder(automata_class)
+        nfa = RegexParser('(a|b)*abb', builder=builder).build_NFA()
+        dfa, _ = DFA(nfa).minimize()
+        assert len(dfa.states) == 4
+        assert dfa.compile().fullmatch('babb')
+
+
+def test_random():
+    random.seed(14)
+    patterns = ['(a|b)*abb', 'a?b+|c*', '(ab|b)*a?', '[a-c]{1,3}b?',
+                '()', 'a(b|)*', '(a*b*)*c']
+    for pattern in patterns:
+        nfa = RegexParser(pattern, builder=GlushkovBuilder()).build_NFA()
+        for _ in range(200):
+            text = ''.join(random.choice('abc')
+                           for _ in range(random.randrange(6)))
+            assert nfa.fullmatch(text) == bool(re.fullmatch(pattern, text)), \
+                (pattern, text)
+
+
+def test_zero_count():
+    # the base repeated zero times makes no position
+    nfa = RegexParser('a{0}b', builder=GlushkovBuilder()).build_NFA()
+    assert nfa.states == {0, 1}
+    assert nfa.fullmatch('b') and not nfa.fullmatch('ab')
+    nfa = RegexParser('x(a[)]|b){0,0}y{,0}z').build_NFA()
+    assert nfa.useful_states() == nfa.states
+    assert nfa.fullmatch('xz')
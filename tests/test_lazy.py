@@ -0,0 +1,85 @@
+import random
+from regex_parser.RegexParser import RegexParser
+from regex_parser.builder import NFABuilder
+from regex_parser.lazy import LazyDFA
+
+
+def lazy(pattern, **kwargs):
+    nfa = RegexParser(pattern, builder=NFABuilder()).build_NFA()
+    return LazyDFA(nfa, **kwargs)
+
+
+def test_match():
+    dfa = lazy('(a|b)*abb')
+    assert dfa.fullmatch('babb')
+    assert not dfa.fullmatch('babba')
+    assert dfa.match('abbabbc') == 6
+    assert dfa.search('ccabbabbc') == (2, 8)
+    assert dfa.search('cab') is None
+
+
+def test_only_the_path():
+    dfa = lazy('(a|b)*abb')
+    assert dfa.fullmatch('abb')
+    # the state after 'b' from the start is not built
+    assert len(dfa) == 4
+
+
+def test_bounded_cache():
+    # the full DFA has 2 ** 13 states
+    dfa = lazy('(a|b)*a' + '(a|b)' * 12, max_states=64)
+    random.seed(0)
+    text = ''.join(random.choice('ab') for _ in range(3000))
+    assert dfa.fullmatch(text + 'a' * 13)
+    assert not dfa.fullmatch(text + 'b' * 13)
+    assert len(dfa) <= 64
+    assert dfa.flushes > 0
+    assert dfa.fallbacks > 0
+
+
+def test_reset_after_fallback():
+    dfa = lazy('(a|b)*a' + '(a|b)' * 12, max_states=64)
+    random.seed(0)
+    text = ''.join(random.choice('ab') for _ in range(400))
+    # the second scan falls back with the start state in the full cache
+    dfa.fullmatch(text)
+    dfa.fullmatch(text[::-1])
+    fallbacks = dfa.fallbacks
+    assert fallbacks > 0
+    # the scans after the fallback are run by the cache again,
+    # even when they need new states
+    for text in ('abab', 'a' * 20, 'aabb' * 5):
+        dfa.fullmatch(text)
+    assert dfa.fallbacks == fallbacks
+    assert 0 < len(dfa) <= 64
+
+
+def test_search_one_scan():
+    random.seed(9)
+    for pattern in ['(a|b)*abb', 'a+b?c', '(ab|a)(bc|c)', 'c*', 'xa*']:
+        for max_states in (2, 1024):
+            dfa = lazy(pattern, max_states=max_states)
+            for _ in range(200):
+                text = ''.join(random.choice('abcx')
+                               for _ in range(random.randrange(12)))
+                expect = next(((begin, dfa.match(text, begin))
+                               for begin in range(len(text) + 1)
+                               if dfa.match(text, begin) is not None), None)
+                assert dfa.search(text) == expect, (pattern, text)
+    assert lazy('a*b').search('a' * 100000) is None
+
+
+def test_memory_per_character():
+    dfa = lazy('([^a]|a)*a[^a]{40}', max_states=4)
+    random.seed(4)
+    text = ''.join(random.choice(['a', 'α', chr(random.randrange(0x4e00,
+                                                                 0x9fff))])
+                   for _ in range(3000))
+    dfa.fullmatch(text)
+    dfa.search(text)
+    assert dfa.fallbacks > 0
+    # the edges are labelled by classes, the NFA steps keep nothing
+    assert len(dfa.classes) == 2
+    assert all(len(edges) <= 2 for edges in dfa._next)
+    assert not dfa.nfa._move_masks
+    assert len(dfa) <= 4
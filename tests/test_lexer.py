@@ -0,0 +1,34 @@
+import pytest
+from regex_parser.lexer import Lexer, Token
+
+rules = [
+    ('if', 'if'),
+    ('id', '[a-z][a-z0-9]*'),
+    ('num', '[0-9]+'),
+    ('+', '\\+'),
+    ('*', '\\*'),
+    ('(', '\\('),
+    (')', '\\)'),
+    ('space', '[ \t\n]+'),
+]
+lexer = Lexer(rules, skip=['space'])
+
+
+def test_tokenize():
+    tokens = list(lexer.tokenize('(a1 + 22) * b'))
+    assert [t.name for t in tokens] == \
+        ['(', 'id', '+', 'num', ')', '*', 'id']
+    assert tokens[1] == Token('id', 'a1', 1)
+    assert tokens[3] == Token('num', '22', 6)
+
+
+def test_priority_and_longest():
+    # `if` is also an `id`, the earlier rule wins
+    assert list(lexer.tokenize('if')) == [Token('if', 'if', 0)]
+    # but a longer `id` wins
+    assert list(lexer.tokenize('iffy')) == [Token('id', 'iffy', 0)]
+
+
+def test_error():
+    with pytest.raises(RuntimeError):
+        list(lexer.tokenize('a $ b'))
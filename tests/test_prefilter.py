@@ -0,0 +1,68 @@
+import random
+import regex_parser
+from regex_parser import syntax
+from regex_parser.cache import build
+from regex_parser.prefilter import Prefilter
+
+
+def prefilter(pattern):
+    return Prefilter.from_syntax(syntax.parse(pattern))
+
+
+def test_literals():
+    assert prefilter('err(or|no)*').prefixes == ('err',)
+    assert prefilter('err(or|no)*').required == 'err'
+    assert prefilter('(warn|err)or').prefixes == ('error', 'warnor')
+    assert prefilter('[a-z]+ERROR[0-9]*').prefixes == ()
+    assert prefilter('[a-z]+ERROR[0-9]*').required == 'ERROR'
+    assert prefilter('a?b').prefixes == ('ab', 'b')
+    assert prefilter('(a|b)*') is None
+    assert prefilter('[^a]x') .required == 'x'
+
+
+def test_candidates():
+    assert list(prefilter('err(or|no)*').candidates('an error, an err')) \
+        == [3, 13]
+    assert list(prefilter('(ab|b)c').candidates('abcbc')) == [0, 1, 3]
+    assert list(prefilter('[a-z]+ERROR').candidates('no error')) == []
+
+
+def test_search():
+    random.seed(20)
+    for pattern in ['err(or|no)*', '(warn|err)or', '[a-z]+ERROR[0-9]*',
+                    'a?b', '[a-c]{2}x']:
+        compiled = regex_parser.compile(pattern)
+        assert compiled.prefilter is not None
+        # not cached, so the shared instance is never changed
+        plain = build(pattern)
+        plain.prefilter = None
+        for _ in range(200):
+            text = ''.join(random.choice(['a', 'b', 'c', 'x', 'err', 'or',
+                                          'no', 'ERROR', '1', ' '])
+                           for _ in range(random.randrange(12)))
+            assert compiled.search(text) == plain.search(text), \
+                (pattern, text)
+
+
+class Counted:
+    """a table counting its reads"""
+
+    def __init__(self, table):
+        self.table = table
+        self.reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return self.table[index]
+
+
+def test_required_skips():
+    assert list(prefilter('[a-z]+foo').candidates('a foo b')) \
+        == [0, 1, 2]
+    compiled = build('[a-z]+foo')
+    compiled.table = Counted(compiled.table)
+    text = 'foo.' + 'z' * 5000
+    assert compiled.search(text) is None
+    # no begin after the last literal is tried
+    assert compiled.table.reads < 10
+    assert compiled.search('.abfoo.' + 'z' * 50) == (1, 6)
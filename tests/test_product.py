@@ -0,0 +1,86 @@
+import random
+import re
+import pytest
+from regex_parser.RegexParser import RegexParser
+from regex_parser.builder import NFABuilder
+from regex_parser.dfa import DFA
+from regex_parser.product import Product, complement, difference, \
+    intersection
+
+
+def dfa(pattern):
+    return DFA(RegexParser(pattern, builder=NFABuilder()).build_NFA())
+
+
+def test_intersection():
+    both = dfa('(a|b)*abb').intersection(dfa('a*b*'))
+    assert both.fullmatch('aabb') and both.fullmatch('abb')
+    assert not both.fullmatch('babb') and not both.fullmatch('ab')
+    assert both.witness() == 'abb'
+    assert dfa('a+').intersection(dfa('b+')).is_empty()
+
+
+def test_difference():
+    keywords = dfa('if|else|while')
+    words = dfa('[a-z]+').compile()
+    assert difference(keywords, words).is_empty()
+    rest = difference(words, keywords)
+    assert not rest.is_empty()
+    witness = rest.witness()
+    assert len(witness) == 1 and rest.fullmatch(witness)
+    assert not rest.fullmatch('if') and rest.fullmatch('iff')
+
+
+def test_complement():
+    refused = dfa('[a-c]*').complement()
+    assert refused.fullmatch('abz') and refused.fullmatch('\x00')
+    assert not refused.fullmatch('') and not refused.fullmatch('cab')
+    assert len(refused.witness()) == 1
+    # the complement of the complement
+    again = complement(refused)
+    assert again.fullmatch('abc') and not again.fullmatch('abd')
+    assert dfa('a|[^a]').complement().witness() == ''
+
+
+def test_lazy():
+    # the full product has 2 ** 11 * 3 pairs, the witness needs few
+    left = dfa('(a|b)*a' + '(a|b)' * 10)
+    both = intersection(left, dfa('a*'))
+    assert both.witness() == 'a' * 11
+    assert sum(1 for _ in both.states()) <= 12
+
+
+def test_to_dfa():
+    both = intersection(dfa('(a|b)*abb'), dfa('[ab][ab][ab]?[ab]?'))
+    built = both.to_dfa()
+    minimal, _ = built.minimize()
+    assert minimal.compile().fullmatch('babb')
+    assert not minimal.compile().fullmatch('aababb')
+
+
+@pytest.mark.parametrize('first, second', [
+    ('(a|b)*abb', '(a|bc)*'), ('[a-c]+x?', 'a*b*c*'), ('(ab|c)*', '[a-c]*a')])
+def test_random(first, second):
+    operations = {
+        'and': (intersection, lambda a, b: a and b),
+        'minus': (difference, lambda a, b: a and not b)}
+    random.seed(0)
+    for build, expect in operations.values():
+        combined = build(dfa(first), dfa(second))
+        for _ in range(300):
+            text = ''.join(random.choice('abcx')
+                           for _ in range(random.randint(0, 7)))
+            assert combined.fullmatch(text) == expect(
+                bool(re.fullmatch(first, text)),
+                bool(re.fullmatch(second, text))), text
+        witness = combined.witness()
+        if witness is not None:
+            assert combined.fullmatch(witness)
+    # first and not (first and second), that is first minus second
+    nested = Product(intersection(dfa(first), dfa(second)), dfa(first),
+                     lambda a, b: b and not a)
+    for _ in range(300):
+        text = ''.join(random.choice('abcx')
+                       for _ in range(random.randint(0, 7)))
+        assert nested.fullmatch(text) == bool(
+            re.fullmatch(first, text) and not re.fullmatch(second, text))
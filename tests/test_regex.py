@@ -1,3 +1,7 @@
+import random
+import re
+import pytest
+from regex_parser.Automata import Automata
 from regex_parser.RegexParser import RegexParser
 
 def figure_path(s):
@@ -77,3 +81,113 @@ def test_complex():
     assert nfa2.transitions == expect
     nfa2.draw(save=figure_path('complex'),seed=53138909)
 
+
+def test_position():
+    parser = RegexParser('ab')
+    parser.parse_base_part()
+    assert parser.position == 1
+    assert parser.pattern == 'ab'
+    assert parser.more()
+    parser.next()
+    assert not parser.more()
+
+def test_error_position():
+    with pytest.raises(RuntimeError, match='position 3'):
+        RegexParser('(ab').parse_regex()
+    with pytest.raises(RuntimeError, match='position 2'):
+        RegexParser('ab)c').build_NFA()
+
+def test_class():
+    nfa = RegexParser('[a-z0-9]').parse_base_part()
+    # one edge for the whole class
+    assert len(nfa.transitions[1][2]) == 1
+    assert nfa.fullmatch('q')
+    assert nfa.fullmatch('7')
+    assert not nfa.fullmatch('A')
+    negated = RegexParser('[^a-z]').parse_base_part()
+    assert negated.fullmatch('A')
+    assert not negated.fullmatch('q')
+    assert RegexParser('[]-]').parse_base_part().fullmatch(']')
+    assert RegexParser('[x]').parse_base_part().transitions == {1: {2: {'x'}}}
+
+def test_plus_and_optional():
+    nfa = RegexParser('ab+c?').parse_regex()
+    assert nfa.fullmatch('abbb')
+    assert nfa.fullmatch('abc')
+    assert not nfa.fullmatch('ac')
+    assert not nfa.fullmatch('abcc')
+
+def random_pattern(depth=3):
+    # no '*', Automata.star_operation keeps the edges of the baseline
+    if depth == 0 or random.random() < 0.3:
+        return random.choice('abc')
+    kind = random.choice('|.+?')
+    if kind == '|':
+        return f"({random_pattern(depth - 1)}|{random_pattern(depth - 1)})"
+    if kind == '.':
+        return random_pattern(depth - 1) + random_pattern(depth - 1)
+    return f"({random_pattern(depth - 1)}){kind}"
+
+def test_plus_and_optional_against_re():
+    for pattern, text in (('((bc(a)+)?|b)', 'a'), ('(a((c)+)?)?', 'cc'),
+                          ('((cc(c)+)?)+', 'c')):
+        assert not RegexParser(pattern, builder=Automata).build_NFA() \
+            .fullmatch(text)
+    random.seed(0)
+    for _ in range(200):
+        pattern = random_pattern()
+        nfas = [RegexParser(pattern, builder=Automata).build_NFA(),
+                RegexParser(pattern).build_NFA(),
+                RegexParser(f"({pattern})*").build_NFA()]
+        for _ in range(20):
+            text = ''.join(random.choice('abc')
+                           for _ in range(random.randint(0, 5)))
+            expect = bool(re.fullmatch(pattern, text))
+            assert nfas[0].fullmatch(text) == expect, (pattern, text)
+            assert nfas[1].fullmatch(text) == expect, (pattern, text)
+            assert nfas[2].fullmatch(text) == \
+                bool(re.fullmatch(f"({pattern})*", text)), (pattern, text)
+
+def test_count():
+    nfa = RegexParser('(ab){2,3}').parse_regex()
+    assert not nfa.fullmatch('ab')
+    assert nfa.fullmatch('abab')
+    assert nfa.fullmatch('ababab')
+    assert not nfa.fullmatch('abababab')
+    nfa = RegexParser('a{2,}').parse_regex()
+    assert nfa.fullmatch('a' * 5)
+    assert not nfa.fullmatch('a')
+    assert RegexParser('ba{0}').parse_regex().fullmatch('b')
+    for wrong in ('a{3,1}', '[b-a]', '[ab'):
+        with pytest.raises(RuntimeError, match='position'):
+            RegexParser(wrong).build_NFA()
+
+
+def test_brace_literal():
+    # a '{' which does not begin a count is a character, as in re
+    for pattern, texts in [('a{', ['a{', 'a']), ('a{x}', ['a{x}', 'ax']),
+                           ('a{}', ['a{}', 'a']), ('a{1,2', ['a{1,2', 'a']),
+                           ('x{,3}', ['', 'xxx', 'xxxx', 'x{,3}']),
+                           ('a{,}', ['', 'aaa', 'a{,}']),
+                           ('a{1,2,}', ['a{1,2,}', 'a'])]:
+        nfa = RegexParser(pattern).build_NFA()
+        for text in texts:
+            assert nfa.fullmatch(text) == bool(re.fullmatch(pattern, text)), \
+                (pattern, text)
+
+
+def test_nested_count(monkeypatch):
+    nfa = RegexParser('((a{3}){3}){3}').build_NFA()
+    assert nfa.fullmatch('a' * 27)
+    assert not nfa.fullmatch('a' * 26)
+    nfa = RegexParser('(b(a{2}){2,}){2}').build_NFA()
+    assert nfa.fullmatch('baaaabaaaaaa')
+    assert not nfa.fullmatch('baaaaba')
+    # the base is parsed once more for each level of counts,
+    # not once more for each copy
+    bases = []
+    parse_base_part = RegexParser.parse_base_part
+    monkeypatch.setattr(RegexParser, 'parse_base_part',
+                        lambda self: bases.append(1) or parse_base_part(self))
+    RegexParser('((((a{3}){3}){3}){3}){3}').build_NFA()
+    assert len(bases) < 50
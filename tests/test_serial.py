@@ -0,0 +1,94 @@
+import pickle
+import pytest
+import regex_parser
+from regex_parser.RegexParser import RegexParser
+from regex_parser.Automata import Automata
+from regex_parser.builder import NFABuilder
+from regex_parser.compact import CompactAutomata
+from regex_parser.compiled import CompiledDFA
+from regex_parser.dfa import DFA
+from regex_parser import serial
+
+
+def test_automata(tmp_path):
+    nfa = RegexParser('(a|[b-d])*abb', builder=NFABuilder()).build_NFA()
+    path = tmp_path / 'nfa.rxp'
+    nfa.dump(path)
+    loaded = Automata.load(path)
+    assert isinstance(loaded, CompactAutomata)
+    assert isinstance(loaded._targets, memoryview)
+    assert loaded.states == nfa.states
+    assert loaded.start_state == nfa.start_state
+    assert loaded.final_states == nfa.final_states
+    assert loaded.input_alphabet == nfa.input_alphabet
+    assert dict(loaded.transitions.items()) == nfa.transitions
+    assert loaded.fullmatch('cabb') and not loaded.fullmatch('cab')
+    # a loaded automata can be changed
+    loaded.add_transition(1, 2, set(['x']))
+    assert 'x' in loaded.transitions[1][2]
+
+
+def test_dfa(tmp_path):
+    nfa = RegexParser('(a|b)*abb', builder=NFABuilder()).build_NFA()
+    dfa = DFA(nfa)
+    path = tmp_path / 'dfa.rxp'
+    dfa.dump(path)
+    loaded = DFA.load(path, use_mmap=False)
+    assert isinstance(loaded, DFA)
+    assert loaded.transitions == dfa.transitions
+    assert loaded.final_states == dfa.final_states
+    with pytest.raises(ValueError):
+        Automata.load(path)  # not an NFA file
+
+
+def test_trimmed(tmp_path):
+    nfa = RegexParser('ab', builder=NFABuilder()).build_NFA()
+    nfa.add_transition(nfa.start_state, 100, set(['c']))  # reaches no final
+    nfa.add_transition(200, nfa.start_state, set(['d']))  # unreachable
+    path = tmp_path / 'nfa.rxp'
+    nfa.dump(path)
+    loaded = Automata.load(path)
+    assert loaded.states == nfa.states - set([100, 200])
+    assert 100 in nfa.states  # the automata is not changed
+    assert loaded.fullmatch('ab') and not loaded.fullmatch('c')
+
+
+def test_compiled(tmp_path):
+    compiled = regex_parser.compile('[a-z]+[0-9]?')
+    path = tmp_path / 'compiled.rxp'
+    compiled.dump(path)
+    loaded = CompiledDFA.load(path)
+    assert isinstance(loaded.table, memoryview)
+    assert list(loaded.table) == list(compiled.table)
+    assert loaded.symbols == compiled.symbols
+    assert loaded.search('  abc1 ') == (2, 6)
+    assert not loaded.fullmatch('1')
+    copied = pickle.loads(pickle.dumps(loaded))
+    assert copied.search('  abc1 ') == (2, 6)
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / 'bad.rxp'
+    path.write_bytes(b'not an automata')
+    with pytest.raises(ValueError):
+        CompiledDFA.load(path)
+    regex_parser.compile('a').dump(path)
+    data = bytearray(path.read_bytes())
+    data[4] = serial.VERSION + 1
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        CompiledDFA.load(path)
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / 'dfa.rxp'
+    regex_parser.compile('[a-z]+[0-9]?').dump(path)
+    data = path.read_bytes()
+    for cut in (1, 2, 3, 4, 9, len(data) - 10):
+        path.write_bytes(data[:-cut])
+        with pytest.raises(ValueError):
+            CompiledDFA.load(path)
+    path.write_bytes(data)
+    assert CompiledDFA.load(path).fullmatch('ab1')
+    # no temporary file is left
+    assert [p.name for p in tmp_path.iterdir()] == ['dfa.rxp']
@@ -0,0 +1,93 @@
+import io
+import mmap
+import random
+import re
+import pytest
+from regex_parser.builder import NFABuilder
+from regex_parser.RegexParser import RegexParser
+from regex_parser.dfa import DFA
+from regex_parser.lexer import Lexer
+from regex_parser.stream import finditer, iter_chunks
+
+
+def compiled(pattern):
+    nfa = RegexParser(pattern, builder=NFABuilder()).build_NFA()
+    dfa, _ = DFA(nfa).minimize()
+    return dfa.compile()
+
+
+def expected(pattern, text):
+    return [(m.start(), m.end(), m.group())
+            for m in re.finditer(pattern, text) if m.end() > m.start()]
+
+
+def test_iter_chunks():
+    assert ''.join(iter_chunks('abc')) == 'abc'
+    data = 'aé€b'.encode()
+    # the characters are split between the chunks
+    assert ''.join(iter_chunks(data, chunk_size=1)) == 'aé€b'
+    assert ''.join(iter_chunks(memoryview(data), chunk_size=2)) == 'aé€b'
+    assert ''.join(iter_chunks(io.BytesIO(data), chunk_size=3)) == 'aé€b'
+    assert ''.join(iter_chunks(io.StringIO('xyz'), chunk_size=2)) == 'xyz'
+    assert ''.join(iter_chunks([b'a\xc3', b'\xa9', 'z'])) == 'aéz'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 100])
+def test_finditer(chunk_size):
+    pattern = 'ab+|b*c'
+    dfa = compiled(pattern)
+    random.seed(chunk_size)
+    text = ''.join(random.choice('abcd') for _ in range(300))
+    found = list(finditer(dfa, text.encode(), chunk_size=chunk_size))
+    assert found == expected(pattern, text)
+
+
+def test_finditer_mmap(tmp_path):
+    path = tmp_path / 'log'
+    text = 'x ab abbb c ' * 50
+    path.write_bytes(text.encode())
+    dfa = compiled('ab+|c')
+    with open(path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        found = list(finditer(dfa, data, chunk_size=5))
+    assert found == expected('ab+|c', text)
+
+
+def test_tokenize_stream():
+    lexer = Lexer([('if', 'if'), ('id', '[a-z]+'), ('num', '[0-9]+'),
+                   ('space', ' +')], skip=['space'])
+    text = 'if iffy 123 x  if'
+    chunks = [text[i:i + 2] for i in range(0, len(text), 2)]
+    assert list(lexer.tokenize_stream(chunks)) == list(lexer.tokenize(text))
+    with pytest.raises(RuntimeError):
+        list(lexer.tokenize_stream(['ab', ' $']))
+
+
+class Counted:
+    """a table counting its reads"""
+
+    def __init__(self, table):
+        self.table = table
+        self.reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return self.table[index]
+
+
+def test_finditer_one_scan():
+    dfa = compiled('a*b|c')
+    dfa.table = Counted(dfa.table)
+    text = 'a' * 2000 + 'c'
+    found = list(finditer(dfa, text.encode(), chunk_size=64))
+    assert found == [(2000, 2001, 'c')]
+    # a failed begin is not read again
+    assert dfa.table.reads < 4 * len(text)
+    random.seed(5)
+    for pattern in ('a*b|c', 'ab|b*a+', '(ab)+|b'):
+        dfa = compiled(pattern)
+        text = ''.join(random.choice('abc') for _ in range(200))
+        for chunk_size in (1, 3, 50):
+            found = list(finditer(dfa, text.encode(),
+                                  chunk_size=chunk_size))
+            assert found == expected(pattern, text)
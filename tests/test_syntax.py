@@ -0,0 +1,48 @@
+import random
+import re
+from regex_parser import syntax
+from regex_parser.syntax import Choice, Concat, Empty, Star, Symbol, fold
+from regex_parser.builder import NFABuilder
+from regex_parser.dfa import DFA
+
+
+def test_parse():
+    tree = syntax.parse('a|b*')
+    assert tree == Choice(Concat(Empty(), Symbol(frozenset('a'))),
+                          Concat(Empty(), Star(Symbol(frozenset('b')))))
+
+
+def test_fold():
+    tree = syntax.parse('(a|b)*abb')
+    nfa = fold(tree, NFABuilder())
+    assert len(DFA(nfa).minimize()[0].states) == 4
+    # deep trees are folded without recursion
+    nfa = fold(syntax.parse('ab' * 3000), NFABuilder())
+    assert nfa.fullmatch('ab' * 3000)
+
+
+def test_from_syntax():
+    dfa = DFA.from_syntax(syntax.parse('(a|b)*abb'))
+    # the Dragon book, figure 3.63
+    expect = {
+        1: {2: {'a'}, 1: {'b'}},
+        2: {2: {'a'}, 3: {'b'}},
+        3: {2: {'a'}, 4: {'b'}},
+        4: {2: {'a'}, 1: {'b'}},
+    }
+    assert dfa.transitions == expect
+    assert dfa.start_state == 1
+    assert dfa.final_states == set([4])
+
+
+def test_from_syntax_random():
+    random.seed(15)
+    patterns = ['a?b+|c*', '(ab|b)*a?', '[a-c]{1,3}b?', '()', '(a*b*)*c',
+                '[^a]b|a{2,}']
+    for pattern in patterns:
+        compiled = DFA.from_syntax(syntax.parse(pattern)).compile()
+        for _ in range(200):
+            text = ''.join(random.choice('abcd')
+                           for _ in range(random.randrange(6)))
+            assert compiled.fullmatch(text) == \
+                bool(re.fullmatch(pattern, text)), (pattern, text)
@@ -0,0 +1,66 @@
+import mmap
+import random
+import re
+import regex_parser
+from regex_parser.charclass import CharClass
+from regex_parser.utf8 import ByteDFA, utf8_sequences
+
+
+def matched(sequences, data):
+    return any(len(sequence) == len(data) and
+               all(low <= byte <= high
+                   for (low, high), byte in zip(sequence, data))
+               for sequence in sequences)
+
+
+def test_sequences():
+    assert utf8_sequences(CharClass.from_range('a', 'z')) == [((97, 122),)]
+    assert utf8_sequences(CharClass([(0x80, 0x7FF)])) == \
+        [((0xC2, 0xDF), (0x80, 0xBF))]
+    random.seed(21)
+    for _ in range(20):
+        low = random.randrange(0x110000)
+        high = min(low + random.randrange(0x3000), 0x10FFFF)
+        cls = CharClass([(low, high)])
+        sequences = utf8_sequences(cls)
+        for _ in range(50):
+            code = random.choice([low, high, random.randrange(0x110000),
+                                  random.randrange(low, high + 1)])
+            if 0xD800 <= code <= 0xDFFF:
+                continue
+            assert matched(sequences, chr(code).encode()) == \
+                (low <= code <= high), hex(code)
+
+
+def test_bytes():
+    compiled = regex_parser.compile('[α-ω]+', utf8=True)
+    assert isinstance(compiled, ByteDFA)
+    assert len(compiled.byte_columns) == 256
+    assert compiled.fullmatch('αβγ'.encode())
+    assert not compiled.fullmatch('αβa'.encode())
+    assert compiled.search('abc αβγ'.encode()) == (4, 10)
+    assert compiled.search(memoryview('xx ω'.encode())) == (3, 5)
+    assert compiled.match(bytearray('ωx'.encode())) == 2
+
+
+def test_mmap(tmp_path):
+    path = tmp_path / 'log'
+    path.write_bytes('ok\nok\nerreur: échec\n'.encode())
+    compiled = regex_parser.compile('[a-zé]+: [^ ]+', utf8=True)
+    assert compiled.prefilter.required == b': '
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        begin, end = compiled.search(data)
+        assert data[begin:end].decode() == 'erreur: échec\n'
+
+
+def test_random():
+    random.seed(21)
+    alphabet = 'aé€😀b'
+    for pattern in ['[^a]+', '[é-😀]b?', '(a|€)*😀', '[a-z€]{2}']:
+        compiled = regex_parser.compile(pattern, utf8=True)
+        for _ in range(200):
+            text = ''.join(random.choice(alphabet)
+                           for _ in range(random.randrange(5)))
+            assert compiled.fullmatch(text.encode()) == \
+                bool(re.fullmatch(pattern, text)), (pattern, text)